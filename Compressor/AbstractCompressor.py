@@ -1,45 +1,456 @@
-from abc import ABC, abstractmethod
-from typing import Any
-import numpy as np
-
-class Compressor(ABC):
-    @abstractmethod
-    def compress(self, arr:np.ndarray[int]) -> tuple[Any]:
-        """The method to be implemented/overrided for compressing the integer array
-
-        Args:
-            arr (np.ndarray[int]): An integer array to compress
-
-        Returns:
-            tuple[Any]: A tuple including at least the compressed array and the maximum bit length, it may also include an overflow area depending on the implementation.
-        """
-    
-    @abstractmethod
-    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
-        """The method to be implemented/overrided for decompressing the array
-
-        Args:
-            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
-
-        Returns:
-            np.ndarray[int]: The decompressed integer array.
-        """
-    
-    @abstractmethod
-    def get(self, args:tuple[Any]):
-        """The method to find the i-th number of the compressed array.
-
-        Args:
-            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
-        """
-    
-    def _getMaxBitLength(self, arr:np.ndarray[int]) -> int:
-        """Protected helper function to find the necessary bit length to encode the supremum object of the array.
-
-        Args:
-            arr (np.ndarray[int]): An array of integer
-
-        Returns:
-            int: The bit length necessary to encode the supremum object.
-        """
-        return int(arr.__abs__().max()).bit_length()
\ No newline at end of file
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterator
+import numpy as np
+
+from Compressor.BitUtils import MAX_BIT_LENGTH, splitSigns, exactSum
+from Compressor.CompressedArray import CompressedArray
+
+WORD_SIZES = (32, 64) #Word sizes the compressed arrays can be padded or packed to
+SCAN_CHUNK_SIZE = 2**17 #Number of elements decoded at once by the scans, small enough to stay in cache
+WIDTH_GROWTH = 1.25 #Factor by which the bit length of a compressed array grows when a written value does not fit, so that it is re-packed a few times only
+
+# Comparison operators accepted by the scans
+COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal
+}
+
+class Compressor(ABC):
+    @abstractmethod
+    def compress(self, arr:np.ndarray[int]) -> tuple[Any]:
+        """The method to be implemented/overrided for compressing the integer array
+
+        Args:
+            arr (np.ndarray[int]): An integer array to compress
+
+        Returns:
+            tuple[Any]: A tuple including at least the compressed array and the maximum bit length, it may also include an overflow area depending on the implementation.
+        """
+    
+    @abstractmethod
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to be implemented/overrided for decompressing the array
+
+        Args:
+            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+    
+    @abstractmethod
+    def get(self, args:tuple[Any]):
+        """The method to find the i-th number of the compressed array.
+
+        Args:
+            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
+        """
+    
+    @abstractmethod
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to find the numbers at several positions of the compressed array at once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+    
+    @abstractmethod
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress a window of the array, only reading the part of the compressed array covering it.
+
+        Args:
+            start (int): The first position of the window.
+            stop (int): The position after the last one of the window.
+            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers of the window.
+        """
+    
+    @abstractmethod
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """The method to compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): The bit length histogram of the array, computed if not given.
+
+        Returns:
+            int: The number of bits of the packed buffers sent by the serialisation.
+        """
+    
+    @abstractmethod
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """The method to split a compressed array into its integer parameters and its packed buffers, used for serialisation.
+
+        Args:
+            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: A tuple containing in 1st position the integer parameters and in 2nd position the packed buffers.
+        """
+    
+    @abstractmethod
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[Any]:
+        """The method to rebuild a compressed array from the output of toParts, without copying the buffers.
+
+        Args:
+            params (tuple[int]): The integer parameters.
+            buffers (list[Any]): The packed buffers (any object exposing a buffer).
+
+        Returns:
+            tuple[Any]: The compressed array, as returned by compress.
+        """
+    
+    @abstractmethod
+    def getLength(self, *args:tuple[Any]) -> int:
+        """The method to find the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): An input containing at least the compressed array and the maximum bit length, it may also require an overflow area depending on the implementation.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+    
+    def decompressInto(self, out:np.ndarray[int]|memoryview, start:int, *args:tuple[Any]) -> int:
+        """Decompress the elements from start into a preallocated buffer, chunk by chunk, so that the temporary arrays never depend on the length of the array.
+
+        Args:
+            out (np.ndarray[int] | memoryview): A writable one-dimensional integer buffer (NumPy array, or memoryview of the right format such as `shm.buf.cast("q")`), filled from its first element.
+            start (int): The first position to decompress, negative positions counting from the end.
+            *args (tuple[Any]): The compressed tuple.
+
+        Raises:
+            ValueError: If the buffer is not a writable one-dimensional integer buffer, or if a decompressed element does not fit its type.
+
+        Returns:
+            int: The number of elements written, the length of the buffer or less when the end of the array is reached.
+        """
+        out = self._checkOutput(out)
+        initialLength = self.getLength(*args)
+        start, _ = self._checkRange(start, None, initialLength)
+        stop = min(start + len(out), initialLength)
+        
+        # The elements are only checked against the type of the buffer when it is narrower than int64 and the bounds of the array do not fit it
+        info = np.iinfo(out.dtype)
+        bounds = self._getBounds(*args) if out.dtype != np.int64 else (info.min, info.max)
+        isChecked = bounds is None or bounds[0] < info.min or bounds[1] > info.max
+        
+        for chunkStart in range(start, stop, SCAN_CHUNK_SIZE):
+            values = self.decompressRange(chunkStart, min(chunkStart + SCAN_CHUNK_SIZE, stop), *args)
+            if isChecked and len(values) != 0 and (values.min() < info.min or values.max() > info.max):
+                raise ValueError(f"Decompressed elements do not fit the {out.dtype} buffer.")
+            out[chunkStart - start:chunkStart - start + len(values)] = values
+        return stop - start
+    
+    def compressArray(self, arr:np.ndarray[int]) -> CompressedArray:
+        """Compress an integer array into a compressed array object, readable as a sequence without decompressing it.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            CompressedArray: The compressed tuple of this compressor with its length, supporting len, indexing, iteration and np.asarray.
+        """
+        return CompressedArray(self, self.compress(arr))
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Compute the constants of the layout once and return a function reading a single element, to be overrided by the compressors having a faster path than get.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        return lambda i: self.get(i, *args)
+    
+    def sum(self, *args:tuple[Any]) -> int:
+        """Compute the sum of the compressed array, decoding it chunk by chunk.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            int: The sum of the elements.
+        """
+        # The bounds of the array tell whether the chunk sums may overflow 64 bits
+        bounds = self._getBounds(*args)
+        return sum(exactSum(values, bounds) for _, values in self._iterChunks(*args))
+    
+    def min(self, *args:tuple[Any]) -> int:
+        """Compute the minimum of the compressed array, decoding it chunk by chunk.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The smallest element.
+        """
+        return int(min(values.min() for _, values in self._iterChunks(*args)))
+    
+    def max(self, *args:tuple[Any]) -> int:
+        """Compute the maximum of the compressed array, decoding it chunk by chunk.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The largest element.
+        """
+        return int(max(values.max() for _, values in self._iterChunks(*args)))
+    
+    def countWhere(self, op:str, value:int, *args:tuple[Any]) -> int:
+        """Count the elements of the compressed array satisfying a comparison, decoding it chunk by chunk.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            int: The number of elements satisfying `element op value`.
+        """
+        comparison = self._getComparison(op)
+        
+        # The bounds of the array may answer without decoding it
+        decided = self._decideFromBounds(op, value, *args)
+        if decided is not None:
+            return self.getLength(*args) if decided else 0
+        return sum(int(np.count_nonzero(comparison(values, value))) for _, values in self._iterChunks(*args))
+    
+    def where(self, op:str, value:int, *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Find the positions of the elements of the compressed array satisfying a comparison, decoding it chunk by chunk.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            np.ndarray[np.int64]: The increasing positions of the elements satisfying `element op value`.
+        """
+        comparison = self._getComparison(op)
+        
+        # The bounds of the array may answer without decoding it
+        decided = self._decideFromBounds(op, value, *args)
+        if decided is not None:
+            return np.arange(self.getLength(*args) if decided else 0, dtype=np.int64)
+        return np.concatenate([np.zeros(0, dtype=np.int64)] + [start + np.flatnonzero(comparison(values, value)) for start, values in self._iterChunks(*args)])
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[Any]:
+        """Write a value at the i-th position of the compressed array, by re-packing the whole array unless overrided by a compressor able to write in place.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): The compressed tuple.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[Any]: The compressed tuple holding the value, to be used instead of the given one (their buffers may be shared).
+        """
+        i = int(self._checkIndices([i], self.getLength(*args))[0])
+        arr = self.decompress(*args)
+        arr[i] = value
+        return self.compress(arr)
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[Any]:
+        """Append values at the end of the compressed array, by re-packing the whole array unless overrided by a compressor able to write in place.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[Any]: The compressed tuple holding the values, to be used instead of the given one (their buffers may be shared).
+        """
+        return self.compress(np.concatenate([self.decompress(*args), np.asarray(values, dtype=np.int64)]))
+    
+    def _iterChunks(self, *args:tuple[Any]) -> Iterator[tuple[int, np.ndarray[int]]]:
+        """Protected helper function decoding the compressed array chunk by chunk, so that the scans never hold a full-size decoded array.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Yields:
+            tuple[int, np.ndarray[int]]: The position of the first element of the chunk and the decoded chunk.
+        """
+        initialLength = self.getLength(*args)
+        for start in range(0, initialLength, SCAN_CHUNK_SIZE):
+            yield start, self.decompressRange(start, start + SCAN_CHUNK_SIZE, *args)
+    
+    def _getBounds(self, *args:tuple[Any]) -> tuple[int, int]|None:
+        """Protected helper function giving bounds of the elements known without decoding them, to be overrided by the compressors storing a bit length.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[int, int] | None: A lower and an upper bound of the elements, or None if unknown.
+        """
+        return None
+    
+    def _decideFromBounds(self, op:str, value:int, *args:tuple[Any]) -> bool|None:
+        """Protected helper function deciding a comparison for the whole array from its bounds.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            bool | None: True if all the elements match, False if none of them match and None if the array has to be decoded.
+        """
+        bounds = self._getBounds(*args)
+        if bounds is None:
+            return None
+        allMatch, noneMatch = self._matchBounds(op, value, *bounds)
+        return True if allMatch else False if noneMatch else None
+    
+    def _getComparison(self, op:str) -> np.ufunc:
+        """Protected helper function finding the NumPy comparison of an operator.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+
+        Raises:
+            ValueError: If the operator is not supported.
+
+        Returns:
+            np.ufunc: The comparison.
+        """
+        if op not in COMPARISONS:
+            raise ValueError(f"unsupported comparison {op!r}, expected one of {', '.join(COMPARISONS)}")
+        return COMPARISONS[op]
+    
+    def _matchBounds(self, op:str, value:int, lows:np.ndarray[int], highs:np.ndarray[int]) -> tuple[np.ndarray[bool], np.ndarray[bool]]:
+        """Protected helper function deciding from its bounds whether all or none of the elements of a group (block, area, ...) satisfy a comparison.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            lows (np.ndarray[int]): A lower bound of the elements of each group.
+            highs (np.ndarray[int]): An upper bound of the elements of each group.
+
+        Returns:
+            tuple[np.ndarray[bool], np.ndarray[bool]]: A tuple containing in 1st position the groups where all the elements match and in 2nd position the groups where none of them match, the others having to be decoded.
+        """
+        comparison = self._getComparison(op)
+        lows, highs = np.asarray(lows), np.asarray(highs)
+        
+        # Equality can only hold within the bounds, and always holds when both bounds are the value
+        if op in ("==", "!="):
+            outside = (value < lows) | (value > highs)
+            constant = (lows == value) & (highs == value)
+            return (constant, outside) if op == "==" else (outside, constant)
+        
+        # Order comparisons are monotonic: the bounds deciding the same way decide for the whole group
+        lowMatch, highMatch = comparison(lows, value), comparison(highs, value)
+        return lowMatch & highMatch, ~lowMatch & ~highMatch
+    
+    def _checkRange(self, start:int|None, stop:int|None, initialLength:int) -> tuple[int, int]:
+        """Protected helper function bounding a window the same way as a slice does.
+
+        Args:
+            start (int | None): The first position of the window, negative positions counting from the end.
+            stop (int | None): The position after the last one of the window, negative positions counting from the end.
+            initialLength (int): The length of the uncompressed array.
+
+        Returns:
+            tuple[int, int]: The bounded start and stop, stop being never smaller than start.
+        """
+        start, stop, _ = slice(start, stop).indices(initialLength)
+        return start, max(start, stop)
+    
+    def _checkIndices(self, indices:np.ndarray[int], initialLength:int) -> np.ndarray[np.int64]:
+        """Protected helper function validating an array of positions, negative positions counting from the end.
+
+        Args:
+            indices (np.ndarray[int]): The positions to validate.
+            initialLength (int): The length of the uncompressed array.
+
+        Raises:
+            IndexError: If a position is out of the array.
+
+        Returns:
+            np.ndarray[np.int64]: The positions as non negative integers.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        indices = np.where(indices < 0, indices + initialLength, indices)
+        if np.any((indices < 0) | (indices >= initialLength)):
+            raise IndexError(f"index out of range for an array of length {initialLength}")
+        return indices
+    
+    def _checkOutput(self, out:np.ndarray[int]|memoryview) -> np.ndarray[int]:
+        """Protected helper function viewing an output buffer as a NumPy array, without copying it.
+
+        Args:
+            out (np.ndarray[int] | memoryview): The output buffer.
+
+        Raises:
+            ValueError: If the buffer is not a writable one-dimensional integer buffer.
+
+        Returns:
+            np.ndarray[int]: The array sharing the memory of the buffer.
+        """
+        out = np.asarray(out)
+        if out.ndim != 1 or not np.issubdtype(out.dtype, np.integer) or not out.flags.writeable:
+            raise ValueError("The output must be a writable one-dimensional integer buffer.")
+        return out
+    
+    def _getMaxBitLength(self, arr:np.ndarray[int]) -> int:
+        """Protected helper function to find the necessary bit length to encode the supremum object of the array.
+
+        Args:
+            arr (np.ndarray[int]): An array of integer
+
+        Returns:
+            int: The bit length necessary to encode the supremum object, at most 63 (the smallest int64 being stored as a negative zero).
+        """
+        return min(int(splitSigns(arr)[1].max(initial=0)).bit_length(), MAX_BIT_LENGTH)
+    
+    def _growBitLength(self, bitLength:int, neededBitLength:int) -> int:
+        """Protected helper function giving the bit length to re-pack a compressed array on when a written value does not fit.
+
+        Args:
+            bitLength (int): The current bit length.
+            neededBitLength (int): The bit length of the written value.
+
+        Returns:
+            int: The new bit length, at least WIDTH_GROWTH times the current one and at most 63.
+        """
+        return min(max(neededBitLength, (bitLength * WIDTH_GROWTH).__ceil__()), MAX_BIT_LENGTH)
+    
+    def _checkWordSize(self, wordSize:int) -> int:
+        """Protected helper function validating the word size of a compressor.
+
+        Args:
+            wordSize (int): The number of bits per word.
+
+        Raises:
+            ValueError: If the word size is not supported.
+
+        Returns:
+            int: The word size.
+        """
+        if wordSize not in WORD_SIZES:
+            raise ValueError(f"unsupported word size {wordSize!r}, expected one of {', '.join(map(str, WORD_SIZES))}")
+        return wordSize
\ No newline at end of file
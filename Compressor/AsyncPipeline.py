@@ -0,0 +1,95 @@
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable, Iterable
+import asyncio
+import struct
+
+PIPELINE_BLOCK_SIZE = 2**16 #Number of elements per block sent on the stream
+PIPELINE_DEPTH = 2 #Number of blocks waiting between two stages before the earlier stage is paused
+
+# Each block is sent as its size (uint64, little-endian) followed by its frame, a size of 0 ending the stream
+LENGTH_PREFIX = struct.Struct("<Q")
+
+
+async def sendBlocks(writer:asyncio.StreamWriter, chunks:Iterable[Any], encode:Callable[[Any], bytes], executor:Executor|None = None, depth:int = PIPELINE_DEPTH) -> int:
+    """Encode chunks on the executor and write them to a stream, the next chunks being encoded while the previous ones are on the wire.
+
+    At most depth encoded chunks wait for the stream, so a slow receiver (through drain) pauses the encoding.
+
+    Args:
+        writer (asyncio.StreamWriter): The stream to write to (socket, pipe, ...).
+        chunks (Iterable[Any]): The chunks to send, in order.
+        encode (Callable[[Any], bytes]): The function turning a chunk into a frame, run on the executor.
+        executor (Executor | None, optional): The executor running encode, the default executor of the loop if None. Defaults to None.
+        depth (int, optional): The number of encoded chunks waiting for the stream. Defaults to PIPELINE_DEPTH.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(max(1, depth))
+
+    # Start encoding the chunks in order, waiting when too many of them are not sent yet
+    async def produce():
+        for chunk in chunks:
+            await queue.put(loop.run_in_executor(executor, encode, chunk))
+        await queue.put(None)
+
+    # Write the frames in order, waiting for the stream to accept them
+    async def consume():
+        sentBytes = 0
+        while (future := await queue.get()) is not None:
+            frame = await future
+            writer.write(LENGTH_PREFIX.pack(len(frame)))
+            writer.write(frame)
+            await writer.drain()
+            sentBytes += LENGTH_PREFIX.size + len(frame)
+        writer.write(LENGTH_PREFIX.pack(0))
+        await writer.drain()
+        return sentBytes + LENGTH_PREFIX.size
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(produce())
+        consumer = group.create_task(consume())
+    return consumer.result()
+
+
+async def receiveBlocks(reader:asyncio.StreamReader, decode:Callable[[bytes], Any], executor:Executor|None = None, depth:int = PIPELINE_DEPTH) -> AsyncIterator[Any]:
+    """Read the frames written by sendBlocks and decode them on the executor as they arrive.
+
+    At most depth frames wait for their decoding, so a slow consumer stops the reading and, through the stream, the sender.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from (socket, pipe, ...).
+        decode (Callable[[bytes], Any]): The function turning a frame back into a chunk, run on the executor.
+        executor (Executor | None, optional): The executor running decode, the default executor of the loop if None. Defaults to None.
+        depth (int, optional): The number of frames waiting for their decoding. Defaults to PIPELINE_DEPTH.
+
+    Raises:
+        asyncio.IncompleteReadError: If the stream ends before the end of the blocks.
+
+    Yields:
+        Any: The decoded chunks, in order.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(max(1, depth))
+
+    # Read the frames and start decoding them in order, waiting when too many of them are not consumed yet
+    async def read():
+        try:
+            while (size := LENGTH_PREFIX.unpack(await reader.readexactly(LENGTH_PREFIX.size))[0]) != 0:
+                frame = await reader.readexactly(size)
+                await queue.put(loop.run_in_executor(executor, decode, frame))
+        except Exception as error:
+            # A failed read is handed over in order, as a failed block
+            failed = loop.create_future()
+            failed.set_exception(error)
+            await queue.put(failed)
+        else:
+            await queue.put(None)
+
+    reading = asyncio.create_task(read())
+    try:
+        while (future := await queue.get()) is not None:
+            yield await future
+    finally:
+        reading.cancel()
\ No newline at end of file
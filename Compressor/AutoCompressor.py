@@ -0,0 +1,305 @@
+from Compressor.AbstractCompressor import Compressor
+from Compressor.SplitCompressor import SplitCompressor
+from Compressor.NoSplitCompressor import NoSplitCompressor
+from Compressor.OverflowCompressor import OverflowCompressor
+from Compressor.FrameOfReferenceCompressor import FrameOfReferenceCompressor
+from Compressor.DeltaCompressor import DeltaCompressor
+from Compressor.DictionaryCompressor import DictionaryCompressor
+from Compressor.BitUtils import getBitLengthHistogram
+from typing import Any, Callable
+import numpy as np
+
+AUTO_MODES = ("nosplit", "split", "for", "delta", "overflow", "dict") #Candidate modes, from the fastest to the slowest to decode (dict last, its compression sorting the array), the frames holding their index so that WireFormat.VERSION has to be bumped when they change
+
+class AutoCompressor(Compressor):
+    def __init__(self, sizeBudget:float|None = None):
+        super().__init__()
+        self.sizeBudget = sizeBudget
+    
+    def compress(self, arr:np.ndarray[int]) -> tuple[tuple[Any],str,int]:
+        """The method that picks the mode (and the overflow threshold) giving the smallest compressed array and compresses the array with it.
+
+        With a size budget, the fastest mode whose size is at most (1+sizeBudget) times the smallest size is picked instead.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[tuple[Any],str,int]: A tuple containing in 1st position the array compressed by the picked mode, in 2nd the picked mode and in 3rd the picked threshold (0 if not overflow).
+        """
+        mode, threshold = self.choose(arr)
+        return self._createCompressor(mode, threshold).compress(arr), mode, threshold
+    
+    def choose(self, arr:np.ndarray[int]) -> tuple[str,int]:
+        """Pick the mode and the overflow threshold to use for an array, from a single bit length histogram.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+
+        Returns:
+            tuple[str,int]: The picked mode and threshold (0 if not overflow).
+        """
+        return self._pick(self.estimateSizes(arr))
+    
+    def estimateSizes(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> dict[tuple[str,int],int]:
+        """Compute the compressed size of every mode and of every useful overflow threshold.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): The bit length histogram of the array, computed if not given.
+
+        Returns:
+            dict[tuple[str,int],int]: The number of bits for each (mode, threshold) candidate, overflow thresholds being sorted by size.
+        """
+        histogram = getBitLengthHistogram(arr) if histogram is None else histogram
+        sizes = {
+            ("nosplit", 0): NoSplitCompressor().estimateSize(arr, histogram),
+            ("split", 0): SplitCompressor().estimateSize(arr, histogram),
+            ("for", 0): FrameOfReferenceCompressor().estimateSize(arr, histogram),
+            ("delta", 0): DeltaCompressor().estimateSize(arr, histogram),
+            ("dict", 0): DictionaryCompressor().estimateSize(arr, histogram)
+        }
+        
+        # A threshold above the max bit length gives no overflowed integer, the same as the max bit length itself
+        maxBitLength = int(np.flatnonzero(histogram).max(initial=0))
+        overflowSizes = {("overflow", threshold): OverflowCompressor(threshold).estimateSize(arr, histogram) for threshold in range(1, max(maxBitLength, 1)+1)}
+        sizes.update(sorted(overflowSizes.items(), key=lambda item: item[1]))
+        return sizes
+    
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array with the picked mode.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).decompress(*compressed)
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop with the picked mode.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).decompressRange(start, stop, *compressed)
+    
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array with the picked mode.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).get(i, *compressed)
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Return the function reading a single element with the picked mode.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).getAccessor(*compressed)
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once with the picked mode.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).getMany(indices, *compressed)
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[tuple[Any],str,int]:
+        """Write a value at the i-th position of the compressed array with the picked mode, the mode being kept.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            tuple[tuple[Any],str,int]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        compressed, mode, threshold, *_ = args
+        return (self._createCompressor(mode, threshold).set(i, value, *compressed), mode, threshold)
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[tuple[Any],str,int]:
+        """Append values at the end of the compressed array with the picked mode, the mode being kept.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            tuple[tuple[Any],str,int]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        compressed, mode, threshold, *_ = args
+        return (self._createCompressor(mode, threshold).extend(values, *compressed), mode, threshold)
+    
+    def sum(self, *args:tuple[Any]) -> int:
+        """Compute the sum of the compressed array with the picked mode.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            int: The sum of the elements.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).sum(*compressed)
+    
+    def min(self, *args:tuple[Any]) -> int:
+        """Compute the minimum of the compressed array with the picked mode.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            int: The smallest element.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).min(*compressed)
+    
+    def max(self, *args:tuple[Any]) -> int:
+        """Compute the maximum of the compressed array with the picked mode.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            int: The largest element.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).max(*compressed)
+    
+    def countWhere(self, op:str, value:int, *args:tuple[Any]) -> int:
+        """Count the elements of the compressed array satisfying a comparison with the picked mode.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            int: The number of elements satisfying `element op value`.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).countWhere(op, value, *compressed)
+    
+    def where(self, op:str, value:int, *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Find the positions of the elements of the compressed array satisfying a comparison with the picked mode.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            np.ndarray[np.int64]: The increasing positions of the elements satisfying `element op value`.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).where(op, value, *compressed)
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        compressed, mode, threshold, *_ = args
+        return self._createCompressor(mode, threshold).getLength(*compressed)
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the array compressed by the mode that would be picked, without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): The bit length histogram of the array, computed if not given.
+
+        Returns:
+            int: The number of bits of the packed buffers sent by the serialisation.
+        """
+        sizes = self.estimateSizes(arr, histogram)
+        return sizes[self._pick(sizes)]
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the picked mode and in 3rd the picked threshold.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The index of the picked mode and the threshold followed by the parameters of the picked mode, and its buffers.
+        """
+        compressed, mode, threshold, *_ = args
+        params, buffers = self._createCompressor(mode, threshold).toParts(*compressed)
+        return (AUTO_MODES.index(mode), threshold, *params), buffers
+    
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[tuple[Any],str,int]:
+        """Rebuild the compressed array from the output of toParts, without copying the buffers.
+
+        Args:
+            params (tuple[int]): The index of the picked mode and the threshold followed by the parameters of the picked mode.
+            buffers (list[Any]): The buffers of the picked mode.
+
+        Returns:
+            tuple[tuple[Any],str,int]: The compressed array, as returned by compress.
+        """
+        modeIndex, threshold, *modeParams = params
+        mode = AUTO_MODES[modeIndex]
+        return self._createCompressor(mode, threshold).fromParts(tuple(modeParams), buffers), mode, threshold
+    
+    def _pick(self, sizes:dict[tuple[str,int],int]) -> tuple[str,int]:
+        """Protected helper function picking the candidate to use from their sizes.
+
+        Args:
+            sizes (dict[tuple[str,int],int]): The number of bits for each (mode, threshold) candidate.
+
+        Returns:
+            tuple[str,int]: The smallest candidate, or the fastest one within the size budget.
+        """
+        smallestSize = min(sizes.values())
+        
+        # Without budget, keep the smallest candidate, the fastest mode winning ties (min keeps the first of equal overflow thresholds)
+        maxSize = smallestSize if self.sizeBudget is None else smallestSize * (1+self.sizeBudget)
+        candidates = [candidate for candidate, size in sizes.items() if size <= maxSize]
+        fastestMode = min(AUTO_MODES.index(mode) for mode, _ in candidates)
+        return min((candidate for candidate in candidates if AUTO_MODES.index(candidate[0]) == fastestMode), key=sizes.get)
+    
+    def _createCompressor(self, mode:str, threshold:int) -> Compressor:
+        """Protected helper function creating the compressor of a picked mode.
+
+        Args:
+            mode (str): The picked mode.
+            threshold (int): The picked threshold (only used by overflow).
+
+        Returns:
+            Compressor: The compressor.
+        """
+        if mode == "overflow":
+            return OverflowCompressor(threshold)
+        return {"nosplit": NoSplitCompressor, "split": SplitCompressor, "for": FrameOfReferenceCompressor, "delta": DeltaCompressor, "dict": DictionaryCompressor}[mode]()
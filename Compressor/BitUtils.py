@@ -0,0 +1,493 @@
+from typing import Any
+import numpy as np
+import bitarray
+from bitarray.util import zeros
+
+WORD_SIZE = 64 #Internal word size used by the vectorized packing engine
+MAX_BIT_LENGTH = WORD_SIZE - 1 #Largest magnitude bit length, the smallest int64 being stored as a negative zero so that a sign and a magnitude fit in a word
+MIN_INT64 = -2**63
+GROWTH_FACTOR = 1.5 #Factor by which the buffers of a mutable compressed array grow when full, so that appends stay amortized O(1)
+
+
+def splitSigns(arr:np.ndarray[int]) -> tuple[np.ndarray[bool], np.ndarray[np.uint64]]:
+    """Split an integer array into its signs and its magnitudes.
+
+    Args:
+        arr (np.ndarray[int]): The integer array to split.
+
+    Returns:
+        tuple[np.ndarray[bool], np.ndarray[np.uint64]]: A tuple containing in 1st position a boolean array set to True for negative values and in 2nd position the absolute values as unsigned 64-bit integers.
+    """
+    values = np.asarray(arr).astype(np.int64, copy=False)
+
+    # The absolute value of the smallest int64 wraps around, but its unsigned reinterpretation is still correct
+    return values < 0, np.abs(values).astype(np.uint64)
+
+
+def getBitLengths(magnitudes:np.ndarray[np.uint64]) -> np.ndarray[np.int64]:
+    """Vectorized equivalent of int.bit_length for an array of unsigned integers.
+
+    Args:
+        magnitudes (np.ndarray[np.uint64]): The unsigned integers to measure.
+
+    Returns:
+        np.ndarray[np.int64]: The number of bits necessary to encode each integer.
+    """
+    remaining = np.asarray(magnitudes, dtype=np.uint64).copy()
+    bitLengths = np.zeros(remaining.shape, dtype=np.int64)
+
+    # Binary search of the highest set bit, a few passes over the whole array
+    for shift in (32, 16, 8, 4, 2, 1):
+        isAbove = remaining >= np.uint64(1 << shift)
+        bitLengths[isAbove] += shift
+        remaining[isAbove] >>= np.uint64(shift)
+    return bitLengths + (remaining > 0)
+
+
+def getBitLengthHistogram(arr:np.ndarray[int]) -> np.ndarray[np.int64]:
+    """Count the elements of an array needing each bit length, in a single vectorized pass.
+
+    Args:
+        arr (np.ndarray[int]): The integer array.
+
+    Returns:
+        np.ndarray[np.int64]: The number of elements whose absolute value needs 0, 1, ..., 63 bits (the smallest int64 being counted with 63 bits).
+    """
+    return np.bincount(np.minimum(getBitLengths(splitSigns(arr)[1]), MAX_BIT_LENGTH), minlength=MAX_BIT_LENGTH+1)
+
+
+def lowMask(widths:np.ndarray[int]) -> np.ndarray[np.uint64]:
+    """Compute the masks keeping the `widths` lowest bits of a 64-bit word.
+
+    Args:
+        widths (np.ndarray[int]): The number of bits to keep (between 0 and 64).
+
+    Returns:
+        np.ndarray[np.uint64]: The corresponding masks.
+    """
+    widths = np.asarray(widths, dtype=np.int64)
+
+    # Shift a full word to the right instead of computing 2**width-1 to stay within 64 bits
+    masks = np.uint64(2**64-1) >> (WORD_SIZE - np.clip(widths, 1, WORD_SIZE)).astype(np.uint64)
+    return np.where(widths > 0, masks, np.uint64(0))
+
+
+def packCodes(codes:np.ndarray[np.uint64], positions:np.ndarray[int], widths:np.ndarray[int]|int, totalBits:int) -> bitarray.bitarray:
+    """Write fixed or variable width codes into a big-endian bit stream using whole 64-bit words.
+
+    Each code is written most significant bit first starting at its position, which matches the layout obtained when setting the bits one by one in a bitarray.
+
+    Args:
+        codes (np.ndarray[np.uint64]): The codes to write, each one must fit within its width.
+        positions (np.ndarray[int]): The increasing bit positions of each code in the stream.
+        widths (np.ndarray[int] | int): The bit width of each code (at most 64 bits).
+        totalBits (int): The length of the resulting bit stream.
+
+    Returns:
+        bitarray.bitarray: The bit stream containing all the codes.
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    positions = np.asarray(positions, dtype=np.int64)
+    widths = np.broadcast_to(np.asarray(widths, dtype=np.int64), positions.shape)
+
+    # One extra word receives the bits of a code crossing the last boundary
+    words = np.zeros(-(-totalBits // WORD_SIZE) + 1, dtype=np.uint64)
+
+    if len(codes) != 0:
+        # Compute the word holding the first bit of each code and where the code ends within it
+        wordIndex = positions // WORD_SIZE
+        end = positions % WORD_SIZE + widths
+        isSpilled = end > WORD_SIZE
+
+        # Align each code with its word, the part crossing the boundary is dropped for now
+        heads = np.where(
+            isSpilled,
+            codes >> (np.maximum(end, WORD_SIZE) - WORD_SIZE).astype(np.uint64),
+            codes << (WORD_SIZE - np.clip(end, 1, WORD_SIZE)).astype(np.uint64),
+        )
+
+        # Codes never overlap, so all the codes starting in the same word can be merged with a single OR reduction
+        starts = np.flatnonzero(np.r_[True, wordIndex[1:] != wordIndex[:-1]])
+        words[wordIndex[starts]] = np.bitwise_or.reduceat(heads, starts)
+
+        # Add the remaining low bits of the codes crossing a boundary at the beginning of the next word
+        tails = codes[isSpilled] << (2*WORD_SIZE - end[isSpilled]).astype(np.uint64)
+        words[wordIndex[isSpilled] + 1] |= tails
+
+    # Convert the words into a bit stream of the right length
+    packedArr = bitarray.bitarray(endian="big")
+    packedArr.frombytes(words.astype(">u8").tobytes())
+    del packedArr[totalBits:]
+    return packedArr
+
+
+def readBits(buffer:memoryview|bytes, position:int, width:int) -> int:
+    """Read a single code of a big-endian bit stream with plain integer operations, much faster than slicing a bitarray for one element.
+
+    Args:
+        buffer (memoryview | bytes): The bytes of the bit stream.
+        position (int): The position of the first bit of the code.
+        width (int): The bit width of the code.
+
+    Returns:
+        int: The code.
+    """
+    # Only the bytes holding the code are read, the bits after it being shifted out
+    stop = (position + width + 7) >> 3
+    return (int.from_bytes(buffer[position >> 3:stop], "big") >> ((stop << 3) - position - width)) & ((1 << width) - 1)
+
+
+def loadWords(packedArr:bitarray.bitarray|bytes, startWord:int, stopWord:int) -> np.ndarray[np.uint64]:
+    """Read a range of 64-bit big-endian words of a bit stream, padding with zeros past its end.
+
+    Args:
+        packedArr (bitarray.bitarray | bytes): The bit stream (any object exposing a buffer).
+        startWord (int): The first word to read.
+        stopWord (int): The word after the last one to read.
+
+    Returns:
+        np.ndarray[np.uint64]: The native 64-bit words.
+    """
+    buffer = np.frombuffer(packedArr, dtype=np.uint8)
+    chunk = buffer[startWord*8:stopWord*8]
+
+    # Pad the last partial word
+    if len(chunk) < (stopWord - startWord)*8:
+        chunk = np.concatenate([chunk, np.zeros((stopWord - startWord)*8 - len(chunk), dtype=np.uint8)])
+    return chunk.view(">u8").astype(np.uint64)
+
+
+def extractCodes(packedArr:bitarray.bitarray|bytes, positions:np.ndarray[int], widths:np.ndarray[int]|int) -> np.ndarray[np.uint64]:
+    """Read codes of fixed or variable width from a big-endian bit stream using whole 64-bit words.
+
+    Args:
+        packedArr (bitarray.bitarray | bytes): The bit stream (any object exposing a buffer).
+        positions (np.ndarray[int]): The bit positions of each code in the stream.
+        widths (np.ndarray[int] | int): The bit width of each code (at most 64 bits).
+
+    Returns:
+        np.ndarray[np.uint64]: The codes read.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    widths = np.broadcast_to(np.asarray(widths, dtype=np.int64), positions.shape)
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    # Compute the word holding the first bit of each code
+    wordIndex = positions // WORD_SIZE
+    firstWord, lastWord = int(wordIndex.min()), int(wordIndex.max())
+
+    # Dense accesses convert the covered words once, sparse ones only gather the two words around each code
+    if lastWord - firstWord <= 4*len(positions):
+        words = loadWords(packedArr, firstWord, lastWord + 2)
+        highWords = words[wordIndex - firstWord]
+        lowWords = words[wordIndex - firstWord + 1]
+    else:
+        buffer = np.frombuffer(packedArr, dtype=np.uint8)
+        byteIndex = (wordIndex * 8)[:, None] + np.arange(16)
+        gathered = np.where(byteIndex < len(buffer), buffer[np.minimum(byteIndex, len(buffer)-1)], np.uint8(0))
+        words = np.ascontiguousarray(gathered, dtype=np.uint8).view(">u8").astype(np.uint64)
+        highWords, lowWords = words[:, 0], words[:, 1]
+
+    # Shift the two words so that the code ends on the lowest bit, then drop the bits before it
+    end = positions % WORD_SIZE + widths
+    isSpilled = end > WORD_SIZE
+    codes = np.where(
+        isSpilled,
+        (highWords << np.clip(end - WORD_SIZE, 0, WORD_SIZE-1).astype(np.uint64)) | (lowWords >> np.clip(2*WORD_SIZE - end, 1, WORD_SIZE-1).astype(np.uint64)),
+        highWords >> np.clip(WORD_SIZE - end, 0, WORD_SIZE-1).astype(np.uint64),
+    )
+    return codes & lowMask(widths)
+
+
+def unpackFixed(packedArr:bitarray.bitarray|bytes, width:int, start:int, stop:int) -> np.ndarray[np.uint64]:
+    """Read a range of consecutive codes of the same width from a big-endian bit stream, word-at-a-time.
+
+    64 codes of width bits always fill exactly width words, so the stream is viewed as one row of width words per group of 64 codes.
+    The word and the shift of each of the 64 slots being the same for every row, each slot is read for all the rows at once, without computing any position.
+
+    Args:
+        packedArr (bitarray.bitarray | bytes): The bit stream (any object exposing a buffer), the first code starting on the first bit.
+        width (int): The bit width of the codes (at most 64 bits).
+        start (int): The index of the first code to read.
+        stop (int): The index after the last code to read.
+
+    Returns:
+        np.ndarray[np.uint64]: The codes read.
+    """
+    if width == 0 or start >= stop:
+        return np.zeros(max(stop - start, 0), dtype=np.uint64)
+    
+    # Load the rows covering the range, transposed so that the same word of every row is contiguous
+    firstGroup, lastGroup = start // WORD_SIZE, -(-stop // WORD_SIZE)
+    words = np.ascontiguousarray(loadWords(packedArr, firstGroup*width, lastGroup*width).reshape(-1, width).T)
+    
+    # Read each slot from its word, or from two words when it crosses a boundary
+    codes = np.empty((WORD_SIZE, words.shape[1]), dtype=np.uint64)
+    for slot in range(WORD_SIZE):
+        word, end = divmod(slot*width, WORD_SIZE)
+        end += width
+        if end <= WORD_SIZE:
+            np.right_shift(words[word], np.uint64(WORD_SIZE - end), out=codes[slot])
+        else:
+            np.bitwise_or(words[word] << np.uint64(end - WORD_SIZE), words[word+1] >> np.uint64(2*WORD_SIZE - end), out=codes[slot])
+    codes &= lowMask(width)
+    
+    # Put the codes back in order: row by row, slot by slot
+    return codes.T.ravel()[start - firstGroup*WORD_SIZE:stop - firstGroup*WORD_SIZE]
+
+
+def wrapWords(words:np.ndarray[np.uint32]) -> bitarray.bitarray:
+    """Expose an array of packed words as a bitarray sharing the same memory.
+
+    Args:
+        words (np.ndarray[np.uint32]): The packed words, the first bit of the stream being the most significant bit of the first word.
+
+    Returns:
+        bitarray.bitarray: The bit stream stored in the words.
+    """
+    # Big-endian words have the same byte layout as the big-endian bit stream
+    words = np.ascontiguousarray(words, dtype=words.dtype.newbyteorder(">"))
+    return bitarray.bitarray(buffer=words, endian="big")
+
+
+def bitArrayFromBuffer(buffer:Any) -> bitarray.bitarray:
+    """Expose any buffer (bytes, memoryview, mmap, ...) as a big-endian bitarray without copying it.
+
+    Args:
+        buffer (Any): The buffer holding the bit stream.
+
+    Returns:
+        bitarray.bitarray: The bit stream, read-only if the buffer is.
+    """
+    return bitarray.bitarray(buffer=buffer, endian="big")
+
+
+def viewWords(packedArr:bitarray.bitarray|bytes, dtype:type = np.uint32) -> np.ndarray[np.uint32]:
+    """View a bit stream as an array of big-endian words without copying it.
+
+    Args:
+        packedArr (bitarray.bitarray | bytes): The bit stream (any object exposing a buffer), its size must be a multiple of the word size.
+        dtype (type, optional): The unsigned integer type of the words. Defaults to np.uint32.
+
+    Returns:
+        np.ndarray[np.uint32]: The words of the stream.
+    """
+    return np.frombuffer(packedArr, dtype=np.dtype(dtype).newbyteorder(">"))
+
+
+def ownBits(packedArr:bitarray.bitarray) -> bitarray.bitarray:
+    """Make a bit stream writable and resizable, copying it only when it is read-only or shares its memory with another object (words, frame, memory map, views, ...).
+
+    Args:
+        packedArr (bitarray.bitarray): The bit stream.
+
+    Returns:
+        bitarray.bitarray: The bit stream itself, or a copy owning its memory.
+    """
+    info = packedArr.buffer_info()
+    if info.readonly or info.imported or info.exports:
+        return bitarray.bitarray(packedArr, endian="big")
+    return packedArr
+
+
+def writeBits(packedArr:bitarray.bitarray, bits:bitarray.bitarray, position:int) -> bitarray.bitarray:
+    """Overwrite a bit stream with other bits from a position, lengthening it with zeros when they go past its end.
+
+    The stream grows by GROWTH_FACTOR at least (to a whole number of 64-bit words), so that the spare bits absorb the next appends and it is only copied a few times.
+
+    Args:
+        packedArr (bitarray.bitarray): The bit stream to write into, copied first if it cannot be written in place.
+        bits (bitarray.bitarray): The bits to write.
+        position (int): The position of the first bit to write.
+
+    Returns:
+        bitarray.bitarray: The bit stream written into, to be used instead of packedArr.
+    """
+    packedArr = ownBits(packedArr)
+    end = position + len(bits)
+    if end > len(packedArr):
+        newLength = WORD_SIZE * -(-max(end, int(len(packedArr) * GROWTH_FACTOR)) // WORD_SIZE)
+        packedArr.extend(zeros(newLength - len(packedArr), endian="big"))
+    packedArr[position:end] = bits
+    return packedArr
+
+
+def growArray(arr:np.ndarray, length:int) -> np.ndarray:
+    """Lengthen a 1-D array with zeros, keeping spare room after it so that repeated appends stay amortized O(1).
+
+    The array is returned as a view on a larger buffer: it grows in place while the buffer has room, and is copied into a buffer GROWTH_FACTOR times larger otherwise.
+
+    Args:
+        arr (np.ndarray): The array to lengthen, not shorter than before.
+        length (int): Its new length.
+
+    Returns:
+        np.ndarray: The lengthened array, to be used instead of arr.
+    """
+    # The spare room of the buffer can be used if the array is the writable beginning of it
+    base = arr.base
+    if isinstance(base, np.ndarray) and base.ndim == 1 and base.dtype == arr.dtype and base.flags.writeable and len(base) >= length and arr.strides == base.strides and arr.ctypes.data == base.ctypes.data:
+        grown = base[:length]
+        grown[len(arr):] = 0
+        return grown
+    buffer = np.zeros(max(length, int(len(arr) * GROWTH_FACTOR)), dtype=arr.dtype)
+    buffer[:len(arr)] = arr
+    return buffer[:length]
+
+
+def packSigns(signs:np.ndarray[bool]) -> bitarray.bitarray:
+    """Store a boolean array as a packed bitmap.
+
+    Args:
+        signs (np.ndarray[bool]): The booleans to store.
+
+    Returns:
+        bitarray.bitarray: The bitmap, one bit per boolean.
+    """
+    signArr = bitarray.bitarray(endian="big")
+    signArr.frombytes(np.packbits(signs).tobytes())
+    del signArr[len(signs):]
+    return signArr
+
+
+def unpackSigns(signArr:bitarray.bitarray, start:int = 0, stop:int|None = None) -> np.ndarray[bool]:
+    """Read a range of a packed bitmap as a boolean array.
+
+    Args:
+        signArr (bitarray.bitarray): The bitmap.
+        start (int, optional): The first position to read. Defaults to 0.
+        stop (int | None, optional): The position after the last one to read. Defaults to the end of the bitmap.
+
+    Returns:
+        np.ndarray[bool]: The booleans stored in the range.
+    """
+    stop = len(signArr) if stop is None else stop
+
+    # Only unpack the bytes covering the range
+    buffer = np.frombuffer(signArr, dtype=np.uint8)[start//8:(stop+7)//8]
+    return np.unpackbits(buffer)[start%8:start%8 + stop - start].astype(bool)
+
+
+def applySigns(magnitudes:np.ndarray[np.uint64], signs:np.ndarray[bool]) -> np.ndarray[np.int64]:
+    """Negate the magnitudes flagged as negative, a negative zero standing for the smallest int64.
+
+    Args:
+        magnitudes (np.ndarray[np.uint64]): The magnitudes, below 2**63.
+        signs (np.ndarray[bool]): The signs, True (or 1) for negative values.
+
+    Returns:
+        np.ndarray[np.int64]: The signed integers.
+    """
+    magnitudes, signs = _asInt64(magnitudes), _asInt64(signs)
+    
+    # Branchless negation of the negative values: (m - 1) ^ -1 == -m while (m - 0) ^ 0 == m, and the masked (0 - 1) ^ -1 == -2**63
+    values = magnitudes - signs
+    values &= np.int64(2**MAX_BIT_LENGTH - 1)
+    values ^= -signs
+    return values
+
+
+def _asInt64(values:np.ndarray[int]) -> np.ndarray[np.int64]:
+    """Private helper function reinterpreting unsigned 64-bit integers as int64 without copying them, other types being converted.
+
+    Args:
+        values (np.ndarray[int]): The integers (or booleans).
+
+    Returns:
+        np.ndarray[np.int64]: The same integers as int64.
+    """
+    values = np.asarray(values)
+    return values.view(np.int64) if values.dtype == np.uint64 else values.astype(np.int64, copy=False)
+
+
+def applySign(magnitude:int, isNegative:bool) -> int:
+    """Scalar equivalent of applySigns.
+
+    Args:
+        magnitude (int): The magnitude, below 2**63.
+        isNegative (bool): The sign.
+
+    Returns:
+        int: The signed integer.
+    """
+    if not isNegative:
+        return magnitude
+    return -magnitude if magnitude != 0 else MIN_INT64
+
+
+def decodeSignMagnitude(codes:np.ndarray[np.uint64], bitLength:int) -> np.ndarray[np.int64]:
+    """Decode sign and magnitude codes, the sign being the bit just above the magnitude.
+
+    Args:
+        codes (np.ndarray[np.uint64]): The codes to decode.
+        bitLength (int): The bit length of the magnitude (at most 63 bits).
+
+    Returns:
+        np.ndarray[np.int64]: The decoded integers.
+    """
+    return applySigns(codes & lowMask(bitLength), codes >> np.uint64(bitLength))
+
+
+def getMagnitudeBounds(bitLength:int) -> tuple[int, int]:
+    """Compute the bounds of the integers stored as a sign and a magnitude of bitLength bits.
+
+    Args:
+        bitLength (int): The bit length of the magnitude (at most 63 bits).
+
+    Returns:
+        tuple[int, int]: The lower and the upper bound, the negative zero of 63-bit magnitudes standing for the smallest int64.
+    """
+    bound = 2**bitLength - 1
+    return (-bound if bitLength < MAX_BIT_LENGTH else MIN_INT64), bound
+
+
+def exactSum(values:np.ndarray[np.int64], bounds:tuple[int, int]|None = None) -> int:
+    """Sum an integer array without overflowing 64 bits.
+
+    Args:
+        values (np.ndarray[np.int64]): The integers to sum (less than 2**31 of them).
+        bounds (tuple[int, int] | None, optional): Bounds of the integers, the sum being computed directly when they guarantee it fits in 64 bits. Defaults to None.
+
+    Returns:
+        int: The exact sum.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if bounds is not None and max(-bounds[0], bounds[1]) * len(values) < 2**MAX_BIT_LENGTH:
+        return int(values.sum())
+    
+    # Sum the high and the low 32 bits apart, each partial sum fitting in 64 bits
+    return (int((values >> np.int64(32)).sum()) << 32) + int((values & np.int64(2**32 - 1)).sum())
+
+
+def gatherBits(packedArr:bitarray.bitarray|bytes, indices:np.ndarray[int]) -> np.ndarray[bool]:
+    """Read the bits at several positions of a big-endian bit stream.
+
+    Args:
+        packedArr (bitarray.bitarray | bytes): The bit stream (any object exposing a buffer).
+        indices (np.ndarray[int]): The positions of the bits.
+
+    Returns:
+        np.ndarray[bool]: The bits read.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    buffer = np.frombuffer(packedArr, dtype=np.uint8)
+    return ((buffer[indices // 8] >> (7 - indices % 8).astype(np.uint8)) & 1).astype(bool)
+
+
+def popCount(words:np.ndarray[np.uint64]) -> np.ndarray[np.int64]:
+    """Vectorized count of the set bits of 64-bit words.
+
+    Args:
+        words (np.ndarray[np.uint64]): The words to count.
+
+    Returns:
+        np.ndarray[np.int64]: The number of set bits of each word.
+    """
+    words = np.asarray(words, dtype=np.uint64)
+
+    # Classic SWAR reduction: count by pairs, nibbles, then sum the bytes with a multiplication
+    words = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((words * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import Callable
+import numpy as np
+
+CACHE_BLOCK_SIZE = 1024 #Number of elements per decoded block kept by the cache
+CACHE_CAPACITY = 2**20 #Default number of bytes of decoded blocks kept by the cache
+
+
+class BlockCache:
+    def __init__(self, capacity:int = CACHE_CAPACITY, blockSize:int = CACHE_BLOCK_SIZE):
+        self.capacity = capacity
+        self.blockSize = max(1, blockSize)
+        self.__blocks:OrderedDict[int, np.ndarray[np.int64]] = OrderedDict()
+        self.size = 0
+        self.resetCounters()
+
+    def get(self, i:int, length:int, decode:Callable[[int, int], np.ndarray[int]]) -> int:
+        """Get the value at the i-th position, from its decoded block.
+
+        Args:
+            i (int): The position to look at, negative positions counting from the end.
+            length (int): The length of the array.
+            decode (Callable[[int, int], np.ndarray[int]]): The function decoding the elements between a start and a stop, called on a miss.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        if not -length <= i < length:
+            raise IndexError(f"index out of range for an array of length {length}")
+        block, offset = divmod(i % length, self.blockSize)
+        return int(self._getBlock(block, length, decode)[offset])
+
+    def getMany(self, indices:np.ndarray[int], length:int, decode:Callable[[int, int], np.ndarray[int]]) -> np.ndarray[np.int64]:
+        """Get the values at several positions, each decoded block holding one of them being read once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at, negative positions counting from the end.
+            length (int): The length of the array.
+            decode (Callable[[int, int], np.ndarray[int]]): The function decoding the elements between a start and a stop, called on a miss.
+
+        Raises:
+            IndexError: If a position is out of the array.
+
+        Returns:
+            np.ndarray[np.int64]: The values at each position.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.any((indices < -length) | (indices >= length)):
+            raise IndexError(f"index out of range for an array of length {length}")
+        blockIds, offsets = np.divmod(indices % max(length, 1), self.blockSize)
+
+        # Gather the positions of each block from its decoded values
+        values = np.zeros(len(indices), dtype=np.int64)
+        for block in np.unique(blockIds):
+            isInBlock = blockIds == block
+            values[isInBlock] = self._getBlock(int(block), length, decode)[offsets[isInBlock]]
+        return values
+
+    def getRange(self, start:int, stop:int, length:int, decode:Callable[[int, int], np.ndarray[int]]) -> np.ndarray[np.int64]:
+        """Get the values between start and stop, from the decoded blocks covering them.
+
+        Args:
+            start (int): The first position, negative positions counting from the end.
+            stop (int): The position after the last one, negative positions counting from the end.
+            length (int): The length of the array.
+            decode (Callable[[int, int], np.ndarray[int]]): The function decoding the elements between a start and a stop, called on a miss.
+
+        Returns:
+            np.ndarray[np.int64]: The values of the window.
+        """
+        start, stop, _ = slice(start, stop).indices(length)
+        stop = max(start, stop)
+
+        # Take the covered part of each block
+        parts = [np.zeros(0, dtype=np.int64)]
+        for block in range(start // self.blockSize, (stop/self.blockSize).__ceil__()):
+            offset = block * self.blockSize
+            parts.append(self._getBlock(block, length, decode)[max(start, offset) - offset:min(stop, offset + self.blockSize) - offset])
+        return np.concatenate(parts)
+
+    def invalidate(self, start:int = 0, stop:int|None = None) -> None:
+        """Drop the decoded blocks holding positions between start and stop, to be called when the compressed array changes.
+
+        Args:
+            start (int, optional): The first changed position. Defaults to 0.
+            stop (int | None, optional): The position after the last changed one, the end of the array if None. Defaults to None.
+        """
+        firstBlock = start // self.blockSize
+        lastBlock = None if stop is None else (stop/self.blockSize).__ceil__()
+        for block in [block for block in self.__blocks if block >= firstBlock and (lastBlock is None or block < lastBlock)]:
+            self.size -= self.__blocks.pop(block).nbytes
+
+    def clear(self) -> None:
+        """Drop every decoded block, the counters being kept."""
+        self.__blocks.clear()
+        self.size = 0
+
+    def resetCounters(self) -> None:
+        """Set the hit, miss and eviction counters back to 0."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def snapshot(self) -> dict[str, int]:
+        """Read the counters and the occupation of the cache.
+
+        Returns:
+            dict[str, int]: The number of hits, misses and evictions, of cached blocks, of cached bytes and the capacity in bytes.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "blocks": len(self.__blocks), "bytes": self.size, "capacity": self.capacity}
+
+    def _getBlock(self, block:int, length:int, decode:Callable[[int, int], np.ndarray[int]]) -> np.ndarray[np.int64]:
+        """Protected helper function returning a decoded block, decoding and caching it on a miss and evicting the least recently used blocks beyond the capacity.
+
+        Args:
+            block (int): The index of the block.
+            length (int): The length of the array, the last block being possibly shorter.
+            decode (Callable[[int, int], np.ndarray[int]]): The function decoding the elements between a start and a stop.
+
+        Returns:
+            np.ndarray[np.int64]: The read-only values of the block.
+        """
+        values = self.__blocks.get(block)
+        if values is not None:
+            self.hits += 1
+            self.__blocks.move_to_end(block)
+            return values
+
+        # Decode the block, read-only so that the callers cannot change the cached values
+        self.misses += 1
+        values = np.asarray(decode(block*self.blockSize, min((block+1)*self.blockSize, length)), dtype=np.int64)
+        values.flags.writeable = False
+        if values.nbytes > self.capacity:
+            return values
+
+        # Make room for it by dropping the least recently used blocks
+        self.__blocks[block] = values
+        self.size += values.nbytes
+        while self.size > self.capacity:
+            self.size -= self.__blocks.popitem(last=False)[1].nbytes
+            self.evictions += 1
+        return values
\ No newline at end of file
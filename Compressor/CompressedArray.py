@@ -0,0 +1,73 @@
+from typing import Any, Callable, Iterator
+import numpy as np
+
+ITER_CHUNK_SIZE = 2**16 #Number of elements decoded at once when iterating over a compressed array
+
+
+class CompressedArray:
+    # The compressed tuple of a compressor, exposed as a read-only sequence of integers
+    __slots__ = ("compressor", "parts", "length", "accessor")
+
+    def __init__(self, compressor:Any, parts:tuple[Any]):
+        self.compressor = compressor
+        self.parts = tuple(parts)
+        self.length = compressor.getLength(*self.parts)
+        self.accessor:Callable[[int], int]|None = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, key:int|slice|np.ndarray[int]) -> int|np.ndarray[np.int64]:
+        """Read elements of the compressed array without decompressing it.
+
+        Args:
+            key (int | slice | np.ndarray[int]): A position, a slice or an array of positions, negative positions counting from the end.
+
+        Raises:
+            IndexError: If a position is out of the array.
+
+        Returns:
+            int | np.ndarray[np.int64]: The element, or the elements as an array.
+        """
+        if isinstance(key, (int, np.integer)):
+            if not -self.length <= key < self.length:
+                raise IndexError(f"index out of range for an array of length {self.length}")
+
+            # The layout constants are computed on the first single access, then each access is a few integer operations
+            if self.accessor is None:
+                self.accessor = self.compressor.getAccessor(*self.parts)
+            return self.accessor(int(key) % self.length)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step == 1:
+                return self.compressor.decompressRange(start, stop, *self.parts)
+            return self.compressor.getMany(np.arange(start, stop, step, dtype=np.int64), *self.parts)
+        indices = np.asarray(key, dtype=np.int64)
+        if np.any((indices < -self.length) | (indices >= self.length)):
+            raise IndexError(f"index out of range for an array of length {self.length}")
+        return self.compressor.getMany(indices % max(self.length, 1), *self.parts)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the elements, decoding one chunk at a time so that the whole decompressed array is never held.
+
+        Yields:
+            int: The elements, in order.
+        """
+        for start in range(0, self.length, ITER_CHUNK_SIZE):
+            yield from self.compressor.decompressRange(start, start + ITER_CHUNK_SIZE, *self.parts).tolist()
+
+    def __array__(self, dtype:Any = None, copy:bool|None = None) -> np.ndarray[int]:
+        """Decompress the array, so that np.asarray and the NumPy functions accept a compressed array.
+
+        Args:
+            dtype (Any, optional): The type of the result, int64 if None. Defaults to None.
+            copy (bool | None, optional): Ignored, the decompressed array is always a new array. Defaults to None.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        arr = self.compressor.decompress(*self.parts)
+        return arr if dtype is None else arr.astype(dtype, copy=False)
+
+    def __repr__(self) -> str:
+        return f"CompressedArray({type(self.compressor).__name__}, length={self.length})"
\ No newline at end of file
@@ -0,0 +1,97 @@
+from Compressor.CompressedArray import CompressedArray
+from typing import Iterable, Iterator
+import numpy as np
+
+
+class CompressedBatch:
+    # Many arrays compressed together as one array, the offset table giving where each one starts
+    __slots__ = ("array", "offsets")
+
+    def __init__(self, array:CompressedArray, offsets:np.ndarray[np.int64]):
+        self.array = array
+        self.offsets = offsets
+
+    @staticmethod
+    def getOffsets(arrays:Iterable[np.ndarray[int]]) -> np.ndarray[np.int64]:
+        """Compute the offset table of a list of arrays.
+
+        Args:
+            arrays (Iterable[np.ndarray[int]]): The arrays of the batch.
+
+        Returns:
+            np.ndarray[np.int64]: The position of the first element of each array in their concatenation, followed by the total length.
+        """
+        return np.r_[0, np.cumsum([len(arr) for arr in arrays], dtype=np.int64)].astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k:int) -> np.ndarray[np.int64]:
+        """Decompress the k-th array of the batch, only reading the part of the compressed array covering it.
+
+        Args:
+            k (int): The index of the array, negative indices counting from the end.
+
+        Raises:
+            IndexError: If the index is out of the batch.
+
+        Returns:
+            np.ndarray[np.int64]: The k-th array.
+        """
+        start, stop = self.getBounds(k)
+        return self.array.compressor.decompressRange(start, stop, *self.array.parts)
+
+    def __iter__(self) -> Iterator[np.ndarray[np.int64]]:
+        """Iterate over the arrays of the batch, in order.
+
+        Yields:
+            np.ndarray[np.int64]: The decompressed arrays.
+        """
+        for k in range(len(self)):
+            yield self[k]
+
+    def get(self, k:int, i:int) -> int:
+        """Get the i-th element of the k-th array without decompressing anything else.
+
+        Args:
+            k (int): The index of the array, negative indices counting from the end.
+            i (int): The position in the array, negative positions counting from the end.
+
+        Raises:
+            IndexError: If the index is out of the batch or the position out of the array.
+
+        Returns:
+            int: The element.
+        """
+        start, stop = self.getBounds(k)
+        if not start - stop <= i < stop - start:
+            raise IndexError(f"index out of range for an array of length {stop - start}")
+        return self.array[start + i % (stop - start)]
+
+    def getBounds(self, k:int) -> tuple[int, int]:
+        """Find the positions of the k-th array in the concatenation of the batch.
+
+        Args:
+            k (int): The index of the array, negative indices counting from the end.
+
+        Raises:
+            IndexError: If the index is out of the batch.
+
+        Returns:
+            tuple[int, int]: The position of its first element and the position after its last one.
+        """
+        if not -len(self) <= k < len(self):
+            raise IndexError(f"batch index out of range for a batch of {len(self)} arrays")
+        k %= len(self)
+        return int(self.offsets[k]), int(self.offsets[k+1])
+
+    def getLengths(self) -> np.ndarray[np.int64]:
+        """Compute the length of every array of the batch from the offset table.
+
+        Returns:
+            np.ndarray[np.int64]: The lengths.
+        """
+        return np.diff(self.offsets)
+
+    def __repr__(self) -> str:
+        return f"CompressedBatch({type(self.array.compressor).__name__}, arrays={len(self)}, length={len(self.array)})"
\ No newline at end of file
@@ -0,0 +1,176 @@
+from Compressor.FrameOfReferenceCompressor import FrameOfReferenceCompressor
+from typing import Any, Callable
+import numpy as np
+import bitarray
+
+from Compressor.BitUtils import getBitLengths, extractCodes
+
+DELTA_BLOCK_SIZE = 128 #Number of elements per block starting with a checkpoint
+
+class DeltaCompressor(FrameOfReferenceCompressor):
+    def __init__(self, blockSize:int = DELTA_BLOCK_SIZE):
+        super().__init__(blockSize)
+    
+    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]:
+        """The method that compresses the differences between consecutive integers, zigzag encoded (0, -1, 1, -2, ... become 0, 1, 2, 3, ...) and packed with the bit length of their block.
+
+        Timestamps or sorted identifiers need nearly 32 bits each but only differ by a few units, so they are stored on a few bits per element.
+        The first value of each block is kept in full as a checkpoint, so that decoding an element never reads more than its block.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]: A tuple containing in 1st position the compressed array, in 2nd the checkpoint (first value) of each block, in 3rd the bit length of each block, in 4th the bit position of each block in the compressed array, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+        """
+        return super().compress(arr)
+    
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array, summing the differences from the checkpoint of its block.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the checkpoint of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        # Retrieve the variables and find the block of the element
+        compressedArr, blockCheckpoints, blockWidths, blockPositions, blockSize, *_ = args
+        block, offset = divmod(i, blockSize)
+        width = int(blockWidths[block])
+        
+        # Read the differences between the checkpoint and the element and add them to the checkpoint, modulo 2**64
+        codes = extractCodes(compressedArr, int(blockPositions[block]) + np.arange(1, offset+1, dtype=np.int64)*width, width)
+        return int((blockCheckpoints[block:block+1].view(np.uint64) + self._unzigzag(codes).sum(dtype=np.uint64)).view(np.int64)[0])
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Return the function reading a single element, which has to sum the differences from the checkpoint of its block as get does.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the checkpoint of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        return lambda i: self.get(i, *args)
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, only decoding the blocks covering them.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the checkpoint of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        compressedArr, blockCheckpoints, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        if start == stop:
+            return np.zeros(0, dtype=np.int64)
+        
+        # Decode the whole blocks and keep the window
+        firstBlock = start // blockSize
+        values = self._decodeBlocks(np.arange(firstBlock, (stop/blockSize).__ceil__()), *args)
+        return values[start - firstBlock*blockSize:stop - firstBlock*blockSize]
+    
+    def _encode(self, values:np.ndarray[np.int64]) -> tuple[np.ndarray[np.uint64], np.ndarray[np.int64], np.ndarray[np.uint8]]:
+        """Protected helper function computing the code of every element and the header of every block.
+
+        Args:
+            values (np.ndarray[np.int64]): The integer array.
+
+        Returns:
+            tuple[np.ndarray[np.uint64], np.ndarray[np.int64], np.ndarray[np.uint8]]: A tuple containing in 1st position the zigzag encoded difference of each element to the previous one (0 for the first element of a block), in 2nd position the first value of each block and in 3rd position the bit length of its largest code.
+        """
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+        
+        # Differences are computed modulo 2**64, so that they stay exact for any int64 array
+        blockStarts = np.arange(0, len(values), self.blockSize)
+        unsignedValues = values.view(np.uint64)
+        deltas = np.zeros(len(values), dtype=np.uint64)
+        deltas[1:] = unsignedValues[1:] - unsignedValues[:-1]
+        deltas[blockStarts] = 0
+        
+        # Zigzag encoding moves the sign on the lowest bit: (d << 1) ^ (d >> 63)
+        signedDeltas = deltas.view(np.int64)
+        codes = (signedDeltas << np.int64(1)).view(np.uint64) ^ (signedDeltas >> np.int64(63)).view(np.uint64)
+        blockWidths = getBitLengths(np.maximum.reduceat(codes, blockStarts)).astype(np.uint8)
+        return codes, values[blockStarts], blockWidths
+    
+    def _getBlockBounds(self, *args:tuple[Any]) -> None:
+        """Protected helper function disabling the bounds of the frame of reference compressor: a checkpoint does not bound its block.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            None: The scans decode every block.
+        """
+        return None
+    
+    def _decode(self, indices:np.ndarray[np.int64], *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Protected helper function decoding the elements at several positions, each block holding one of them being decoded once.
+
+        Args:
+            indices (np.ndarray[np.int64]): The positions of the elements, already checked.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            np.ndarray[np.int64]: The decoded integers.
+        """
+        compressedArr, blockCheckpoints, blockWidths, blockPositions, blockSize, *_ = args
+        blockIds, offsets = np.divmod(indices, blockSize)
+        
+        # Decode the requested blocks one after the other, then find each element within them
+        blocks, blockRanks = np.unique(blockIds, return_inverse=True)
+        return self._decodeBlocks(blocks, *args)[blockRanks*blockSize + offsets]
+    
+    def _decodeBlocks(self, blocks:np.ndarray[np.int64], *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Protected helper function decoding whole blocks with a prefix sum.
+
+        Args:
+            blocks (np.ndarray[np.int64]): The increasing indices of the blocks to decode.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            np.ndarray[np.int64]: The values of the blocks one after the other, every block taking blockSize elements (the end of the last block of the array being padded).
+        """
+        compressedArr, blockCheckpoints, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        
+        # Compute the position of every element of the blocks, the padding of the last block reading nothing
+        offsets = np.tile(np.arange(blockSize, dtype=np.int64), len(blocks))
+        elementBlocks = np.repeat(blocks, blockSize)
+        isPadding = elementBlocks*blockSize + offsets >= initialLength
+        widths = np.where(isPadding, 0, blockWidths.astype(np.int64)[elementBlocks])
+        
+        # Read and decode the differences, the checkpoint replacing the null difference at the start of each block
+        deltas = self._unzigzag(extractCodes(compressedArr, blockPositions[elementBlocks] + offsets*widths, widths))
+        deltas[::blockSize] = blockCheckpoints[blocks].view(np.uint64)
+        
+        # Prefix sum over all the blocks, minus what the previous blocks added, modulo 2**64
+        sums = np.cumsum(deltas, dtype=np.uint64)
+        return (sums - np.repeat(sums[::blockSize] - deltas[::blockSize], blockSize)).view(np.int64)
+    
+    def _unzigzag(self, codes:np.ndarray[np.uint64]) -> np.ndarray[np.uint64]:
+        """Protected helper function decoding zigzag codes: (c >> 1) ^ -(c & 1).
+
+        Args:
+            codes (np.ndarray[np.uint64]): The zigzag codes.
+
+        Returns:
+            np.ndarray[np.uint64]: The differences, as unsigned integers modulo 2**64.
+        """
+        return (codes >> np.uint64(1)) ^ (np.uint64(0) - (codes & np.uint64(1)))
+
+if __name__ == "__main__":
+    arr = np.array([0])
+    dC = DeltaCompressor()
+    
+    val = dC.compress(arr)
+    
+    print(arr[0] == dC.get(0, *val))
+    print(sum(arr != dC.decompress(*val)))
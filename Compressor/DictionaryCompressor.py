@@ -0,0 +1,248 @@
+from Compressor.AbstractCompressor import Compressor
+from typing import Any, Callable
+import numpy as np
+import bitarray
+
+from Compressor.BitUtils import packCodes, extractCodes, unpackFixed, readBits, writeBits, bitArrayFromBuffer
+
+INT_ENCODING_SIZE = 32 #32 bits per integer
+TABLE_ENTRY_SIZE = 64 #Bits of an entry of the table of distinct values (int64)
+
+class DictionaryCompressor(Compressor):
+    def __init__(self, wordSize:int = INT_ENCODING_SIZE):
+        super().__init__()
+        self.wordSize = self._checkWordSize(wordSize)
+    
+    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]:
+        """The method that replaces every integer by its index in the sorted table of the distinct values, the indices being packed one after the other as in the split mode.
+
+        An array of large values taking a few distinct values (categories, identifiers, ...) is stored on log2 of the number of distinct values bits per element, whatever their magnitude.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]: A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+        """
+        table, codes = np.unique(np.asarray(arr).astype(np.int64, copy=False), return_inverse=True)
+        
+        # Write the codes one after the other, a single distinct value needing no bit at all
+        codeBitLength = max(len(table) - 1, 0).bit_length()
+        compressedArrayLength = self.wordSize * float.__ceil__(len(codes) * codeBitLength / self.wordSize)
+        positions = np.arange(len(codes), dtype=np.int64) * codeBitLength
+        compressedArr = packCodes(codes.reshape(-1).astype(np.uint64), positions, codeBitLength, compressedArrayLength)
+        return (compressedArr, table, codeBitLength, len(codes))
+    
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array compressed using this class.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+        return self.decompressRange(0, initialLength, *args)
+    
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array, reading its code and looking it up in the table.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        compressedArr, table, codeBitLength, *_ = args
+        return int(table[readBits(memoryview(compressedArr), i*codeBitLength, codeBitLength)])
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Convert the table to Python integers and compute the view of the bytes of the compressed array once, each element being then a read and a lookup.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        compressedArr, table, codeBitLength, *_ = args
+        buffer, table = memoryview(compressedArr), table.tolist()
+        return lambda i: table[readBits(buffer, i*codeBitLength, codeBitLength)]
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, reading their codes at once and gathering their values from the table.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        return np.asarray(table, dtype=np.int64)[unpackFixed(compressedArr, codeBitLength, start, stop).astype(np.intp)]
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+        lookAt = codeBitLength * self._checkIndices(indices, initialLength)
+        return np.asarray(table, dtype=np.int64)[extractCodes(compressedArr, lookAt, codeBitLength).astype(np.intp)]
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]:
+        """Write a value at the i-th position of the compressed array, in place if it is already in the table.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+        i = int(self._checkIndices([i], initialLength)[0])
+        return self._write(i, np.array([value], dtype=np.int64), *args)
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]:
+        """Append values at the end of the compressed array, in the spare bits after the last code if they are already in the table.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+        return self._write(initialLength, np.asarray(values, dtype=np.int64), *args)
+    
+    def _write(self, start:int, values:np.ndarray[np.int64], *args:tuple[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]:
+        """Protected helper function writing values one after the other from a position, the array being lengthened if they go past its end.
+
+        The codes are written in place when the values are in the table, otherwise the whole array is compressed again with the new distinct values, which only happens a few times for low cardinality data.
+
+        Args:
+            start (int): The position of the first value, at most the length of the array.
+            values (np.ndarray[np.int64]): The values to write.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]: The compressed tuple holding the values.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+        stop = max(initialLength, start + len(values))
+        if len(values) == 0:
+            return args
+
+        # Re-compress the whole array when a value is not in the table
+        codes = np.minimum(np.searchsorted(table, values), len(table) - 1)
+        if len(table) == 0 or np.any(table[codes] != values):
+            arr = np.zeros(stop, dtype=np.int64)
+            arr[:initialLength] = self.decompress(*args)
+            arr[start:start+len(values)] = values
+            return self.compress(arr)
+
+        # Otherwise, overwrite the codes of the values (the spare bits after the last code receiving the new ones)
+        bits = packCodes(codes.astype(np.uint64), np.arange(len(values), dtype=np.int64) * codeBitLength, codeBitLength, len(values) * codeBitLength)
+        return (writeBits(compressedArr, bits, start * codeBitLength), table, codeBitLength, stop)
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[3]
+    
+    def _getBounds(self, *args:tuple[Any]) -> tuple[int, int]|None:
+        """Protected helper function giving the bounds of the elements from the table.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[int, int] | None: The smallest and the largest distinct value, or None for an empty array.
+        """
+        compressedArr, table, *_ = args
+        return (int(table[0]), int(table[-1])) if len(table) != 0 else None
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): Ignored, the size depends on the number of distinct values.
+
+        Returns:
+            int: The number of bits of the compressed array and of the table.
+        """
+        distinctCount = self._countDistinct(np.asarray(arr).astype(np.int64, copy=False))
+        codeBitLength = max(distinctCount - 1, 0).bit_length()
+        return self.wordSize * float.__ceil__(len(arr) * codeBitLength / self.wordSize) + TABLE_ENTRY_SIZE*distinctCount
+    
+    def _countDistinct(self, values:np.ndarray[np.int64]) -> int:
+        """Protected helper function counting the distinct values of an array without sorting it when their range is small enough to be marked in a table of booleans.
+
+        Args:
+            values (np.ndarray[np.int64]): The integer array.
+
+        Returns:
+            int: The number of distinct values.
+        """
+        if len(values) == 0:
+            return 0
+        
+        # The table of booleans costs at most as much memory as the array itself
+        low, high = int(values.min()), int(values.max())
+        if high - low >= max(8*len(values), 2**16):
+            return len(np.unique(values))
+        isSeen = np.zeros(high - low + 1, dtype=bool)
+        isSeen[values - low] = True
+        return int(np.count_nonzero(isSeen))
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the sorted distinct values, in 3rd the bit length of the codes and in 4th the length of the uncompressed array.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The bit length of the codes and the length, and the compressed array and the table.
+        """
+        compressedArr, table, codeBitLength, initialLength, *_ = args
+
+        # Only the words holding codes are kept, the spare bits left for appends are not sent
+        usedBytes = self.wordSize//8 * float.__ceil__(initialLength * codeBitLength / self.wordSize)
+        return (codeBitLength, initialLength), [memoryview(compressedArr)[:usedBytes], np.asarray(table).astype(">i8")]
+    
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]:
+        """Rebuild the compressed array from the output of toParts, without copying the packed buffer.
+
+        Args:
+            params (tuple[int]): The bit length of the codes and the length.
+            buffers (list[Any]): The compressed array and the table.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],int,int]: The compressed array, as returned by compress.
+        """
+        codeBitLength, initialLength = params
+        table = np.frombuffer(buffers[1], dtype=">i8").astype(np.int64)
+        return (bitArrayFromBuffer(buffers[0]), table, codeBitLength, initialLength)
\ No newline at end of file
@@ -0,0 +1,473 @@
+from Compressor.AbstractCompressor import Compressor, SCAN_CHUNK_SIZE
+from typing import Any, Callable, Iterator
+import numpy as np
+import bitarray
+from bitarray.util import ba2int
+
+from Compressor.BitUtils import getBitLengths, lowMask, packCodes, extractCodes, readBits, writeBits, growArray, bitArrayFromBuffer
+
+INT_ENCODING_SIZE = 32 #32 bits per integer
+FOR_BLOCK_SIZE = 128 #Number of elements per block sharing the same reference and bit length
+HEADER_SIZE = 64 + 8 #Bits of the header of a block: its reference (int64) and its bit length (uint8)
+
+class FrameOfReferenceCompressor(Compressor):
+    def __init__(self, blockSize:int = FOR_BLOCK_SIZE):
+        super().__init__()
+        if blockSize <= 0:
+            raise ValueError(f"unsupported block size {blockSize!r}, expected a positive number of elements")
+        self.blockSize = blockSize
+    
+    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]:
+        """The method that splits the array into blocks and compresses each block relatively to its minimum, with its own bit length.
+
+        A block of values between 1_000_000 and 1_000_100 is stored as values between 0 and 100 on 7 bits, and an outlier only widens its own block.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]: A tuple containing in 1st position the compressed array, in 2nd the reference (minimum) of each block, in 3rd the bit length of each block, in 4th the bit position of each block in the compressed array, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+        """
+        values = np.asarray(arr).astype(np.int64, copy=False)
+        blockIds = np.arange(len(values), dtype=np.int64) // self.blockSize
+        
+        # Compute the code of every element and the header of every block
+        codes, blockMins, blockWidths = self._encode(values)
+        
+        # Write the codes block after block, each one on the bit length of its block
+        blockPositions = self._getBlockPositions(blockWidths, self.blockSize)
+        widths = blockWidths.astype(np.int64)[blockIds]
+        positions = blockPositions[blockIds] + (np.arange(len(values), dtype=np.int64) - blockIds*self.blockSize) * widths
+        totalBits = int(positions[-1] + widths[-1]) if len(values) != 0 else 0
+        compressedArr = packCodes(codes, positions, widths, INT_ENCODING_SIZE * (totalBits/INT_ENCODING_SIZE).__ceil__())
+        
+        return compressedArr, blockMins, blockWidths, blockPositions, self.blockSize, len(values)
+    
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array compressed using this class.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        # Retrieve the variables and decompress the whole array
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        return self.decompressRange(0, initialLength, *args)
+    
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array, the block directory giving where its block starts.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        # Retrieve the variables and find the block of the element
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, *_ = args
+        block, offset = divmod(i, blockSize)
+        width = int(blockWidths[block])
+        
+        # Read the offset to the reference of the block
+        lookAt = int(blockPositions[block]) + offset*width
+        val = ba2int(compressedArr[lookAt:lookAt+width]) if width != 0 else 0
+        return int(blockMins[block]) + val
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Convert the block headers to Python integers and compute the view of the bytes of the compressed array once, each element being then read with a few integer operations.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, *_ = args
+        buffer, blockMins, blockWidths, blockPositions = memoryview(compressedArr), blockMins.tolist(), blockWidths.tolist(), blockPositions.tolist()
+        
+        # The offset to the reference is exact with Python integers, no wrap around to handle
+        def access(i:int) -> int:
+            block, offset = divmod(i, blockSize)
+            width = blockWidths[block]
+            return blockMins[block] + readBits(buffer, blockPositions[block] + offset*width, width)
+        return access
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, only reading the blocks covering them.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        return self._decode(np.arange(start, stop, dtype=np.int64), *args)
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        return self._decode(self._checkIndices(indices, initialLength), *args)
+    
+    def min(self, *args:tuple[Any]) -> int:
+        """Compute the minimum of the compressed array from the block headers, without decoding any block.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The smallest element.
+        """
+        bounds = self._getBlockBounds(*args)
+        if bounds is None:
+            return super().min(*args)
+        return int(bounds[0].min())
+    
+    def max(self, *args:tuple[Any]) -> int:
+        """Compute the maximum of the compressed array, only decoding the blocks whose bit length allows them to hold it.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The largest element.
+        """
+        bounds = self._getBlockBounds(*args)
+        if bounds is None:
+            return super().max(*args)
+        
+        # The maximum is at least the largest reference, so the blocks whose upper bound is below it are skipped
+        lows, highs = bounds
+        candidates = np.flatnonzero(highs >= lows.max())
+        return int(max(values.max() for _, values in self._iterBlocks(candidates, *args)))
+    
+    def countWhere(self, op:str, value:int, *args:tuple[Any]) -> int:
+        """Count the elements of the compressed array satisfying a comparison, the blocks decided by their header being counted without decoding them.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            int: The number of elements satisfying `element op value`.
+        """
+        bounds = self._getBlockBounds(*args)
+        if bounds is None:
+            return super().countWhere(op, value, *args)
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        comparison = self._getComparison(op)
+        
+        # Count the elements of the matching blocks, the last block being possibly shorter, then decode the undecided ones
+        allMatch, noneMatch = self._matchBounds(op, value, *bounds)
+        blockCounts = np.minimum(blockSize, initialLength - np.arange(len(blockMins), dtype=np.int64)*blockSize)
+        count = int(blockCounts[allMatch].sum())
+        return count + sum(int(np.count_nonzero(comparison(values, value))) for _, values in self._iterBlocks(np.flatnonzero(~allMatch & ~noneMatch), *args))
+    
+    def where(self, op:str, value:int, *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Find the positions of the elements of the compressed array satisfying a comparison, the blocks decided by their header being answered without decoding them.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[np.int64]: The increasing positions of the elements satisfying `element op value`.
+        """
+        bounds = self._getBlockBounds(*args)
+        if bounds is None:
+            return super().where(op, value, *args)
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        comparison = self._getComparison(op)
+        
+        # Take every position of the matching blocks and the matching positions of the decoded undecided blocks
+        allMatch, noneMatch = self._matchBounds(op, value, *bounds)
+        positions = [self._getBlockElements(np.flatnonzero(allMatch), blockSize, initialLength)]
+        positions += [indices[comparison(values, value)] for indices, values in self._iterBlocks(np.flatnonzero(~allMatch & ~noneMatch), *args)]
+        return np.sort(np.concatenate(positions))
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]:
+        """Write a value at the i-th position of the compressed array, re-encoding its block in place if the block still fits its bit length.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        i = int(self._checkIndices([i], initialLength)[0])
+        block = i // blockSize
+        
+        # Encode the block again with the new value
+        blockValues = self.decompressRange(block*blockSize, min((block+1)*blockSize, initialLength), *args)
+        blockValues[i - block*blockSize] = value
+        codes, newMins, newWidths = self._encode(blockValues)
+        
+        # A wider block would move the next ones, so the whole array is re-packed
+        width = int(blockWidths[block])
+        if blockSize != self.blockSize or newWidths[0] > width:
+            return super().set(i, value, *args)
+        
+        # Otherwise, the codes are written on the bit length of the block and its header is updated
+        bits = packCodes(codes, np.arange(len(codes), dtype=np.int64) * width, width, len(codes) * width)
+        compressedArr = writeBits(compressedArr, bits, int(blockPositions[block]))
+        blockMins = blockMins if blockMins.flags.writeable else blockMins.copy()
+        blockMins[block] = newMins[0]
+        return compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]:
+        """Append values at the end of the compressed array, only the last block being encoded again together with them.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        if blockSize != self.blockSize:
+            return super().extend(values, *args)
+        
+        # Compress the elements of the last block (if not full) followed by the new values, as if they were a new array
+        firstBlock = initialLength // blockSize
+        tail = np.concatenate([self.decompressRange(firstBlock*blockSize, initialLength, *args), np.asarray(values, dtype=np.int64)])
+        tailArr, tailMins, tailWidths, tailPositions, *_ = self.compress(tail)
+        
+        # Write them over the last block, the full blocks staying as they are
+        start = int(blockPositions[firstBlock]) if firstBlock < len(blockPositions) else self._getUsedBits(*args)
+        compressedArr = writeBits(compressedArr, tailArr[:self._getUsedBits(tailArr, tailMins, tailWidths, tailPositions, blockSize, len(tail))], start)
+        
+        # Append their headers to the block directory
+        blockCount = firstBlock + len(tailMins)
+        blockMins, blockWidths, blockPositions = growArray(blockMins, blockCount), growArray(blockWidths, blockCount), growArray(blockPositions, blockCount)
+        blockMins[firstBlock:], blockWidths[firstBlock:], blockPositions[firstBlock:] = tailMins, tailWidths, tailPositions + start
+        return compressedArr, blockMins, blockWidths, blockPositions, blockSize, firstBlock*blockSize + len(tail)
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[5]
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): Ignored, the bit lengths depend on the content of each block.
+
+        Returns:
+            int: The number of bits of the compressed array and of the block headers.
+        """
+        values = np.asarray(arr).astype(np.int64, copy=False)
+        codes, blockMins, blockWidths = self._encode(values)
+        
+        # Every block is full except the last one
+        counts = np.full(len(blockWidths), self.blockSize, dtype=np.int64)
+        if len(counts) != 0:
+            counts[-1] = len(values) - (len(counts)-1)*self.blockSize
+        totalBits = int((counts * blockWidths).sum())
+        return INT_ENCODING_SIZE * (totalBits/INT_ENCODING_SIZE).__ceil__() + HEADER_SIZE*len(blockWidths)
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        The bit positions of the blocks are not sent, the receiver rebuilds them from the bit lengths.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the reference of each block, in 3rd the bit length of each block, in 4th the bit position of each block, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The number of elements per block and the length, and the compressed array, the references and the bit lengths.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        
+        # Only the words holding codes are kept, the spare bits left for appends are not sent
+        usedBytes = INT_ENCODING_SIZE//8 * (self._getUsedBits(*args)/INT_ENCODING_SIZE).__ceil__()
+        return (blockSize, initialLength), [memoryview(compressedArr)[:usedBytes], blockMins.astype(">i8"), blockWidths]
+    
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]:
+        """Rebuild the compressed array from the output of toParts, without copying the packed buffer.
+
+        Args:
+            params (tuple[int]): The number of elements per block and the length.
+            buffers (list[Any]): The compressed array, the references and the bit lengths.
+
+        Returns:
+            tuple[bitarray.bitarray,np.ndarray[np.int64],np.ndarray[np.uint8],np.ndarray[np.int64],int,int]: The compressed array, as returned by compress.
+        """
+        blockSize, initialLength = params
+        blockMins = np.frombuffer(buffers[1], dtype=">i8").astype(np.int64)
+        blockWidths = np.frombuffer(buffers[2], dtype=np.uint8)
+        
+        # Rebuild the block directory
+        return bitArrayFromBuffer(buffers[0]), blockMins, blockWidths, self._getBlockPositions(blockWidths, blockSize), blockSize, initialLength
+    
+    def _encode(self, values:np.ndarray[np.int64]) -> tuple[np.ndarray[np.uint64], np.ndarray[np.int64], np.ndarray[np.uint8]]:
+        """Protected helper function computing the code of every element and the header of every block.
+
+        Args:
+            values (np.ndarray[np.int64]): The integer array.
+
+        Returns:
+            tuple[np.ndarray[np.uint64], np.ndarray[np.int64], np.ndarray[np.uint8]]: A tuple containing in 1st position the offset of each element to the minimum of its block, in 2nd position the minimum of each block and in 3rd position the bit length of its largest offset.
+        """
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+        
+        # One reduction per block for the minimum
+        blockStarts = np.arange(0, len(values), self.blockSize)
+        blockMins = np.minimum.reduceat(values, blockStarts)
+        
+        # Offsets to the minimum are computed modulo 2**64, so that they stay exact for any int64 block
+        codes = values.view(np.uint64) - np.repeat(blockMins.view(np.uint64), self.blockSize)[:len(values)]
+        blockWidths = getBitLengths(np.maximum.reduceat(codes, blockStarts)).astype(np.uint8)
+        return codes, blockMins, blockWidths
+    
+    def _getBlockPositions(self, blockWidths:np.ndarray[np.uint8], blockSize:int) -> np.ndarray[np.int64]:
+        """Protected helper function computing the block directory: the bit position where each block starts.
+
+        Args:
+            blockWidths (np.ndarray[np.uint8]): The bit length of each block.
+            blockSize (int): The number of elements per block.
+
+        Returns:
+            np.ndarray[np.int64]: The bit position of each block.
+        """
+        # Every block before the last one is full
+        blockPositions = np.zeros(len(blockWidths), dtype=np.int64)
+        blockPositions[1:] = np.cumsum(blockWidths[:-1].astype(np.int64) * blockSize)
+        return blockPositions
+    
+    def _getUsedBits(self, *args:tuple[Any]) -> int:
+        """Protected helper function computing the number of bits of the compressed array holding codes.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            int: The bit position after the last code, every block before the last one being full.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        if len(blockWidths) == 0:
+            return 0
+        return int(blockPositions[-1]) + int(blockWidths[-1]) * (initialLength - (len(blockWidths)-1)*blockSize)
+    
+    def _getBounds(self, *args:tuple[Any]) -> tuple[int, int]|None:
+        """Protected helper function giving the bounds of the elements from the block headers.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[int, int] | None: The lower and the upper bound of the elements, or None if the headers do not bound them.
+        """
+        blockBounds = self._getBlockBounds(*args)
+        if blockBounds is None or len(blockBounds[0]) == 0:
+            return None
+        return int(blockBounds[0].min()), int(blockBounds[1].max())
+    
+    def _getBlockBounds(self, *args:tuple[Any]) -> tuple[np.ndarray[np.int64], np.ndarray[np.int64]]|None:
+        """Protected helper function computing the bounds of the elements of each block from its header.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[np.ndarray[np.int64], np.ndarray[np.int64]] | None: A tuple containing in 1st position the smallest possible element of each block (its reference) and in 2nd position the largest one (its reference plus the largest offset fitting in its bit length).
+        """
+        compressedArr, blockMins, blockWidths, *_ = args
+        
+        # The upper bound is computed modulo 2**64 and kept within int64 when it wraps
+        highs = (blockMins.view(np.uint64) + lowMask(blockWidths)).view(np.int64)
+        return blockMins, np.where(highs < blockMins, np.iinfo(np.int64).max, highs)
+    
+    def _getBlockElements(self, blocks:np.ndarray[np.int64], blockSize:int, initialLength:int) -> np.ndarray[np.int64]:
+        """Protected helper function listing the positions of the elements of several blocks.
+
+        Args:
+            blocks (np.ndarray[np.int64]): The increasing indices of the blocks.
+            blockSize (int): The number of elements per block.
+            initialLength (int): The length of the uncompressed array.
+
+        Returns:
+            np.ndarray[np.int64]: The positions of their elements, the last block of the array being possibly shorter.
+        """
+        indices = (np.asarray(blocks, dtype=np.int64)[:, None]*blockSize + np.arange(blockSize)).ravel()
+        return indices[indices < initialLength]
+    
+    def _iterBlocks(self, blocks:np.ndarray[np.int64], *args:tuple[Any]) -> Iterator[tuple[np.ndarray[np.int64], np.ndarray[np.int64]]]:
+        """Protected helper function decoding several blocks, a bounded number of them at a time.
+
+        Args:
+            blocks (np.ndarray[np.int64]): The increasing indices of the blocks to decode.
+            *args (tuple[Any]): The compressed tuple.
+
+        Yields:
+            tuple[np.ndarray[np.int64], np.ndarray[np.int64]]: The positions of the elements of the decoded blocks and their values.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, initialLength, *_ = args
+        blocksPerChunk = max(1, SCAN_CHUNK_SIZE // blockSize)
+        for start in range(0, len(blocks), blocksPerChunk):
+            indices = self._getBlockElements(blocks[start:start+blocksPerChunk], blockSize, initialLength)
+            yield indices, self._decode(indices, *args)
+    
+    def _decode(self, indices:np.ndarray[np.int64], *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Protected helper function decoding the elements at several positions.
+
+        Args:
+            indices (np.ndarray[np.int64]): The positions of the elements, already checked.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            np.ndarray[np.int64]: The decoded integers.
+        """
+        compressedArr, blockMins, blockWidths, blockPositions, blockSize, *_ = args
+        blockIds, offsets = np.divmod(indices, blockSize)
+        
+        # Read the offsets with the bit length of their block and add back the reference, modulo 2**64
+        widths = blockWidths.astype(np.int64)[blockIds]
+        codes = extractCodes(compressedArr, blockPositions[blockIds] + offsets*widths, widths)
+        return (codes + blockMins.view(np.uint64)[blockIds]).view(np.int64)
+
+if __name__ == "__main__":
+    arr = np.array([0])
+    fC = FrameOfReferenceCompressor()
+    
+    val = fC.compress(arr)
+    
+    print(arr[0] == fC.get(0, *val))
+    print(sum(arr != fC.decompress(*val)))
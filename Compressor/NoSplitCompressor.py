@@ -1,127 +1,345 @@
-from Compressor.AbstractCompressor import Compressor
-from typing import Any
-import numpy as np
-import bitarray
-
-INT_ENCODING_SIZE = 32 #32 bits per integer
-
-class NoSplitCompressor(Compressor):
-    def __init__(self):
-        super().__init__()
-
-    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int]:
-        """The method that compress int32 integer into smaller integers.
-
-        Args:
-            arr (np.ndarray[int]): The array of integer to compress
-
-        Returns:
-            tuple[bitarray.bitarray, bitarray.bitarray,int,int]: A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, and in 4th the length of the uncompressed array.
-        """
-        # Get the necessary bit size of the biggest element in array
-        maxBitLength = max(self._getMaxBitLength(arr), 1)
-        
-        # Compute the maximum capacity of a compressed integer and the index for which we need to move on the next int32
-        intCompressedCapacity = (INT_ENCODING_SIZE/maxBitLength).__floor__()
-        criticalIndex = intCompressedCapacity * maxBitLength
-        
-        # Intialise the compressed array
-        compressedArrayLength = INT_ENCODING_SIZE*(len(arr)/intCompressedCapacity).__ceil__()
-        compressedArr = bitarray.bitarray(np.zeros(compressedArrayLength, dtype=bool).tolist())
-        
-        signArr = bitarray.bitarray(np.zeros(len(arr), dtype=bool).tolist())
-
-        # Compute the row necessary shift of position when moving on the next int32 
-        criticalShift = INT_ENCODING_SIZE - intCompressedCapacity * maxBitLength
-        intNo = 0
-        
-        # Compress the integer array into the boolean array
-        for arrIndex, elem in enumerate(arr):    
-            # Get the bit representation of an integer, ex:  -12 -> '-0001100'
-            bitVal = format(elem, "08b")
-            
-            # Get the index to place the boolean
-            pos = arrIndex * maxBitLength + intNo*criticalShift
-            
-            # If the position is bigger than the critical index, then move on the next int32 and update position
-            if (pos >= criticalIndex*(intNo+1) + criticalShift*intNo):
-                intNo += 1
-                pos += criticalShift
-
-            # Manage the sign of the entry
-            if bitVal.startswith("-"):
-                signArr[arrIndex] = True
-            else:
-                signArr[arrIndex] = False
-                    
-            # Correct the length of bits to maxBitLength
-            correctedBitVal = bitVal[-maxBitLength:].strip("-")
-            correctedBitVal = "0" * (maxBitLength-len(correctedBitVal)) + correctedBitVal
-                    
-            # For each bit, register it at the right place of the array.
-            for bitIndex, bitElem in enumerate(correctedBitVal[-maxBitLength:]):
-                compressedArr[pos+bitIndex] = True if bitElem == "1" else False
-
-        return (compressedArr, signArr, maxBitLength, len(arr))
-    
-    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
-        """The method to decompress the array compressed using this class.
-
-        Args:
-            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, and in 4th the length of the uncompressed array.
-            
-        Returns:
-            np.ndarray[int]: The decompressed integer array.
-        """
-        
-        # Retrive and compute necessary information
-        compressedArr, signArr, maxBitLength, initialLength, *_ = args
-
-        # Apply get repeatidely
-        return np.array([self.get(i, *args) for i in range(initialLength)])
-        
-    def get(self, i:int, *args:tuple[Any]) -> int:
-        """Get the value at the i-th position of the compressed array.
-
-        Args:
-            i (int): The position to look at.
-            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, and in 4th the length of the uncompressed array.
-
-        Returns:
-            int: The value of the i-th position.
-        """
-        
-        # Retrieve the variables and compute the cell to look at
-        compressedArr, signArr, maxBitLength, *_ = args
-        intCompressedCapacity = (INT_ENCODING_SIZE/maxBitLength).__floor__()
-        
-        # Compute the position to check (taking into account the int32 cutting)
-        if intCompressedCapacity != 1:
-            lookAt = (maxBitLength * (i%intCompressedCapacity)) + ((i//intCompressedCapacity) * INT_ENCODING_SIZE)
-        else:
-            lookAt = i * INT_ENCODING_SIZE
-                
-        # Retrieve the necessary cells
-        num = compressedArr[lookAt:lookAt+maxBitLength]
-        
-        # Convert the number into base 10
-        representation = "".join(["0" if i == False else "1" for i in num])
-        val = int(representation, base=2)
-        
-        # Return the value and the sign
-        if signArr[i] == True:
-            return -val
-        return val
-
-
-if __name__ == "__main__":
-    arr = np.random.randint(-2**16+1, 2**16-1, 100_000)
-    nsC = NoSplitCompressor()
-    
-    val = nsC.compress(arr)
-    print(nsC.get(len(arr)-1, *val), arr[-1])
-    print(nsC.get(len(arr)-2, *val), arr[-2])
-    print(nsC.get(0, *val), arr[0])
-    print(nsC.get(87333, *val), arr[87333])
-    
+from Compressor.AbstractCompressor import Compressor
+from typing import Any, Callable
+import numpy as np
+import bitarray
+
+from Compressor.BitUtils import splitSigns, lowMask, wrapWords, viewWords, packSigns, unpackSigns, gatherBits, applySigns, applySign, readBits, getMagnitudeBounds, writeBits, bitArrayFromBuffer, getBitLengthHistogram
+
+INT_ENCODING_SIZE = 32 #Default number of bits per word
+WORD_TYPES = {32: np.uint32, 64: np.uint64}
+
+class NoSplitCompressor(Compressor):
+    def __init__(self, wordSize:int = INT_ENCODING_SIZE):
+        super().__init__()
+        self.wordSize = self._checkWordSize(wordSize)
+
+    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]:
+        """The method that compress int32 or int64 integer into smaller integers.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress
+
+        Returns:
+            tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]: A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+        """
+        # Get the necessary bit size of the biggest element in array
+        return self._pack(arr, max(self._getMaxBitLength(arr), 1))
+    
+    def _pack(self, arr:np.ndarray[int], maxBitLength:int) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]:
+        """Protected helper function compressing an array on a given bit length, used by compress and when a written value does not fit.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+            maxBitLength (int): The bit length of the magnitudes, at least the one of the biggest element.
+
+        Returns:
+            tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]: The compressed array, as returned by compress.
+        """
+        # Get the word size able to hold the bit length
+        wordSize = self._getWordSize(maxBitLength)
+        
+        # Compute the maximum capacity of a compressed integer and the shift of each slot within a word (first slot on the most significant bits)
+        intCompressedCapacity = (wordSize/maxBitLength).__floor__()
+        slotShifts = self._getSlotShifts(maxBitLength, intCompressedCapacity, wordSize)
+        
+        # Intialise the words, one row per word and one column per slot (the smallest int64 being kept as a negative zero)
+        wordCount = (len(arr)/intCompressedCapacity).__ceil__()
+        signs, magnitudes = splitSigns(arr)
+        slots = np.zeros(wordCount*intCompressedCapacity, dtype=np.uint64)
+        slots[:len(arr)] = magnitudes & lowMask(maxBitLength)
+        
+        # Shift every value to its slot and merge the slots of each word 
+        words = np.bitwise_or.reduce(slots.reshape(wordCount, intCompressedCapacity) << slotShifts, axis=1).astype(WORD_TYPES[wordSize])
+        
+        # Store the words and the signs as bit arrays (the words are shared, not copied)
+        compressedArr = wrapWords(words)
+        signArr = packSigns(signs)
+
+        return (compressedArr, signArr, maxBitLength, len(arr), wordSize)
+    
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array compressed using this class.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+            
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        
+        # Retrive necessary information and decompress the whole array
+        compressedArr, signArr, maxBitLength, initialLength, *_ = args
+        return self.decompressRange(0, initialLength, *args)
+        
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        
+        # Retrieve the variables and compute the cell to look at
+        compressedArr, signArr, maxBitLength, initialLength, wordSize, *_ = args
+        intCompressedCapacity = (wordSize/maxBitLength).__floor__()
+        
+        # Read the word containing the value and shift its slot to the lowest bits
+        word = int(viewWords(compressedArr, WORD_TYPES[wordSize])[i // intCompressedCapacity])
+        shift = wordSize - maxBitLength * (i%intCompressedCapacity + 1)
+        val = (word >> shift) & ((1 << maxBitLength) - 1)
+        
+        # Return the value and the sign
+        return applySign(val, signArr[i])
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Compute the number of values per word and the view of the bytes of the words once, each element being then read with a few integer operations.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        compressedArr, signArr, maxBitLength, initialLength, wordSize, *_ = args
+        buffer, intCompressedCapacity = memoryview(compressedArr), (wordSize/maxBitLength).__floor__()
+        
+        # The slot of an element starts after the previous slots of its word
+        def access(i:int) -> int:
+            word, slot = divmod(i, intCompressedCapacity)
+            return applySign(readBits(buffer, word*wordSize + slot*maxBitLength, maxBitLength), signArr[i])
+        return access
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, only unpacking the words covering them.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        # Retrive and compute necessary information
+        compressedArr, signArr, maxBitLength, initialLength, wordSize, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        intCompressedCapacity = (wordSize/maxBitLength).__floor__()
+        slotShifts = self._getSlotShifts(maxBitLength, intCompressedCapacity, wordSize)
+        
+        # Unpack every slot of the words covering the window at once
+        firstWord = start // intCompressedCapacity
+        words = viewWords(compressedArr, WORD_TYPES[wordSize])[firstWord:(stop/intCompressedCapacity).__ceil__()].astype(np.uint64)
+        values = ((words[:, None] >> slotShifts) & lowMask(maxBitLength)).reshape(-1)
+        values = values[start - firstWord*intCompressedCapacity:stop - firstWord*intCompressedCapacity]
+        
+        # Apply the signs
+        return applySigns(values, unpackSigns(signArr, start, stop))
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        # Retrieve the variables and compute the word and the slot of each position
+        compressedArr, signArr, maxBitLength, initialLength, wordSize, *_ = args
+        indices = self._checkIndices(indices, initialLength)
+        intCompressedCapacity = (wordSize/maxBitLength).__floor__()
+        shifts = (wordSize - maxBitLength * (indices%intCompressedCapacity + 1)).astype(np.uint64)
+        
+        # Gather the words containing the values and shift each slot to the lowest bits
+        words = viewWords(compressedArr, WORD_TYPES[wordSize])[indices // intCompressedCapacity].astype(np.uint64)
+        values = (words >> shifts) & lowMask(maxBitLength)
+        
+        # Apply the signs
+        return applySigns(values, gatherBits(signArr, indices))
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]:
+        """Write a value at the i-th position of the compressed array, in place if it fits the bit length.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        compressedArr, signArr, maxBitLength, initialLength, *_ = args
+        i = int(self._checkIndices([i], initialLength)[0])
+        return self._write(i, np.array([value], dtype=np.int64), *args)
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]:
+        """Append values at the end of the compressed array, in the free slots of the last word and in spare words if they fit the bit length.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        compressedArr, signArr, maxBitLength, initialLength, *_ = args
+        return self._write(initialLength, np.asarray(values, dtype=np.int64), *args)
+    
+    def _write(self, start:int, values:np.ndarray[np.int64], *args:tuple[Any]) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]:
+        """Protected helper function writing values one after the other from a position, the array being lengthened if they go past its end.
+
+        The words covering the values are rewritten in place when the values fit the bit length, otherwise the whole array is re-packed on a wider bit length.
+
+        Args:
+            start (int): The position of the first value, at most the length of the array.
+            values (np.ndarray[np.int64]): The values to write.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]: The compressed tuple holding the values.
+        """
+        compressedArr, signArr, maxBitLength, initialLength, wordSize, *_ = args
+        stop = max(initialLength, start + len(values))
+        if len(values) == 0:
+            return args
+        
+        # Re-pack the whole array when a value does not fit
+        bitLength = self._getMaxBitLength(values)
+        if bitLength > maxBitLength:
+            arr = np.zeros(stop, dtype=np.int64)
+            arr[:initialLength] = self.decompress(*args)
+            arr[start:start+len(values)] = values
+            return self._pack(arr, self._growBitLength(maxBitLength, bitLength))
+        
+        # Unpack the slots of the words covering the values (the words past the end being empty)
+        intCompressedCapacity = (wordSize/maxBitLength).__floor__()
+        slotShifts = self._getSlotShifts(maxBitLength, intCompressedCapacity, wordSize)
+        firstWord = start // intCompressedCapacity
+        wordCount = (start + len(values) - 1) // intCompressedCapacity - firstWord + 1
+        storedWords = viewWords(compressedArr, WORD_TYPES[wordSize])[firstWord:firstWord+wordCount].astype(np.uint64)
+        words = np.zeros(wordCount, dtype=np.uint64)
+        words[:len(storedWords)] = storedWords
+        slots = ((words[:, None] >> slotShifts) & lowMask(maxBitLength)).reshape(-1)
+        
+        # Replace the slots of the values and merge the slots of each word back
+        signs, magnitudes = splitSigns(values)
+        offset = start - firstWord*intCompressedCapacity
+        slots[offset:offset+len(values)] = magnitudes & lowMask(maxBitLength)
+        words = np.bitwise_or.reduce(slots.reshape(wordCount, intCompressedCapacity) << slotShifts, axis=1).astype(WORD_TYPES[wordSize])
+        
+        # Write the words and the signs in place, the spare words and bits after them receiving the new ones
+        compressedArr = writeBits(compressedArr, wrapWords(words), firstWord*wordSize)
+        signArr = writeBits(signArr, packSigns(signs), start)
+        return (compressedArr, signArr, maxBitLength, stop, wordSize)
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[3]
+    
+    def _getBounds(self, *args:tuple[Any]) -> tuple[int, int]:
+        """Protected helper function giving the bounds of the elements from the bit length.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[int, int]: The lower and the upper bound of the elements, their magnitude being below 2**bitLength.
+        """
+        compressedArr, signArr, maxBitLength, *_ = args
+        return getMagnitudeBounds(maxBitLength)
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): The bit length histogram of the array, computed if not given.
+
+        Returns:
+            int: The number of bits of the words and of the sign bitmap.
+        """
+        histogram = getBitLengthHistogram(arr) if histogram is None else histogram
+        initialLength = int(histogram.sum())
+        maxBitLength = max(int(np.flatnonzero(histogram).max(initial=0)), 1)
+        wordSize = self._getWordSize(maxBitLength)
+        intCompressedCapacity = (wordSize/maxBitLength).__floor__()
+        return wordSize*(initialLength/intCompressedCapacity).__ceil__() + 8*((initialLength+7)//8)
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd position an array containing the signs, in 3rd the necessary bit length of the biggest element of the uncompressed array, in 4th the length of the uncompressed array and in 5th the number of bits per word.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The bit length, the length and the word size, and the words and the sign bitmap.
+        """
+        compressedArr, signArr, maxBitLength, initialLength, wordSize, *_ = args
+        
+        # Only the words and the signs of the elements are kept, the spare ones left for appends are not sent
+        wordCount = (initialLength/(wordSize/maxBitLength).__floor__()).__ceil__()
+        return (maxBitLength, initialLength, wordSize), [memoryview(compressedArr)[:wordCount*wordSize//8], memoryview(signArr)[:(initialLength+7)//8]]
+    
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]:
+        """Rebuild the compressed array from the output of toParts, without copying the buffers.
+
+        Args:
+            params (tuple[int]): The bit length, the length and the word size (32 bits if missing, as written before the word size was configurable).
+            buffers (list[Any]): The words and the sign bitmap.
+
+        Returns:
+            tuple[bitarray.bitarray, bitarray.bitarray,int,int,int]: The compressed array, as returned by compress.
+        """
+        maxBitLength, initialLength, wordSize = (*params, INT_ENCODING_SIZE)[:3]
+        return (bitArrayFromBuffer(buffers[0]), bitArrayFromBuffer(buffers[1]), maxBitLength, initialLength, wordSize)
+    
+    def _getWordSize(self, maxBitLength:int) -> int:
+        """Protected helper function giving the word size used for a bit length, 64-bit words being used when a value does not fit in the configured words.
+
+        Args:
+            maxBitLength (int): The necessary bit length of the biggest element of the uncompressed array.
+
+        Returns:
+            int: The number of bits per word.
+        """
+        return self.wordSize if maxBitLength <= self.wordSize else 64
+    
+    def _getSlotShifts(self, maxBitLength:int, intCompressedCapacity:int, wordSize:int = INT_ENCODING_SIZE) -> np.ndarray[np.uint64]:
+        """Protected helper function computing the right shift that brings each slot of a word to the lowest bits.
+
+        Args:
+            maxBitLength (int): The necessary bit length of the biggest element of the uncompressed array.
+            intCompressedCapacity (int): The number of values stored per word.
+            wordSize (int, optional): The number of bits per word. Defaults to INT_ENCODING_SIZE.
+
+        Returns:
+            np.ndarray[np.uint64]: The shift of each slot, the first slot being on the most significant bits.
+        """
+        return (wordSize - maxBitLength * (np.arange(intCompressedCapacity) + 1)).astype(np.uint64)
+
+
+if __name__ == "__main__":
+    arr = np.random.randint(-2**16+1, 2**16-1, 100_000)
+    nsC = NoSplitCompressor()
+    
+    val = nsC.compress(arr)
+    print(nsC.get(len(arr)-1, *val), arr[-1])
+    print(nsC.get(len(arr)-2, *val), arr[-2])
+    print(nsC.get(0, *val), arr[0])
+    print(nsC.get(87333, *val), arr[87333])
+    
     print(np.all(arr == nsC.decompress(*val)))
\ No newline at end of file
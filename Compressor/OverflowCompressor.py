@@ -1,175 +1,844 @@
-from Compressor.AbstractCompressor import Compressor
-from typing import Any
-import numpy as np
-import bitarray
-
-INT_ENCODING_SIZE = 32 #32 bits per integer
-
-class OverflowCompressor(Compressor):
-    def __init__(self, threshold:int = 12):
-        super().__init__()
-        self.threshold = max(1,threshold)
-        
-    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,int,bitarray.bitarray,int,int]:
-        
-        # Just rename threshold for safety
-        overflowThresholdBitLength = self.threshold
-        
-        # Compute the max bit length of the supremum element in the overflow area and outside
-        try:
-            maxOverflowBitLength = int(arr[arr.__abs__() >= 2**overflowThresholdBitLength].__abs__().max()).bit_length()
-        except ValueError:
-            maxOverflowBitLength = 0
-        try:
-            maxBitLength = int(arr[arr.__abs__() < 2**overflowThresholdBitLength].__abs__().max()).bit_length()
-        except ValueError:
-            maxBitLength = 0
-
-        # Compute the length of the areas and create the compressed and overflow array
-        compressedArrayLength = INT_ENCODING_SIZE * float.__ceil__(len(arr) * (maxBitLength+2) / INT_ENCODING_SIZE)
-        overflowArrayLength = INT_ENCODING_SIZE * float.__ceil__(len(arr) * (maxOverflowBitLength+1) / INT_ENCODING_SIZE)
-        compressedArr = bitarray.bitarray(np.zeros(compressedArrayLength, dtype=bool).tolist())
-        overflowArr = bitarray.bitarray(np.zeros(overflowArrayLength, dtype=bool).tolist())
-
-        # Initialise the necessary shift in position depending on the number of overflowed integer 
-        overflowCount = 0
-        
-        # Compress the array
-        for arrIndex, elem in enumerate(arr):
-            # Get the bit representation of an integer, ex:  -12 -> '-0001100'
-            bitVal = format(elem, "08b")
-            
-            # Compute the position to set the value
-            startPos = arrIndex*(maxBitLength+2) - overflowCount*(maxBitLength+1)
-            
-            # If the element is in the overflow area
-            if abs(elem) >= 2**maxBitLength:
-                
-                # Indicate it in the compressedArray and compute the corresponding position within the overflow area
-                compressedArr[startPos] = True                
-                overflowStartPos = overflowCount * (maxOverflowBitLength+1)
-                
-                # Add the sign bit in the overflow
-                overflowArr[overflowStartPos] = True if bitVal.startswith("-") else False
-                
-                # Correct the length of bits to maxOverflowBitLength
-                correctedBitVal = bitVal[-maxOverflowBitLength:].strip("-")
-                correctedBitVal = "0"*(maxOverflowBitLength-len(correctedBitVal))+correctedBitVal
-                
-                # Place the compressed integer within the overflow area and update the counter of overflowed numbers
-                for bitIndex, bitElem in enumerate(correctedBitVal):
-                    overflowArr[overflowStartPos+1+bitIndex] = True if bitElem == "1" else False
-                overflowCount += 1
-                continue
-            
-            # If the number is in normal area, indicate it
-            compressedArr[startPos] = False
-                
-            # Put the sign
-            if bitVal.startswith("-"):
-                compressedArr[startPos+1] = True
-            else:
-                compressedArr[startPos+1] = False
-            
-            # Correct the length of bits to maxBitLength
-            correctedBitVal = bitVal[-maxBitLength:].strip("-")
-            correctedBitVal = ("0"*(maxBitLength-len(correctedBitVal))+correctedBitVal)[:maxBitLength+1]
-            
-            # Put the compressed integer in the correct place
-            for bitIndex, bitElem in enumerate(correctedBitVal):
-                compressedArr[startPos+2+bitIndex] = True if bitElem == "1" else False
-        
-        return compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, len(arr)
-        
-    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
-        
-        # Retrive and initialise necessary information
-        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
-        decompressedArr = []
-        overflowCount = 0
-        
-        # Loop through the compressed array
-        for arrIndex in range(initialLength):
-            
-            # Compute the position to look at
-            startPos = arrIndex*(maxBitLength+2) - overflowCount*(maxBitLength+1)
-            
-            # If value in overflow area, look in overflow area
-            if compressedArr[startPos] == True:
-                # Compute corresponding position within overflow area
-                overflowStartPos = overflowCount * (maxOverflowBitLength+1)
-                
-                # Check if the value is negative and get the compressed integer
-                neg = overflowArr[overflowStartPos]
-                val = overflowArr[overflowStartPos+1:overflowStartPos+maxOverflowBitLength+1]
-                
-                # Transform the compressed integer and decode it
-                decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
-                decompressedArr.append(int(("-" if neg else "") + "".join(decompressedVal), base=2))
-                
-                # Update overflow count
-                overflowCount += 1
-                continue
-            
-            # If the value is not in overflow area, then get directly from the compressed array
-            neg = compressedArr[startPos+1]
-            val = compressedArr[startPos+2:startPos+2+maxBitLength]
-            
-            # and decode it before adding it to the decompressed array
-            decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
-            decompressedArr.append(int(("-" if neg else "") + "".join(decompressedVal), base=2) if decompressedVal != [] else 0)
-        
-        return np.array(decompressedArr)    
-
-    def get(self, i:int, *args:tuple[Any]) -> int:
-        
-        # Retrieve necessary informations
-        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
-        
-        # Loop until index equal the one we want
-        overflowCount = 0
-        for arrIndex in range(initialLength):
-            
-            # Compute the index we want to look at in the compressed array
-            lookAt = arrIndex*(maxBitLength+2) - overflowCount*(maxBitLength+1)
-            
-            # If the index is the one we want
-            if arrIndex == i:
-                # Check if it is within the overflow area
-                if compressedArr[lookAt] == True:
-                    
-                    # Compute corresponding position within overflow area
-                    overflowStartPos = overflowCount * (maxOverflowBitLength+1)
-                
-                    # Check if the value is negative and get the compressed integer
-                    neg = overflowArr[overflowStartPos]
-                    val = overflowArr[overflowStartPos+1:overflowStartPos+maxOverflowBitLength+1]
-                    
-                    # Transform the compressed integer and decode it
-                    decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
-                    return int(("-" if neg else "") + "".join(decompressedVal), base=2)
-                
-                # If the value is not in overflow area, then get directly from the compressed array
-                neg = compressedArr[lookAt+1]
-                val = compressedArr[lookAt+2:lookAt+2+maxBitLength]
-                
-                # and decode it before adding it to the decompressed array
-                decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
-                if decompressedVal == []:
-                    return 0
-                return int(("-" if neg else "") + "".join(decompressedVal), base=2)
-            
-            # If it is not the one we want and it is in the overflow area, update the shift
-            if compressedArr[lookAt] == True:
-                overflowCount += 1
-
-
-if __name__ == "__main__":
-    arr = np.array([0])
-    oC = OverflowCompressor(12)
-    
-    val = oC.compress(arr)
-    
-    print(arr[0] == oC.get(0, *val)) 
-    
+from Compressor.AbstractCompressor import Compressor, SCAN_CHUNK_SIZE
+from typing import Any, Callable, Iterator
+import numpy as np
+import bitarray
+from bitarray.util import ba2int
+
+from Compressor.BitUtils import MAX_BIT_LENGTH, splitSigns, getBitLengths, packCodes, extractCodes, unpackFixed, decodeSignMagnitude, applySign, readBits, getMagnitudeBounds, exactSum, gatherBits, writeBits, growArray, bitArrayFromBuffer, getBitLengthHistogram
+
+INT_ENCODING_SIZE = 32 #Default number of bits per word
+RANK_BLOCK_SIZE = 64 #Number of elements per 16-bit count of the rank index
+RANK_SUPERBLOCK_SIZE = 2048 #Number of elements per 64-bit count of the rank index
+BLOCKS_PER_SUPERBLOCK = RANK_SUPERBLOCK_SIZE // RANK_BLOCK_SIZE
+
+class OverflowCompressor(Compressor):
+    def __init__(self, threshold:int = 12, rankIndex:bool = True, wordSize:int = INT_ENCODING_SIZE):
+        super().__init__()
+        self.threshold = max(1,threshold)
+        self.rankIndex = rankIndex
+        self.wordSize = self._checkWordSize(wordSize)
+        
+    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]|None]:
+        
+        # Just rename threshold for safety
+        overflowThresholdBitLength = self.threshold
+        
+        # Compute the bit length of every element (the smallest int64 being kept on 63 bits as a negative zero)
+        signs, magnitudes = splitSigns(arr)
+        bitLengths = np.minimum(getBitLengths(magnitudes), MAX_BIT_LENGTH)
+        
+        # Compute the max bit length of the supremum element in the overflow area and outside
+        isAboveThreshold = bitLengths > overflowThresholdBitLength
+        maxOverflowBitLength = int(bitLengths[isAboveThreshold].max(initial=0))
+        maxBitLength = int(bitLengths[~isAboveThreshold].max(initial=0))
+
+        # Compute the length of the areas
+        compressedArrayLength = self.wordSize * float.__ceil__(len(arr) * (maxBitLength+2) / self.wordSize)
+        overflowArrayLength = self.wordSize * float.__ceil__(len(arr) * (maxOverflowBitLength+1) / self.wordSize)
+
+        # Find the elements going in the overflow area and the necessary shift in position depending on the number of overflowed integer before them
+        flags = bitLengths > maxBitLength
+        overflowCount = np.cumsum(flags) - flags
+        startPos = np.arange(len(arr), dtype=np.int64)*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+        
+        # In the compressed array, an overflowed element is only its flag while the others are the flag (0), the sign and the compressed integer
+        # The flag of the others is left to the zeros of the stream, so that no code is wider than 64 bits
+        codes = np.where(flags, np.uint64(1), (signs.astype(np.uint64) << np.uint64(maxBitLength)) | magnitudes)
+        compressedArr = packCodes(codes, startPos + ~flags, np.where(flags, 1, maxBitLength+1), compressedArrayLength)
+        
+        # In the overflow area, put the sign and the compressed integer of the overflowed elements one after the other
+        overflowCodes = (signs[flags].astype(np.uint64) << np.uint64(maxOverflowBitLength)) | magnitudes[flags]
+        overflowArr = packCodes(overflowCodes, overflowCount[flags] * (maxOverflowBitLength+1), maxOverflowBitLength+1, overflowArrayLength)
+        
+        # Build the rank index from the overflow flags
+        rankIndex = None
+        if self.rankIndex:
+            rankIndex = self._buildRankIndex(flags)
+        
+        return compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, len(arr), rankIndex
+        
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        
+        # Retrive the necessary information and decompress the whole array
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        return self.decompressRange(0, initialLength, *args)
+
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        
+        # Retrieve necessary informations
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        rankIndex = args[5] if len(args) > 5 else None
+        
+        # Without rank index, loop until index equal the one we want
+        if rankIndex is None:
+            return self._scanGet(i, *args)
+        
+        # Read the flag of i and count the overflowed integers before it from the rank index
+        isOverflowed, overflowCount = self._rankOne(i, *rankIndex, memoryview(compressedArr), maxBitLength, initialLength)
+        
+        # Compute the index we want to look at in the compressed array
+        lookAt = i*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+        
+        # Check if it is within the overflow area and compute the corresponding position
+        if isOverflowed:
+            lookAt = overflowCount * (maxOverflowBitLength+1)
+            compressedArr, maxBitLength = overflowArr, maxOverflowBitLength
+        else:
+            lookAt += 1
+        
+        # Check if the value is negative and decode the compressed integer
+        neg = compressedArr[lookAt]
+        val = ba2int(compressedArr[lookAt+1:lookAt+1+maxBitLength]) if maxBitLength != 0 else 0
+        return applySign(val, neg)
+    
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Compute the code widths, the rank index as Python integers and the views of the bytes of both areas once, each element being then read with a few integer operations.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        superCounts, subCounts = (table.tolist() for table in self._getRankIndex(*args))
+        buffer, overflowBuffer = memoryview(compressedArr), memoryview(overflowArr)
+        rankOne = self._rankOne
+        
+        # The rank index gives the flag of the element and the number of overflowed integers before it
+        def access(i:int) -> int:
+            isOverflowed, overflowCount = rankOne(i, superCounts, subCounts, buffer, maxBitLength, initialLength)
+            if isOverflowed:
+                code = readBits(overflowBuffer, overflowCount*(maxOverflowBitLength+1), maxOverflowBitLength+1)
+                return applySign(code & ((1 << maxOverflowBitLength) - 1), code >> maxOverflowBitLength)
+            code = readBits(buffer, i*(maxBitLength+2) - overflowCount*(maxBitLength+1) + 1, maxBitLength+1)
+            return applySign(code & ((1 << maxBitLength) - 1), code >> maxBitLength)
+        return access
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, only reading the parts of both areas covering them.
+
+        The rank index gives the number of overflowed integers before start, used as a checkpoint to find where the window begins in both areas.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        # Retrive the necessary information
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        
+        # Decode the elements of the normal area, the overflowed ones being one after the other in the overflow area from the checkpoint
+        flags, firstOverflow, normalValues = self._decodeNormal(start, stop, *args)
+        overflowValues = self._decodeOverflow(firstOverflow, firstOverflow + int(np.count_nonzero(flags)), *args)
+        
+        # Put them back in order
+        decompressedArr = np.zeros(stop - start, dtype=np.int64)
+        decompressedArr[~flags] = normalValues
+        decompressedArr[flags] = overflowValues
+        return decompressedArr
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once, using the rank index.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        # Retrieve necessary informations
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        indices = self._checkIndices(indices, initialLength)
+        flags, overflowCount = self._rank(indices, *args)
+        
+        # Compute the index to look at in the compressed array and in the overflow area
+        lookAt = indices*(maxBitLength+2) - overflowCount*(maxBitLength+1) + 1
+        overflowLookAt = overflowCount * (maxOverflowBitLength+1)
+        
+        # Gather the values of both areas and put them back in the requested order
+        values = np.zeros(len(indices), dtype=np.int64)
+        values[~flags] = decodeSignMagnitude(extractCodes(compressedArr, lookAt[~flags], maxBitLength+1), maxBitLength)
+        values[flags] = decodeSignMagnitude(extractCodes(overflowArr, overflowLookAt[flags], maxOverflowBitLength+1), maxOverflowBitLength)
+        return values
+    
+    def sum(self, *args:tuple[Any]) -> int:
+        """Compute the sum of the compressed array, summing the normal area and the overflow area separately.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            int: The sum of the elements.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, *_ = args
+        normalSum = sum(exactSum(values, getMagnitudeBounds(maxBitLength)) for values in self._iterNormalChunks(*args))
+        return normalSum + sum(exactSum(values, getMagnitudeBounds(maxOverflowBitLength)) for values in self._iterOverflowChunks(*args))
+    
+    def min(self, *args:tuple[Any]) -> int:
+        """Compute the minimum of the compressed array.
+
+        Every overflowed integer is further from 0 than any integer of the normal area, so a negative overflowed integer is smaller than all of them and only the overflow area is decoded.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The smallest element.
+        """
+        overflowMins = [int(values.min()) for values in self._iterOverflowChunks(*args)]
+        if overflowMins and min(overflowMins) < 0:
+            return min(overflowMins)
+        return int(min([*overflowMins, *(values.min() for values in self._iterNormalChunks(*args) if len(values) != 0)]))
+    
+    def max(self, *args:tuple[Any]) -> int:
+        """Compute the maximum of the compressed array.
+
+        Every overflowed integer is further from 0 than any integer of the normal area, so a positive overflowed integer is larger than all of them and only the overflow area is decoded.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The largest element.
+        """
+        overflowMaxs = [int(values.max()) for values in self._iterOverflowChunks(*args)]
+        if overflowMaxs and max(overflowMaxs) > 0:
+            return max(overflowMaxs)
+        return int(max([*overflowMaxs, *(values.max() for values in self._iterNormalChunks(*args) if len(values) != 0)]))
+    
+    def countWhere(self, op:str, value:int, *args:tuple[Any]) -> int:
+        """Count the elements of the compressed array satisfying a comparison, answering for the normal area and the overflow area separately.
+
+        An area whose bit length decides the comparison for all its elements (such as `element > 5000` with a normal area on 12 bits) is not decoded.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            int: The number of elements satisfying `element op value`.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        comparison = self._getComparison(op)
+        overflowCount = self._countOverflow(self._getRankIndex(*args))
+        
+        # Each area holds integers of magnitude below 2**bitLength
+        count = 0
+        for areaLength, bitLength, chunks in [(initialLength - overflowCount, maxBitLength, self._iterNormalChunks), (overflowCount, maxOverflowBitLength, self._iterOverflowChunks)]:
+            allMatch, noneMatch = self._matchBounds(op, value, *getMagnitudeBounds(bitLength))
+            if allMatch:
+                count += areaLength
+            elif not noneMatch:
+                count += sum(int(np.count_nonzero(comparison(values, value))) for values in chunks(*args))
+        return count
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]]:
+        """Write a value at the i-th position of the compressed array, in place if it stays in the same area.
+
+        A value fitting the normal area replaces a normal element in place, and a value wider than the normal area replaces an overflowed element in place (the overflow area being widened first if needed).
+        Otherwise the element moves from one area to the other, and the whole array is re-packed.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        i = int(self._checkIndices([i], initialLength)[0])
+        rankIndex = self._getRankIndex(*args)
+        flags, overflowCount = self._rank(np.array([i]), *args[:5], rankIndex)
+        signs, magnitudes = splitSigns(np.array([value], dtype=np.int64))
+        bitLength = min(int(getBitLengths(magnitudes)[0]), MAX_BIT_LENGTH)
+        
+        # Every overflowed integer has to stay wider than the normal area, so an element changing of area needs a re-pack
+        if flags[0] != (bitLength > maxBitLength):
+            arr = self.decompress(*args)
+            arr[i] = value
+            return self.compress(arr)
+        
+        # Overwrite the sign and the compressed integer of a normal element
+        if not flags[0]:
+            lookAt = i*(maxBitLength+2) - int(overflowCount[0])*(maxBitLength+1) + 1
+            code = (signs.astype(np.uint64) << np.uint64(maxBitLength)) | magnitudes
+            compressedArr = writeBits(compressedArr, packCodes(code, [0], maxBitLength+1, maxBitLength+1), lookAt)
+            return compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, rankIndex
+        
+        # Or the ones of an overflowed element, in an overflow area wide enough
+        overflowArr, maxOverflowBitLength = self._widenOverflow(bitLength, *args[:5], rankIndex)
+        code = (signs.astype(np.uint64) << np.uint64(maxOverflowBitLength)) | magnitudes
+        overflowArr = writeBits(overflowArr, packCodes(code, [0], maxOverflowBitLength+1, maxOverflowBitLength+1), int(overflowCount[0])*(maxOverflowBitLength+1))
+        return compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, rankIndex
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]]:
+        """Append values at the end of the compressed array, in the spare bits after the last code of each area.
+
+        The values wider than the normal area go to the overflow area (widened first if needed), so the normal area is never re-packed and only the counts of the rank index from the superblock of the last element on are rebuilt.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        rankIndex = self._getRankIndex(*args)
+        overflowCount = self._countOverflow(rankIndex)
+        
+        # Find the values going in the overflow area, and widen it if they do not fit
+        signs, magnitudes = splitSigns(np.asarray(values, dtype=np.int64))
+        bitLengths = np.minimum(getBitLengths(magnitudes), MAX_BIT_LENGTH)
+        flags = bitLengths > maxBitLength
+        overflowArr, maxOverflowBitLength = self._widenOverflow(int(bitLengths[flags].max(initial=0)), *args[:5], rankIndex)
+        
+        # Write the new part of the compressed array after the used bits, laid out as by compress
+        newOverflowCount = np.cumsum(flags) - flags
+        startPos = np.arange(len(flags), dtype=np.int64)*(maxBitLength+2) - newOverflowCount*(maxBitLength+1)
+        codes = np.where(flags, np.uint64(1), (signs.astype(np.uint64) << np.uint64(maxBitLength)) | magnitudes)
+        usedBits = initialLength*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+        newBits = int(startPos[-1]) + (1 if flags[-1] else maxBitLength+2) if len(flags) != 0 else 0
+        compressedArr = writeBits(compressedArr, packCodes(codes, startPos + ~flags, np.where(flags, 1, maxBitLength+1), newBits), usedBits)
+        
+        # Write the overflowed values after the last one of the overflow area
+        overflowCodes = (signs[flags].astype(np.uint64) << np.uint64(maxOverflowBitLength)) | magnitudes[flags]
+        overflowBits = packCodes(overflowCodes, np.arange(len(overflowCodes), dtype=np.int64) * (maxOverflowBitLength+1), maxOverflowBitLength+1, len(overflowCodes) * (maxOverflowBitLength+1))
+        overflowArr = writeBits(overflowArr, overflowBits, overflowCount*(maxOverflowBitLength+1))
+        
+        # Rebuild the rank index from the superblock of the last block on, the flags of the last block being the ones already there followed by the new ones
+        superCounts, subCounts = rankIndex
+        firstBlock = initialLength // RANK_BLOCK_SIZE
+        firstSuperblock = firstBlock // BLOCKS_PER_SUPERBLOCK
+        storedFlags = np.zeros(0, dtype=bool)
+        if initialLength != firstBlock*RANK_BLOCK_SIZE:
+            storedFlags = self._readFlags(np.array([firstBlock]), *args[:5], rankIndex)[0][0, :initialLength - firstBlock*RANK_BLOCK_SIZE]
+        headCounts = self._countBefore(np.arange(firstSuperblock*BLOCKS_PER_SUPERBLOCK, firstBlock+1), rankIndex)
+        tailCounts = headCounts[-1] + self._cumulateFlags(np.concatenate([storedFlags, flags]))[1:]
+        newSuperCounts, newSubCounts = self._packCounts(np.concatenate([headCounts, tailCounts]))
+        superCounts = growArray(superCounts, firstSuperblock + len(newSuperCounts))
+        subCounts = growArray(subCounts, firstSuperblock*BLOCKS_PER_SUPERBLOCK + len(newSubCounts))
+        superCounts[firstSuperblock:] = newSuperCounts
+        subCounts[firstSuperblock*BLOCKS_PER_SUPERBLOCK:] = newSubCounts
+        
+        return compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength + len(flags), (superCounts, subCounts)
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[4]
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): The bit length histogram of the array, computed if not given.
+
+        Returns:
+            int: The number of bits of the used part of both areas, the rank index being rebuilt by the receiver.
+        """
+        histogram = getBitLengthHistogram(arr) if histogram is None else histogram
+        initialLength = int(histogram.sum())
+        
+        # Split the histogram at the threshold to get the bit length of both areas and the number of overflowed integers
+        isAboveThreshold = np.arange(len(histogram)) > self.threshold
+        maxBitLength = int(np.flatnonzero(histogram * ~isAboveThreshold).max(initial=0))
+        maxOverflowBitLength = int(np.flatnonzero(histogram * isAboveThreshold).max(initial=0))
+        overflowCount = int(histogram[isAboveThreshold].sum())
+        
+        # Both areas as sent by the serialisation
+        usedBits = initialLength*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+        usedOverflowBits = overflowCount*(maxOverflowBitLength+1)
+        return 8*((usedBits+7)//8) + 8*((usedOverflowBits+7)//8)
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        Only the used part of both areas is kept, the rank index being rebuilt from the flags of the normal area by the receiver.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area, in 5th the length of the uncompressed array and in 6th the rank index.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The bit lengths, the length and the number of overflowed integers, and the two areas.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        
+        # Compute the number of bits really used in both areas
+        overflowCount = self._countOverflow(self._getRankIndex(*args))
+        usedBits = initialLength*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+        usedOverflowBits = overflowCount*(maxOverflowBitLength+1)
+        
+        buffers = [memoryview(compressedArr)[:(usedBits+7)//8], memoryview(overflowArr)[:(usedOverflowBits+7)//8]]
+        return (maxBitLength, maxOverflowBitLength, initialLength, overflowCount), buffers
+    
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]]:
+        """Rebuild the compressed array from the output of toParts, without copying the buffers.
+
+        The rank index is rebuilt with buildRankIndex, unless the compressor does not use one.
+
+        Args:
+            params (tuple[int]): The bit lengths, the length and the number of overflowed integers.
+            buffers (list[Any]): The two areas.
+
+        Returns:
+            tuple[bitarray.bitarray,int,bitarray.bitarray,int,int,tuple[np.ndarray,np.ndarray]]: The compressed array, as returned by compress.
+        """
+        maxBitLength, maxOverflowBitLength, initialLength, overflowCount = params
+        args = (bitArrayFromBuffer(buffers[0]), maxBitLength, bitArrayFromBuffer(buffers[1]), maxOverflowBitLength, initialLength)
+        return self.buildRankIndex(*args) if self.rankIndex else (*args, None)
+    
+    def buildRankIndex(self, *args:tuple[Any]) -> tuple[Any]:
+        """Rebuild the rank index of a compressed tuple, for instance one compressed without it.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed array, in 2nd the bit length of the normal area, in 3rd the overflow area, in 4th the bit length of the overflow area and in 5th the length of the uncompressed array.
+
+        Returns:
+            tuple[Any]: The same compressed tuple with the rank index in 6th position.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        
+        # Cut the normal area into segments as long as RANK_BLOCK_SIZE normal codes, the codes going from one segment to the next starting at most maxBitLength+1 bits after its beginning
+        codeWidth = maxBitLength+2
+        segmentBits = RANK_BLOCK_SIZE*codeWidth
+        segmentCount = -(-min(len(compressedArr), initialLength*codeWidth) // segmentBits)
+        chunkSegments = SCAN_CHUNK_SIZE // RANK_BLOCK_SIZE
+        
+        # Walk through each segment from each possible first code at once, giving where the first code of the next segment starts
+        nextOffsets = np.zeros((segmentCount, codeWidth), dtype=np.int64)
+        for firstSegment in range(0, segmentCount, chunkSegments):
+            bits, segments = self._unpackSegments(compressedArr, firstSegment, min(firstSegment + chunkSegments, segmentCount), segmentBits)
+            lookAt = (segments[:, None]*segmentBits + np.arange(codeWidth)).ravel()
+            ends = np.repeat((segments+1)*segmentBits, codeWidth)
+            nextOffsets[firstSegment:firstSegment+len(segments)] = (self._walkNormalCodes(bits, lookAt, ends, codeWidth)[0] - ends).reshape(-1, codeWidth)
+        
+        # Chain the segments by prefix doubling, the first code of the array starting on the first bit
+        for distance in (2**power for power in range(max(segmentCount-1, 1).bit_length())):
+            nextOffsets[distance:] = np.take_along_axis(nextOffsets[distance:], nextOffsets[:-distance], axis=1)
+        firstOffsets = np.concatenate([[0], nextOffsets[:-1, 0]])
+        
+        # Walk through each segment again from its true first code, the codes starting by a 0 being the normal integers and the runs of 1 the overflowed ones
+        flags = np.ones(initialLength, dtype=bool)
+        normalCount = 0
+        for firstSegment in range(0, segmentCount, chunkSegments):
+            bits, segments = self._unpackSegments(compressedArr, firstSegment, min(firstSegment + chunkSegments, segmentCount), segmentBits)
+            codeStarts = self._walkNormalCodes(bits, segments*segmentBits + firstOffsets[firstSegment + segments], (segments+1)*segmentBits, codeWidth, True)[1]
+            codeStarts = codeStarts[codeStarts >= 0] + firstSegment*segmentBits
+            
+            # The j-th normal integer starts at j*codeWidth plus the number of overflowed integers before it
+            normalIndices = np.arange(normalCount, normalCount + len(codeStarts), dtype=np.int64)
+            arrIndices = normalIndices + codeStarts - normalIndices*codeWidth
+            flags[arrIndices[arrIndices < initialLength]] = False
+            normalCount += len(codeStarts)
+        
+        return compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, self._buildRankIndex(flags)
+    
+    def _getBounds(self, *args:tuple[Any]) -> tuple[int, int]:
+        """Protected helper function giving the bounds of the elements from the bit lengths of both areas.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[int, int]: The lower and the upper bound of the elements, their magnitude being below 2**bitLength in both areas.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, *_ = args
+        return getMagnitudeBounds(max(maxBitLength, maxOverflowBitLength))
+    
+    def _decodeNormal(self, start:int, stop:int, *args:tuple[Any]) -> tuple[np.ndarray[bool], int, np.ndarray[np.int64]]:
+        """Protected helper function decoding the elements of a window stored in the normal area.
+
+        The rank index gives the number of overflowed integers before start, used as a checkpoint to find where the window begins in both areas.
+
+        Args:
+            start (int): The first position of the window, already checked.
+            stop (int): The position after the last one of the window, already checked.
+            *args (tuple[Any]): The compressed tuple, the rank index being rebuilt if missing.
+
+        Returns:
+            tuple[np.ndarray[bool], int, np.ndarray[np.int64]]: A tuple containing in 1st position the overflow flags of the window, in 2nd position the number of overflowed integers before start and in 3rd position the integers of the window stored in the normal area.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        rankIndex = self._getRankIndex(*args)
+        if start == stop:
+            return np.zeros(0, dtype=bool), 0, np.zeros(0, dtype=np.int64)
+        
+        # Read the overflow flags of the blocks covering the window and count the overflowed integers before each element, starting from the checkpoint
+        firstBlock = start // RANK_BLOCK_SIZE
+        blockFlags, blockCounts = self._readFlags(np.arange(firstBlock, -(-stop // RANK_BLOCK_SIZE)), *args[:5], rankIndex)
+        blockFlags = blockFlags.ravel()
+        flags = blockFlags[start - firstBlock*RANK_BLOCK_SIZE:stop - firstBlock*RANK_BLOCK_SIZE]
+        firstOverflow = int(blockCounts[0]) + int(np.count_nonzero(blockFlags[:start - firstBlock*RANK_BLOCK_SIZE]))
+        overflowCount = firstOverflow + np.cumsum(flags) - flags
+        
+        # Compute the position of each element of the normal area and read their sign and compressed integer at once
+        startPos = np.arange(start, stop, dtype=np.int64)[~flags]*(maxBitLength+2) - overflowCount[~flags]*(maxBitLength+1)
+        normalCodes = extractCodes(compressedArr, startPos + 1, maxBitLength+1)
+        return flags, firstOverflow, decodeSignMagnitude(normalCodes, maxBitLength)
+    
+    def _decodeOverflow(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Protected helper function decoding a range of the overflow area, whose codes all have the same width.
+
+        Args:
+            start (int): The rank of the first overflowed integer to decode.
+            stop (int): The rank after the last overflowed integer to decode.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            np.ndarray[np.int64]: The overflowed integers.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, *_ = args
+        return decodeSignMagnitude(unpackFixed(overflowArr, maxOverflowBitLength+1, start, stop), maxOverflowBitLength)
+    
+    def _iterNormalChunks(self, *args:tuple[Any]) -> Iterator[np.ndarray[np.int64]]:
+        """Protected helper function decoding the normal area chunk by chunk, without decoding the overflow area.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Yields:
+            np.ndarray[np.int64]: The integers of the normal area of each chunk.
+        """
+        # Build the rank index once for payloads compressed without it
+        if len(args) <= 5 or args[5] is None:
+            args = self.buildRankIndex(*args)
+        initialLength = args[4]
+        for start in range(0, initialLength, SCAN_CHUNK_SIZE):
+            yield self._decodeNormal(start, min(start + SCAN_CHUNK_SIZE, initialLength), *args)[2]
+    
+    def _iterOverflowChunks(self, *args:tuple[Any]) -> Iterator[np.ndarray[np.int64]]:
+        """Protected helper function decoding the overflow area chunk by chunk, without decoding the normal area.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Yields:
+            np.ndarray[np.int64]: The overflowed integers of each chunk.
+        """
+        # Build the rank index once for payloads compressed without it
+        if len(args) <= 5 or args[5] is None:
+            args = self.buildRankIndex(*args)
+        overflowCount = self._countOverflow(args[5])
+        for start in range(0, overflowCount, SCAN_CHUNK_SIZE):
+            yield self._decodeOverflow(start, min(start + SCAN_CHUNK_SIZE, overflowCount), *args)
+    
+    def _countOverflow(self, rankIndex:tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]) -> int:
+        """Protected helper function counting all the overflowed integers, from the rank index.
+
+        Args:
+            rankIndex (tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]): The rank index.
+
+        Returns:
+            int: The number of overflowed integers.
+        """
+        return int(self._countBefore(np.array([len(rankIndex[1]) - 1]), rankIndex)[0])
+    
+    def _widenOverflow(self, bitLength:int, *args:tuple[Any]) -> tuple[bitarray.bitarray, int]:
+        """Protected helper function re-packing the overflow area on a wider bit length when a written value does not fit it, the normal area being left as it is.
+
+        Args:
+            bitLength (int): The bit length of the written value.
+            *args (tuple[Any]): The compressed tuple, with its rank index.
+
+        Returns:
+            tuple[bitarray.bitarray, int]: The overflow area and its bit length.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, rankIndex, *_ = args
+        if bitLength <= maxOverflowBitLength:
+            return overflowArr, maxOverflowBitLength
+        
+        # Decode the overflowed integers and write them again on the new bit length
+        overflowCount = self._countOverflow(rankIndex)
+        signs, magnitudes = splitSigns(self._decodeOverflow(0, overflowCount, *args))
+        maxOverflowBitLength = self._growBitLength(maxOverflowBitLength, bitLength)
+        overflowCodes = (signs.astype(np.uint64) << np.uint64(maxOverflowBitLength)) | magnitudes
+        overflowArrayLength = self.wordSize * float.__ceil__(overflowCount * (maxOverflowBitLength+1) / self.wordSize)
+        return packCodes(overflowCodes, np.arange(overflowCount, dtype=np.int64) * (maxOverflowBitLength+1), maxOverflowBitLength+1, overflowArrayLength), maxOverflowBitLength
+    
+    def _getRankIndex(self, *args:tuple[Any]) -> tuple[np.ndarray[np.uint32], np.ndarray[np.uint64]]:
+        """Protected helper function returning the rank index of a compressed tuple, rebuilding it if missing.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[np.ndarray[np.uint32], np.ndarray[np.uint64]]: The rank index.
+        """
+        if len(args) > 5 and args[5] is not None:
+            return args[5]
+        return self.buildRankIndex(*args)[5]
+    
+    def _rank(self, indices:np.ndarray[np.int64], *args:tuple[Any]) -> tuple[np.ndarray[bool], np.ndarray[np.int64]]:
+        """Protected helper function reading the overflow flag of several elements and counting the overflowed integers before them.
+
+        Args:
+            indices (np.ndarray[np.int64]): The positions of the elements.
+            *args (tuple[Any]): The compressed tuple, the rank index being rebuilt if missing.
+
+        Returns:
+            tuple[np.ndarray[bool], np.ndarray[np.int64]]: A tuple containing in 1st position the overflow flags and in 2nd position the number of overflowed integers before each element.
+        """
+        blocks, offsets = np.divmod(indices, RANK_BLOCK_SIZE)
+        blockFlags, blockCounts = self._readFlags(blocks, *args)
+        
+        # Count of the block plus the flags set before the element within it
+        rows = np.arange(len(indices))
+        flags = blockFlags[rows, offsets]
+        return flags, blockCounts + np.cumsum(blockFlags, axis=1)[rows, offsets] - flags
+    
+    def _rankOne(self, i:int, superCounts:Any, subCounts:Any, buffer:memoryview, maxBitLength:int, initialLength:int) -> tuple[bool, int]:
+        """Protected helper function reading the overflow flag of one element and counting the overflowed integers before it, with plain integer operations.
+
+        The counts of the block tell whether it holds no overflowed integer or only overflowed ones, the flags of the other blocks being read by walking through their codes in the normal area.
+
+        Args:
+            i (int): The position of the element.
+            superCounts (Any): The counts of the superblocks of the rank index (array or list).
+            subCounts (Any): The counts of the blocks of the rank index within their superblock (array or list).
+            buffer (memoryview): The bytes of the normal area.
+            maxBitLength (int): The bit length of the normal area.
+            initialLength (int): The length of the uncompressed array.
+
+        Returns:
+            tuple[bool, int]: The overflow flag of the element and the number of overflowed integers before it.
+        """
+        block, offset = divmod(i, RANK_BLOCK_SIZE)
+        overflowCount = int(superCounts[block // BLOCKS_PER_SUPERBLOCK]) + int(subCounts[block])
+        blockOverflowCount = int(superCounts[(block+1) // BLOCKS_PER_SUPERBLOCK]) + int(subCounts[block+1]) - overflowCount
+        if blockOverflowCount == 0:
+            return False, overflowCount
+        if blockOverflowCount == min(RANK_BLOCK_SIZE, initialLength - block*RANK_BLOCK_SIZE):
+            return True, overflowCount + offset
+        
+        # Read the codes of the block before the element at once, and skip them from the highest bit (an overflowed integer being a single set bit)
+        lookAt = block*RANK_BLOCK_SIZE*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+        width = min(offset*(maxBitLength+2) + 1, 8*len(buffer) - lookAt)
+        codes, bit = readBits(buffer, lookAt, width), width - 1
+        for _ in range(offset):
+            if (codes >> bit) & 1:
+                overflowCount += 1
+                bit -= 1
+            else:
+                bit -= maxBitLength+2
+        return bool((codes >> bit) & 1), overflowCount
+    
+    def _readFlags(self, blocks:np.ndarray[np.int64], *args:tuple[Any]) -> tuple[np.ndarray[bool], np.ndarray[np.int64]]:
+        """Protected helper function reading the overflow flags of whole blocks of RANK_BLOCK_SIZE elements.
+
+        The flags are not stored in the rank index but read from the normal area: a block without overflowed integer or with only overflowed ones is known from its counts, and the codes of the other blocks are walked through from their first element, all the blocks at once.
+
+        Args:
+            blocks (np.ndarray[np.int64]): The blocks to read, each holding at least one element.
+            *args (tuple[Any]): The compressed tuple, the rank index being rebuilt if missing.
+
+        Returns:
+            tuple[np.ndarray[bool], np.ndarray[np.int64]]: A tuple containing in 1st position the flags of each block (one row per block, False past the last element) and in 2nd position the number of overflowed integers before each block.
+        """
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        rankIndex = self._getRankIndex(*args)
+        blocks = np.asarray(blocks, dtype=np.int64)
+        blockCounts = self._countBefore(blocks, rankIndex)
+        blockOverflowCounts = self._countBefore(blocks+1, rankIndex) - blockCounts
+        blockLengths = np.minimum(RANK_BLOCK_SIZE, initialLength - blocks*RANK_BLOCK_SIZE)
+        isInBlock = np.arange(RANK_BLOCK_SIZE) < blockLengths[:, None]
+        
+        # The blocks whose elements all have the same flag need no read
+        flags = (blockOverflowCounts == blockLengths)[:, None] & isInBlock
+        isMixed = (blockOverflowCounts != 0) & (blockOverflowCounts != blockLengths)
+        if not isMixed.any():
+            return flags, blockCounts
+        
+        # Read the flag of each slot of the other blocks, then skip its code (a single bit for an overflowed integer)
+        lookAt = blocks[isMixed]*RANK_BLOCK_SIZE*(maxBitLength+2) - blockCounts[isMixed]*(maxBitLength+1)
+        mixedFlags = np.empty((len(lookAt), RANK_BLOCK_SIZE), dtype=bool)
+        for slot in range(RANK_BLOCK_SIZE):
+            mixedFlags[:, slot] = gatherBits(compressedArr, np.minimum(lookAt, len(compressedArr)-1))
+            lookAt += np.where(mixedFlags[:, slot], 1, maxBitLength+2)
+        flags[isMixed] = mixedFlags & isInBlock[isMixed]
+        return flags, blockCounts
+    
+    def _countBefore(self, blocks:np.ndarray[np.int64], rankIndex:tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]) -> np.ndarray[np.int64]:
+        """Protected helper function counting the overflowed integers before blocks of RANK_BLOCK_SIZE elements, from the rank index.
+
+        Args:
+            blocks (np.ndarray[np.int64]): The blocks, at most the number of blocks of the array.
+            rankIndex (tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]): The rank index.
+
+        Returns:
+            np.ndarray[np.int64]: The number of overflowed integers before each block.
+        """
+        superCounts, subCounts = rankIndex
+        return superCounts[blocks // BLOCKS_PER_SUPERBLOCK].astype(np.int64) + subCounts[blocks]
+    
+    def _buildRankIndex(self, flags:np.ndarray[bool]) -> tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]:
+        """Protected helper function building the rank index from the overflow flags.
+
+        The index stores the number of overflowed integers before each superblock of RANK_SUPERBLOCK_SIZE elements on 64 bits, and before each block of RANK_BLOCK_SIZE elements on 16 bits, counted from the beginning of its superblock.
+        The flags themselves are not stored: the ones of a block are read from the normal area when the counts do not give them.
+
+        Args:
+            flags (np.ndarray[bool]): The overflow flag of each element.
+
+        Returns:
+            tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]: A tuple containing in 1st position the superblock counts and in 2nd position the block counts, both with an entry for the end of the array.
+        """
+        return self._packCounts(self._cumulateFlags(flags))
+    
+    def _cumulateFlags(self, flags:np.ndarray[bool]) -> np.ndarray[np.int64]:
+        """Protected helper function counting the overflowed integers before each block of RANK_BLOCK_SIZE elements.
+
+        Args:
+            flags (np.ndarray[bool]): The overflow flag of each element, the first one beginning a block.
+
+        Returns:
+            np.ndarray[np.int64]: The number of overflowed integers before each block, and before the end of the flags.
+        """
+        counts = np.zeros(-(-len(flags) // RANK_BLOCK_SIZE) + 1, dtype=np.int64)
+        if len(flags) != 0:
+            counts[1:] = np.cumsum(np.add.reduceat(flags.astype(np.int64), np.arange(0, len(flags), RANK_BLOCK_SIZE)))
+        return counts
+    
+    def _packCounts(self, counts:np.ndarray[np.int64]) -> tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]:
+        """Protected helper function splitting block counts into superblock counts and 16-bit counts within the superblocks.
+
+        Args:
+            counts (np.ndarray[np.int64]): The number of overflowed integers before each block, the first one beginning a superblock.
+
+        Returns:
+            tuple[np.ndarray[np.int64], np.ndarray[np.uint16]]: The superblock counts and the block counts within their superblock.
+        """
+        superCounts = counts[::BLOCKS_PER_SUPERBLOCK].copy()
+        return superCounts, (counts - np.repeat(superCounts, BLOCKS_PER_SUPERBLOCK)[:len(counts)]).astype(np.uint16)
+    
+    def _unpackSegments(self, compressedArr:bitarray.bitarray, firstSegment:int, stopSegment:int, segmentBits:int) -> tuple[np.ndarray[np.uint8], np.ndarray[np.int64]]:
+        """Protected helper function unpacking the bits of a range of segments of the normal area, one byte per bit.
+
+        Args:
+            compressedArr (bitarray.bitarray): The normal area.
+            firstSegment (int): The first segment to unpack.
+            stopSegment (int): The segment after the last one to unpack.
+            segmentBits (int): The number of bits of a segment, a multiple of 8.
+
+        Returns:
+            tuple[np.ndarray[np.uint8], np.ndarray[np.int64]]: The bits, padded with zeros past the end of the area, and the segments relative to the first one.
+        """
+        buffer = np.frombuffer(compressedArr, dtype=np.uint8)[firstSegment*segmentBits//8:stopSegment*segmentBits//8]
+        bits = np.zeros((stopSegment - firstSegment)*segmentBits, dtype=np.uint8)
+        bits[:len(buffer)*8] = np.unpackbits(buffer)
+        return bits, np.arange(stopSegment - firstSegment, dtype=np.int64)
+    
+    def _walkNormalCodes(self, bits:np.ndarray[np.uint8], lookAt:np.ndarray[np.int64], ends:np.ndarray[np.int64], codeWidth:int, keepStarts:bool = False) -> tuple[np.ndarray[np.int64], np.ndarray[np.int64]|None]:
+        """Protected helper function walking through the codes of several segments of the normal area at once, up to RANK_BLOCK_SIZE normal codes each.
+
+        A normal code is a 0 followed by codeWidth-1 bits, and an overflowed integer a single 1: from a position, the next normal code starts on the next 0, the ones before it being overflowed integers.
+
+        Args:
+            bits (np.ndarray[np.uint8]): The bits of the segments, one byte per bit.
+            lookAt (np.ndarray[np.int64]): The start of the first code of each walk.
+            ends (np.ndarray[np.int64]): The end of the segment of each walk.
+            codeWidth (int): The width of a normal code.
+            keepStarts (bool, optional): Whether to return the start of the normal codes met. Defaults to False.
+
+        Returns:
+            tuple[np.ndarray[np.int64], np.ndarray[np.int64]|None]: A tuple containing in 1st position the start of the first code after the end of each segment and in 2nd position the starts of the normal codes of each walk (-1 after the last one), or None.
+        """
+        # Position of the first 0 from each bit on
+        nextZeros = np.append(np.where(bits == 0, np.arange(len(bits)), len(bits)), len(bits))
+        nextZeros = np.minimum.accumulate(nextZeros[::-1])[::-1]
+        
+        codeStarts = np.full((len(lookAt), RANK_BLOCK_SIZE), -1, dtype=np.int64) if keepStarts else None
+        for step in range(RANK_BLOCK_SIZE):
+            codeStart = np.minimum(nextZeros[np.minimum(lookAt, len(bits))], ends)
+            isInside = codeStart < ends
+            if keepStarts:
+                codeStarts[isInside, step] = codeStart[isInside]
+            
+            # A run of ones reaching the end of the segment leaves the next segment starting by an overflowed integer
+            lookAt = np.where(isInside, codeStart + codeWidth, np.maximum(lookAt, ends))
+        return lookAt, codeStarts
+    
+    def _scanGet(self, i:int, *args:tuple[Any]) -> int:
+        """Protected helper function finding the i-th number by scanning the overflow flags from the beginning, used when the tuple has no rank index.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        # Retrieve necessary informations
+        compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, *_ = args
+        
+        # Loop until index equal the one we want
+        overflowCount = 0
+        for arrIndex in range(initialLength):
+            
+            # Compute the index we want to look at in the compressed array
+            lookAt = arrIndex*(maxBitLength+2) - overflowCount*(maxBitLength+1)
+            
+            # If the index is the one we want
+            if arrIndex == i:
+                # Check if it is within the overflow area
+                if compressedArr[lookAt] == True:
+                    
+                    # Compute corresponding position within overflow area
+                    overflowStartPos = overflowCount * (maxOverflowBitLength+1)
+                
+                    # Check if the value is negative and get the compressed integer
+                    neg = overflowArr[overflowStartPos]
+                    val = overflowArr[overflowStartPos+1:overflowStartPos+maxOverflowBitLength+1]
+                    
+                    # Transform the compressed integer and decode it
+                    decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
+                    return applySign(int("".join(decompressedVal), base=2), neg)
+                
+                # If the value is not in overflow area, then get directly from the compressed array
+                neg = compressedArr[lookAt+1]
+                val = compressedArr[lookAt+2:lookAt+2+maxBitLength]
+                
+                # and decode it before adding it to the decompressed array
+                decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
+                if decompressedVal == []:
+                    return 0
+                return applySign(int("".join(decompressedVal), base=2), neg)
+            
+            # If it is not the one we want and it is in the overflow area, update the shift
+            if compressedArr[lookAt] == True:
+                overflowCount += 1
+
+
+if __name__ == "__main__":
+    arr = np.array([0])
+    oC = OverflowCompressor(12)
+    
+    val = oC.compress(arr)
+    
+    print(arr[0] == oC.get(0, *val)) 
+    
     print(sum(arr != oC.decompress(*val)))
\ No newline at end of file
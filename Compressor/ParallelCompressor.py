@@ -0,0 +1,310 @@
+from Compressor.AbstractCompressor import Compressor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+import numpy as np
+
+PARALLEL_BLOCK_SIZE = 2**18 #Number of elements per independently compressed block
+
+class ParallelCompressor(Compressor):
+    def __init__(self, compressor:Compressor, workers:int, blockSize:int = PARALLEL_BLOCK_SIZE):
+        super().__init__()
+        self.compressor = compressor
+        self.workers = max(1, workers)
+        self.blockSize = blockSize
+
+    def compress(self, arr:np.ndarray[int]) -> tuple[list[tuple[Any]],int,int]:
+        """The method that splits the array into blocks of blockSize elements and compresses them independently with the wrapped compressor, on a pool of threads.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[list[tuple[Any]],int,int]: A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+        """
+        blocks = self._map(self.compressor.compress, [arr[start:start+self.blockSize] for start in range(0, len(arr), self.blockSize)])
+        return (blocks, self.blockSize, len(arr))
+
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array, each block being decompressed on a pool of threads.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        blocks, blockSize, initialLength, *_ = args
+        if len(blocks) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(self._map(lambda block: self.compressor.decompress(*block), blocks))
+
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, only reading the blocks covering them.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        blocks, blockSize, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+
+        # Decompress the covered part of each block, the positions being shifted by the offset of the block
+        parts = [np.zeros(0, dtype=np.int64)]
+        for block in range(start // blockSize, (stop / blockSize).__ceil__()):
+            offset = block * blockSize
+            parts.append(self.compressor.decompressRange(max(start, offset) - offset, min(stop, offset + blockSize) - offset, *blocks[block]))
+        return np.concatenate(parts)
+
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        blocks, blockSize, *_ = args
+        block, offset = divmod(i, blockSize)
+        return self.compressor.get(offset, *blocks[block])
+
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Return the function reading a single element from the accessor of its block, each one being computed on the first access to the block.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        blocks, blockSize, *_ = args
+        accessors = [None] * len(blocks)
+        
+        def access(i:int) -> int:
+            block, offset = divmod(i, blockSize)
+            if accessors[block] is None:
+                accessors[block] = self.compressor.getAccessor(*blocks[block])
+            return accessors[block](offset)
+        return access
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once, one batch per block.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        blocks, blockSize, initialLength, *_ = args
+        indices = self._checkIndices(indices, initialLength)
+
+        # Forward the positions falling in each block to the wrapped compressor
+        blockIds, offsets = np.divmod(indices, blockSize)
+        values = np.zeros(len(indices), dtype=np.int64)
+        for block in np.unique(blockIds):
+            isInBlock = blockIds == block
+            values[isInBlock] = self.compressor.getMany(offsets[isInBlock], *blocks[block])
+        return values
+
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[list[tuple[Any]],int,int]:
+        """Write a value at the i-th position of the compressed array, only its block being written by the wrapped compressor.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[list[tuple[Any]],int,int]: The compressed blocks holding the value, to be used instead of the given ones.
+        """
+        blocks, blockSize, initialLength, *_ = args
+        block, offset = divmod(int(self._checkIndices([i], initialLength)[0]), blockSize)
+        blocks = list(blocks)
+        blocks[block] = self.compressor.set(offset, value, *blocks[block])
+        return (blocks, blockSize, initialLength)
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[list[tuple[Any]],int,int]:
+        """Append values at the end of the compressed array, filling the last block first and compressing the rest into new blocks.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            tuple[list[tuple[Any]],int,int]: The compressed blocks holding the values, to be used instead of the given ones.
+        """
+        blocks, blockSize, initialLength, *_ = args
+        values = np.asarray(values, dtype=np.int64)
+        blocks = list(blocks)
+        
+        # Append to the last block up to its size, then start new blocks
+        room = (-initialLength) % blockSize
+        if room != 0 and len(values) != 0:
+            blocks[-1] = self.compressor.extend(values[:room], *blocks[-1])
+        blocks += self._map(self.compressor.compress, [values[start:start+blockSize] for start in range(room, len(values), blockSize)])
+        return (blocks, blockSize, initialLength + len(values))
+    
+    def sum(self, *args:tuple[Any]) -> int:
+        """Compute the sum of the compressed array, each block being summed by the wrapped compressor on a pool of threads.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            int: The sum of the elements.
+        """
+        blocks, *_ = args
+        return sum(self._map(lambda block: self.compressor.sum(*block), blocks))
+    
+    def min(self, *args:tuple[Any]) -> int:
+        """Compute the minimum of the compressed array, from the minimum of each block.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The smallest element.
+        """
+        blocks, *_ = args
+        return min(self._map(lambda block: self.compressor.min(*block), blocks))
+    
+    def max(self, *args:tuple[Any]) -> int:
+        """Compute the maximum of the compressed array, from the maximum of each block.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Raises:
+            ValueError: If the array is empty.
+
+        Returns:
+            int: The largest element.
+        """
+        blocks, *_ = args
+        return max(self._map(lambda block: self.compressor.max(*block), blocks))
+    
+    def countWhere(self, op:str, value:int, *args:tuple[Any]) -> int:
+        """Count the elements of the compressed array satisfying a comparison, block by block on a pool of threads.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            int: The number of elements satisfying `element op value`.
+        """
+        blocks, *_ = args
+        self._getComparison(op)
+        return sum(self._map(lambda block: self.compressor.countWhere(op, value, *block), blocks))
+    
+    def where(self, op:str, value:int, *args:tuple[Any]) -> np.ndarray[np.int64]:
+        """Find the positions of the elements of the compressed array satisfying a comparison, block by block on a pool of threads.
+
+        Args:
+            op (str): The comparison ("<", "<=", ">", ">=", "==" or "!=").
+            value (int): The value to compare the elements with.
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[np.int64]: The increasing positions of the elements satisfying `element op value`.
+        """
+        blocks, blockSize, *_ = args
+        self._getComparison(op)
+        
+        # Shift the positions found in each block by the offset of the block
+        positions = self._map(lambda block: self.compressor.where(op, value, *block), blocks)
+        return np.concatenate([np.zeros(0, dtype=np.int64)] + [block*blockSize + blockPositions for block, blockPositions in enumerate(positions)])
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[2]
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed blocks without compressing them.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): Ignored, each block has its own histogram.
+
+        Returns:
+            int: The number of bits of the packed buffers of all blocks.
+        """
+        return sum(self.compressor.estimateSize(arr[start:start+self.blockSize]) for start in range(0, len(arr), self.blockSize))
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed blocks into their integer parameters and their packed buffers, one block after the other.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the compressed blocks, in 2nd the number of elements per block and in 3rd the length of the uncompressed array.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The number of elements per block, the length and the number of blocks followed by the number of parameters, the number of buffers and the parameters of each block, and the buffers of each block.
+        """
+        blocks, blockSize, initialLength, *_ = args
+        params, buffers = [blockSize, initialLength, len(blocks)], []
+        for block in blocks:
+            # The blocks of the auto mode may pick different modes, with different numbers of parameters and buffers
+            blockParams, blockBuffers = self.compressor.toParts(*block)
+            params += [len(blockParams), len(blockBuffers), *blockParams]
+            buffers += blockBuffers
+        return tuple(params), buffers
+
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[list[tuple[Any]],int,int]:
+        """Rebuild the compressed blocks from the output of toParts, without copying the buffers.
+
+        Args:
+            params (tuple[int]): The number of elements per block, the length and the number of blocks followed by the number of parameters, the number of buffers and the parameters of each block.
+            buffers (list[Any]): The buffers of each block.
+
+        Returns:
+            tuple[list[tuple[Any]],int,int]: The compressed blocks, as returned by compress.
+        """
+        blockSize, initialLength, blockCount, *blockParams = params
+        
+        # Slice the parameters and the buffers of each block with its own counts
+        blocks, paramStart, bufferStart = [], 0, 0
+        for _ in range(blockCount):
+            paramCount, bufferCount = blockParams[paramStart:paramStart+2]
+            paramStart += 2
+            blocks.append(self.compressor.fromParts(tuple(blockParams[paramStart:paramStart+paramCount]), buffers[bufferStart:bufferStart+bufferCount]))
+            paramStart += paramCount
+            bufferStart += bufferCount
+        return (blocks, blockSize, initialLength)
+
+    def _map(self, func:Callable, items:Iterable[Any]) -> list[Any]:
+        """Protected helper function applying a function to each item, on a pool of threads when there is more than one worker.
+
+        The packing kernels are NumPy operations releasing the GIL, so the blocks are really processed in parallel.
+
+        Args:
+            func (Callable): The function to apply.
+            items (Iterable[Any]): The items.
+
+        Returns:
+            list[Any]: The results, in the same order as the items.
+        """
+        if self.workers == 1:
+            return list(map(func, items))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(func, items))
\ No newline at end of file
@@ -1,130 +1,273 @@
-from Compressor.AbstractCompressor import Compressor
-from typing import Any
-import numpy as np
-import bitarray
-
-INT_ENCODING_SIZE = 32 #32 bits per integer
-
-class SplitCompressor(Compressor):
-    def __init__(self):
-        super().__init__()
-
-    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,int,int]:
-        """The method that compress int32 integer into smaller integers.
-
-        Args:
-            arr (np.ndarray[int]): The array of integer to compress.
-
-        Returns:
-            tuple[bitarray.bitarray,int,int]: A tuple containing in 1st position the compressed array, in 2nd the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
-        """
-        
-        # Get the necessary bit size of the biggest element in array
-        maxBitLength = self._getMaxBitLength(arr)
-        
-        # Compute the required size for the compressed Array and create the array
-        compressedArrayLength = INT_ENCODING_SIZE * float.__ceil__(len(arr) * (maxBitLength+1) / INT_ENCODING_SIZE)
-        compressedArr = bitarray.bitarray(np.zeros(compressedArrayLength, dtype=bool).tolist())
-
-        # Compress the integer array into the boolean array
-        for arrIndex, elem in enumerate(arr):
-            
-            # Get the bit representation of an integer, ex:  -12 -> '-0001100'
-            bitVal = format(elem, "08b")
-            
-            # Register the polarity of the integer on the first bit. So -5 is encoded as: 1101 where 1 is the sign and 101 the number  
-            if bitVal.startswith("-"):
-                compressedArr[arrIndex*(maxBitLength+1)] = True
-            else:
-                compressedArr[arrIndex*(maxBitLength+1)] = False
-            
-            # Correct the length of bits to maxBitLength
-            correctedBitVal = bitVal[-maxBitLength:].strip("-")
-            correctedBitVal = "0"*(maxBitLength-len(correctedBitVal))+correctedBitVal
-            
-            # For each bit, register it at the right place of the array.
-            for bitIndex, bitElem in enumerate(correctedBitVal[-maxBitLength:]):
-                compressedArr[arrIndex*(maxBitLength+1)+bitIndex+1] = True if bitElem == "1" else False
-
-        return (compressedArr, maxBitLength, len(arr))
-    
-    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
-        """The method to decompress the array compressed using this class.
-
-        Args:
-            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and the third of the uncompressed array.
-            
-        Returns:
-            np.ndarray[int]: The decompressed integer array.
-        """
-        
-        # Retrieve the variables and initialise the function variables
-        compressedArr, maxBitLength, initialLength, *_ = args
-        decompressedArr = []
-        arrIndex = 0
-        
-        # Loop through the compressed array
-        while True:
-            
-            # get the windows index to look at
-            startPos = arrIndex*(maxBitLength+1)
-            endPos = (arrIndex+1)*(maxBitLength+1)
-            
-            # Quit if out of bound or all number are uncompressed
-            if endPos > len(compressedArr) or len(decompressedArr) >= initialLength:
-                break
-            
-            # Take values
-            val = compressedArr[startPos:endPos]
-            
-            # Otherwise, decode the element
-            decompressedVal = ["0" if i == False else "1" for i in val.tolist()]
-            if val[0] == True:
-                decompressedVal[0] = "-"
-            
-            # Update the decompressed array and continue
-            decompressedArr.append(int("".join(decompressedVal), base = 2)  if decompressedVal != [] else 0)
-            arrIndex += 1
-
-        return np.array(decompressedArr)
-        
-    def get(self, i:int, *args:tuple[Any]) -> int:
-        """Get the value at the i-th position of the compressed array.
-
-        Args:
-            i (int): The position to look at.
-            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
-
-
-        Returns:
-            int: The value of the i-th position.
-        """
-        # Retrieve the variables and compute the cell to look at
-        compressedArr, maxBitLength, *_ = args
-        lookAt = (maxBitLength+1)*i
-        
-        # Retrieve the necessary cells
-        if lookAt + maxBitLength >= len(compressedArr)-1:
-            num = compressedArr[lookAt:]
-        else:
-            num = compressedArr[lookAt:lookAt+maxBitLength+1]
-        
-        # Convert the number into base 10
-        representation = "".join(["0" if i == False else "1" for i in num])
-        sign = representation[0]
-        val = int(representation[1:], base=2) if representation[1:] != "" else 0
-        
-        # Return the value and the sign
-        if sign == "1":
-            return -val
-        return val
-
-
-if __name__ == "__main__":
-    arr = np.array([0])
-    sC = SplitCompressor()
-    
-    val = sC.compress(arr)
-    
-    print(sC.get(0, *val), arr[0])
+from Compressor.AbstractCompressor import Compressor
+from typing import Any, Callable
+import numpy as np
+import bitarray
+
+from Compressor.BitUtils import splitSigns, packCodes, extractCodes, unpackFixed, decodeSignMagnitude, applySign, readBits, getMagnitudeBounds, writeBits, bitArrayFromBuffer, getBitLengthHistogram
+
+INT_ENCODING_SIZE = 32 #Default number of bits per word
+
+class SplitCompressor(Compressor):
+    def __init__(self, wordSize:int = INT_ENCODING_SIZE):
+        super().__init__()
+        self.wordSize = self._checkWordSize(wordSize)
+
+    def compress(self, arr:np.ndarray[int]) -> tuple[bitarray.bitarray,int,int]:
+        """The method that compress int32 or int64 integer into smaller integers.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[bitarray.bitarray,int,int]: A tuple containing in 1st position the compressed array, in 2nd the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+        """
+        
+        # Get the necessary bit size of the biggest element in array
+        return self._pack(arr, self._getMaxBitLength(arr))
+    
+    def _pack(self, arr:np.ndarray[int], maxBitLength:int) -> tuple[bitarray.bitarray,int,int]:
+        """Protected helper function compressing an array on a given bit length, used by compress and when a written value does not fit.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+            maxBitLength (int): The bit length of the magnitudes, at least the one of the biggest element.
+
+        Returns:
+            tuple[bitarray.bitarray,int,int]: The compressed array, as returned by compress.
+        """
+        # Compute the required size for the compressed Array
+        compressedArrayLength = self.wordSize * float.__ceil__(len(arr) * (maxBitLength+1) / self.wordSize)
+
+        # Register the polarity of the integer on the first bit. So -5 is encoded as: 1101 where 1 is the sign and 101 the number
+        # The magnitude of the smallest int64 (2**63) only sets the sign bit, giving a negative zero
+        signs, magnitudes = splitSigns(arr)
+        codes = (signs.astype(np.uint64) << np.uint64(maxBitLength)) | magnitudes
+        
+        # Write all the codes one after the other into the bit array
+        positions = np.arange(len(arr), dtype=np.int64) * (maxBitLength+1)
+        compressedArr = packCodes(codes, positions, maxBitLength+1, compressedArrayLength)
+
+        return (compressedArr, maxBitLength, len(arr))
+    
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array compressed using this class.
+
+        Args:
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and the third of the uncompressed array.
+            
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        
+        # Retrieve the variables and decompress the whole array
+        compressedArr, maxBitLength, initialLength, *_ = args
+        return self.decompressRange(0, initialLength, *args)
+        
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        # Retrieve the variables and read the code of the element (the sign being the bit just above the magnitude)
+        compressedArr, maxBitLength, *_ = args
+        code = readBits(memoryview(compressedArr), (maxBitLength+1)*i, maxBitLength+1)
+        return applySign(code & ((1 << maxBitLength) - 1), code >> maxBitLength)
+
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Compute the code width and the view of the bytes of the compressed array once, each element being then read with a few integer operations.
+
+        Args:
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        compressedArr, maxBitLength, *_ = args
+        buffer, width, magnitudeMask = memoryview(compressedArr), maxBitLength+1, (1 << maxBitLength) - 1
+        
+        # The sign is the bit just above the magnitude
+        def access(i:int) -> int:
+            code = readBits(buffer, i*width, width)
+            return applySign(code & magnitudeMask, code >> maxBitLength)
+        return access
+    
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, only reading the words covering them.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        # Retrieve the variables
+        compressedArr, maxBitLength, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        
+        # Read every sign and magnitude of the window at once, the codes having the same width
+        codes = unpackFixed(compressedArr, maxBitLength+1, start, stop)
+        
+        # Decode the elements
+        return decodeSignMagnitude(codes, maxBitLength)
+    
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        # Retrieve the variables and compute the cells to look at
+        compressedArr, maxBitLength, initialLength, *_ = args
+        lookAt = (maxBitLength+1) * self._checkIndices(indices, initialLength)
+        
+        # Gather the signs and magnitudes and decode them
+        return decodeSignMagnitude(extractCodes(compressedArr, lookAt, maxBitLength+1), maxBitLength)
+    
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[bitarray.bitarray,int,int]:
+        """Write a value at the i-th position of the compressed array, in place if it fits the bit length.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[bitarray.bitarray,int,int]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        compressedArr, maxBitLength, initialLength, *_ = args
+        i = int(self._checkIndices([i], initialLength)[0])
+        return self._write(i, np.array([value], dtype=np.int64), *args)
+    
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[bitarray.bitarray,int,int]:
+        """Append values at the end of the compressed array, in the spare bits after the last code if they fit the bit length.
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Returns:
+            tuple[bitarray.bitarray,int,int]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        compressedArr, maxBitLength, initialLength, *_ = args
+        return self._write(initialLength, np.asarray(values, dtype=np.int64), *args)
+    
+    def _write(self, start:int, values:np.ndarray[np.int64], *args:tuple[Any]) -> tuple[bitarray.bitarray,int,int]:
+        """Protected helper function writing values one after the other from a position, the array being lengthened if they go past its end.
+
+        The codes are written in place when the values fit the bit length, otherwise the whole array is re-packed on a wider bit length.
+
+        Args:
+            start (int): The position of the first value, at most the length of the array.
+            values (np.ndarray[np.int64]): The values to write.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[bitarray.bitarray,int,int]: The compressed tuple holding the values.
+        """
+        compressedArr, maxBitLength, initialLength, *_ = args
+        stop = max(initialLength, start + len(values))
+        if len(values) == 0:
+            return args
+        
+        # Re-pack the whole array when a value does not fit
+        bitLength = self._getMaxBitLength(values)
+        if bitLength > maxBitLength:
+            arr = np.zeros(stop, dtype=np.int64)
+            arr[:initialLength] = self.decompress(*args)
+            arr[start:start+len(values)] = values
+            return self._pack(arr, self._growBitLength(maxBitLength, bitLength))
+        
+        # Otherwise, overwrite the codes of the values (the spare bits after the last code receiving the new ones)
+        signs, magnitudes = splitSigns(values)
+        codes = (signs.astype(np.uint64) << np.uint64(maxBitLength)) | magnitudes
+        bits = packCodes(codes, np.arange(len(values), dtype=np.int64) * (maxBitLength+1), maxBitLength+1, len(values) * (maxBitLength+1))
+        return (writeBits(compressedArr, bits, start * (maxBitLength+1)), maxBitLength, stop)
+    
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[2]
+    
+    def _getBounds(self, *args:tuple[Any]) -> tuple[int, int]:
+        """Protected helper function giving the bounds of the elements from the bit length.
+
+        Args:
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            tuple[int, int]: The lower and the upper bound of the elements, their magnitude being below 2**bitLength.
+        """
+        compressedArr, maxBitLength, *_ = args
+        return getMagnitudeBounds(maxBitLength)
+    
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): The bit length histogram of the array, computed if not given.
+
+        Returns:
+            int: The number of bits of the compressed array.
+        """
+        histogram = getBitLengthHistogram(arr) if histogram is None else histogram
+        maxBitLength = int(np.flatnonzero(histogram).max(initial=0))
+        return self.wordSize * float.__ceil__(int(histogram.sum()) * (maxBitLength+1) / self.wordSize)
+    
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        Args:
+            *args (tuple[Any]): 1st index is the array, the second is the necessary bit length of the biggest element of the uncompressed array and in 3rd the length of the uncompressed array.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The bit length and the length, and the compressed array.
+        """
+        compressedArr, maxBitLength, initialLength, *_ = args
+        
+        # Only the words holding codes are kept, the spare bits left for appends are not sent
+        usedBytes = self.wordSize//8 * float.__ceil__(initialLength * (maxBitLength+1) / self.wordSize)
+        return (maxBitLength, initialLength), [memoryview(compressedArr)[:usedBytes]]
+    
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[bitarray.bitarray,int,int]:
+        """Rebuild the compressed array from the output of toParts, without copying the buffers.
+
+        Args:
+            params (tuple[int]): The bit length and the length.
+            buffers (list[Any]): The compressed array.
+
+        Returns:
+            tuple[bitarray.bitarray,int,int]: The compressed array, as returned by compress.
+        """
+        maxBitLength, initialLength = params
+        return (bitArrayFromBuffer(buffers[0]), maxBitLength, initialLength)
+
+if __name__ == "__main__":
+    arr = np.array([0])
+    sC = SplitCompressor()
+    
+    val = sC.compress(arr)
+    
+    print(sC.get(0, *val), arr[0])
     print(sum(arr != sC.decompress(*val)))
\ No newline at end of file
@@ -0,0 +1,404 @@
+from Compressor.AbstractCompressor import Compressor
+from typing import Any, Callable
+import numpy as np
+
+from Compressor.BitUtils import getBitLengths, lowMask, growArray
+
+VARINT_BLOCK_SIZE = 128 #Number of elements per block starting with a checkpoint (a multiple of 4, the elements of a control byte)
+VARINT_LENGTHS = ((1, 2, 3, 4), (1, 2, 4, 8)) #Byte lengths of the 4 selectors of a control byte, for codes of at most 32 bits and for wider codes
+
+
+def _buildControlTables(lengths:tuple[int]) -> tuple[np.ndarray[np.int64], np.ndarray[np.int64], np.ndarray[np.int64], np.ndarray[np.uint64]]:
+    """Compute the lookup tables of the 256 control bytes, the selector of the k-th element of a group being on the bits 2k and 2k+1.
+
+    Args:
+        lengths (tuple[int]): The byte length of each selector.
+
+    Returns:
+        tuple[np.ndarray[np.int64], np.ndarray[np.int64], np.ndarray[np.int64], np.ndarray[np.uint64]]: A tuple containing in 1st position the byte length of the 4 elements of each control byte, in 2nd their byte offset within the group, in 3rd the byte length of the whole group and in 4th the masks keeping their bytes in a word (of 32 bits when the lengths fit in it).
+    """
+    selectors = (np.arange(256)[:, None] >> np.arange(0, 8, 2)) & 3
+    valueLengths = np.asarray(lengths, dtype=np.int64)[selectors]
+    valueMasks = lowMask(8*valueLengths).astype(np.uint32 if max(lengths) <= 4 else np.uint64)
+    return valueLengths, (np.cumsum(valueLengths, axis=1) - valueLengths).astype(np.int32), valueLengths.sum(axis=1).astype(np.int32), valueMasks
+
+CONTROL_TABLES = tuple(_buildControlTables(lengths) for lengths in VARINT_LENGTHS)
+
+class VarintCompressor(Compressor):
+    def __init__(self, blockSize:int = VARINT_BLOCK_SIZE):
+        super().__init__()
+        if blockSize <= 0 or blockSize % 4 != 0:
+            raise ValueError(f"unsupported block size {blockSize!r}, expected a positive multiple of 4")
+        self.blockSize = blockSize
+
+    def compress(self, arr:np.ndarray[int]) -> tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]:
+        """The method that stores the zigzag encoded integers (0, -1, 1, -2, ... become 0, 1, 2, 3, ...) on whole bytes, a separate control byte giving the byte length of each group of 4 integers.
+
+        Every code being byte aligned, decoding is a gather of whole words driven by lookup tables on the control bytes, without bit offsets.
+        The codes take 1 to 4 bytes, or 1, 2, 4 or 8 bytes when one of them needs more than 32 bits.
+
+        Args:
+            arr (np.ndarray[int]): The array of integer to compress.
+
+        Returns:
+            tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]: A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block in the data bytes, in 4th 1 if the codes use the wide byte lengths (0 otherwise), in 5th the number of elements per block and in 6th the length of the uncompressed array.
+        """
+        codes = self._zigzag(np.asarray(arr).astype(np.int64, copy=False))
+        isWide = int(len(codes) != 0 and int(codes.max()) >> 32 != 0)
+        controlArr, dataArr = self._encode(codes, isWide)
+        return controlArr, dataArr, self._getBlockOffsets(controlArr, 0, isWide, self.blockSize), isWide, self.blockSize, len(codes)
+
+    def decompress(self, *args:tuple[Any]) -> np.ndarray[int]:
+        """The method to decompress the array compressed using this class, chunk by chunk so that the gathers stay small.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integer array.
+        """
+        arr = np.empty(self.getLength(*args), dtype=np.int64)
+        self.decompressInto(arr, 0, *args)
+        return arr
+
+    def get(self, i:int, *args:tuple[Any]) -> int:
+        """Get the value at the i-th position of the compressed array, the checkpoint of its block giving where to start summing the group lengths.
+
+        Args:
+            i (int): The position to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            int: The value of the i-th position.
+        """
+        controlArr, dataArr, blockOffsets, isWide, *_ = args
+        valueLengths, valueOffsets, groupLengths, valueMasks = CONTROL_TABLES[isWide]
+        group, slot = divmod(i, 4)
+        control = controlArr[group]
+
+        # Read the little-endian code and decode it: (c >> 1) ^ -(c & 1)
+        position = self._getGroupOffset(group, *args) + int(valueOffsets[control, slot])
+        code = int.from_bytes(dataArr[position:position + int(valueLengths[control, slot])].tobytes(), "little")
+        return (code >> 1) ^ -(code & 1)
+
+    def getAccessor(self, *args:tuple[Any]) -> Callable[[int], int]:
+        """Convert the checkpoints and the lookup tables to Python integers and compute the views of the control bytes and of the data bytes once, each element being then read with a few integer operations.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            Callable[[int], int]: The function giving the element at a position, already checked and non negative.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, *_ = args
+        valueLengths, valueOffsets, groupLengths, valueMasks = (table.tolist() for table in CONTROL_TABLES[isWide])
+        controls, buffer, blockOffsets, groupsPerBlock = memoryview(controlArr), memoryview(dataArr), blockOffsets.tolist(), blockSize // 4
+
+        # The groups before the one of the element are summed from the checkpoint of its block
+        def access(i:int) -> int:
+            group, slot = divmod(i, 4)
+            block = group // groupsPerBlock
+            control = controls[group]
+            position = blockOffsets[block] + sum(map(groupLengths.__getitem__, controls[block*groupsPerBlock:group])) + valueOffsets[control][slot]
+            code = int.from_bytes(buffer[position:position + valueLengths[control][slot]], "little")
+            return (code >> 1) ^ -(code & 1)
+        return access
+
+    def decompressRange(self, start:int, stop:int, *args:tuple[Any]) -> np.ndarray[int]:
+        """Decompress the elements between start and stop, the position of every code being computed from the lookup tables of the control bytes covering them.
+
+        Args:
+            start (int): The first position to decompress.
+            stop (int): The position after the last one to decompress.
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The decompressed integers.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength, *_ = args
+        start, stop = self._checkRange(start, stop, initialLength)
+        if start == stop:
+            return np.zeros(0, dtype=np.int64)
+        valueLengths, valueOffsets, groupLengths, valueMasks = CONTROL_TABLES[isWide]
+
+        # The groups of the window start one after the other from the first one, their positions being relative to it (on 32 bits unless the window is larger than 2 GiB)
+        firstGroup = start // 4
+        controls = controlArr[firstGroup:-(-stop // 4)]
+        positionType = np.int32 if 32*len(controls) < 2**31 else np.int64
+        controlLengths = groupLengths[controls]
+        groupStarts = np.cumsum(controlLengths, dtype=positionType)
+        groupStarts -= controlLengths
+
+        # Position and mask of every code of the groups, cut to the window
+        window = slice(start - 4*firstGroup, stop - 4*firstGroup)
+        positions = np.take(valueOffsets, controls, axis=0).astype(positionType, copy=False)
+        positions += groupStarts[:, None]
+        dataStart = self._getGroupOffset(firstGroup, *args)
+        return self._decode(dataArr[dataStart:], positions.reshape(-1)[window], np.take(valueMasks, controls, axis=0).reshape(-1)[window])
+
+    def getMany(self, indices:np.ndarray[int], *args:tuple[Any]) -> np.ndarray[int]:
+        """Get the values at several positions of the compressed array at once, the group lengths of each block holding one of them being summed once.
+
+        Args:
+            indices (np.ndarray[int]): The positions to look at.
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            np.ndarray[int]: The values at each position.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength, *_ = args
+        valueLengths, valueOffsets, groupLengths, valueMasks = CONTROL_TABLES[isWide]
+        groups, slots = np.divmod(self._checkIndices(indices, initialLength), 4)
+        groupsPerBlock = blockSize // 4
+
+        # Byte position of every group of the requested blocks, from their checkpoints (the groups after the end only add to positions never read)
+        blocks, blockRanks = np.unique(groups // groupsPerBlock, return_inverse=True)
+        blockGroups = np.minimum(blocks[:, None]*groupsPerBlock + np.arange(groupsPerBlock), max(len(controlArr) - 1, 0))
+        blockGroupLengths = groupLengths[controlArr[blockGroups]] if len(blocks) != 0 else np.zeros((0, groupsPerBlock), dtype=np.int64)
+        groupStarts = blockOffsets[blocks][:, None] + np.cumsum(blockGroupLengths, axis=1) - blockGroupLengths
+
+        # Position and mask of the requested codes
+        controls = controlArr[groups]
+        positions = groupStarts[blockRanks.reshape(-1), groups % groupsPerBlock] + valueOffsets[controls, slots]
+        return self._decode(dataArr, positions, valueMasks[controls, slots])
+
+    def set(self, i:int, value:int, *args:tuple[Any]) -> tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]:
+        """Write a value at the i-th position of the compressed array, in place if its code has the byte length of the previous one.
+
+        Args:
+            i (int): The position to write, negative positions counting from the end.
+            value (int): The value to write.
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Raises:
+            IndexError: If the position is out of the array.
+
+        Returns:
+            tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]: The compressed tuple holding the value, to be used instead of the given one.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength, *_ = args
+        i = int(self._checkIndices([i], initialLength)[0])
+        valueLengths, valueOffsets, groupLengths, valueMasks = CONTROL_TABLES[isWide]
+        group, slot = divmod(i, 4)
+        control = controlArr[group]
+
+        # Any other byte length moves the following codes, the whole array is compressed again
+        code = self._zigzag(np.array([value], dtype=np.int64))
+        if int(self._getSelectors(code, isWide)[0]) != (int(control) >> 2*slot) & 3:
+            return super().set(i, value, *args)
+
+        # Otherwise, overwrite the bytes of the code (the data bytes being copied first if they are read-only)
+        if not dataArr.flags.writeable:
+            dataArr = dataArr.copy()
+        length = int(valueLengths[control, slot])
+        position = self._getGroupOffset(group, *args) + int(valueOffsets[control, slot])
+        dataArr[position:position+length] = code.astype("<u8").view(np.uint8)[:length]
+        return controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength
+
+    def extend(self, values:np.ndarray[int], *args:tuple[Any]) -> tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]:
+        """Append values at the end of the compressed array, only the last group being encoded again, and the buffers keeping spare room so that appends stay amortized O(1).
+
+        Args:
+            values (np.ndarray[int]): The values to append.
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]: The compressed tuple holding the values, to be used instead of the given one.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength, *_ = args
+        codes = self._zigzag(np.asarray(values, dtype=np.int64))
+        if len(codes) == 0:
+            return args
+
+        # Codes wider than 32 bits need the wide byte lengths, the whole array is compressed again
+        if not isWide and int(codes.max()) >> 32 != 0:
+            return super().extend(values, *args)
+
+        # Encode the values of the last incomplete group again with the new ones, from where this group starts
+        fullGroups = initialLength // 4
+        dataStart = self._getGroupOffset(fullGroups, *args)
+        tailCodes = self._zigzag(self.decompressRange(4*fullGroups, initialLength, *args))
+        newControls, newData = self._encode(np.r_[tailCodes, codes], isWide)
+        controlArr = growArray(controlArr, fullGroups + len(newControls))
+        controlArr[fullGroups:] = newControls
+        dataArr = growArray(dataArr, dataStart + len(newData))
+        dataArr[dataStart:] = newData
+
+        # The checkpoints of the blocks from the one of the first rewritten group are computed again
+        keptBlocks = fullGroups // (blockSize // 4)
+        newOffsets = self._getBlockOffsets(controlArr[keptBlocks*(blockSize // 4):], int(blockOffsets[keptBlocks]) if keptBlocks < len(blockOffsets) else dataStart, isWide, blockSize)
+        blockOffsets = growArray(blockOffsets, keptBlocks + len(newOffsets))
+        blockOffsets[keptBlocks:] = newOffsets
+        return controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength + len(codes)
+
+    def getLength(self, *args:tuple[Any]) -> int:
+        """Get the length of the uncompressed array.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            int: The length of the uncompressed array.
+        """
+        return args[5]
+
+    def estimateSize(self, arr:np.ndarray[int], histogram:np.ndarray[int]|None = None) -> int:
+        """Compute the size of the compressed array without compressing it.
+
+        Args:
+            arr (np.ndarray[int]): The integer array.
+            histogram (np.ndarray[int] | None, optional): Ignored, the byte lengths depend on the zigzag codes.
+
+        Returns:
+            int: The number of bits of the control bytes and of the data bytes.
+        """
+        codes = self._zigzag(np.asarray(arr).astype(np.int64, copy=False))
+        isWide = int(len(codes) != 0 and int(codes.max()) >> 32 != 0)
+        dataBytes = int(np.asarray(VARINT_LENGTHS[isWide], dtype=np.int64)[self._getSelectors(codes, isWide)].sum())
+        return 8 * (-(-len(codes) // 4) + dataBytes)
+
+    def toParts(self, *args:tuple[Any]) -> tuple[tuple[int], list[Any]]:
+        """Split the compressed array into its integer parameters and its packed buffers.
+
+        The checkpoints are not sent, the receiver rebuilds them from the control bytes.
+
+        Args:
+            *args (tuple[Any]): A tuple containing in 1st position the control bytes, in 2nd the data bytes, in 3rd the byte position of each block, in 4th the wide flag, in 5th the number of elements per block and in 6th the length of the uncompressed array.
+
+        Returns:
+            tuple[tuple[int], list[Any]]: The wide flag, the number of elements per block and the length, and the control bytes and the data bytes.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, initialLength, *_ = args
+        return (isWide, blockSize, initialLength), [controlArr, dataArr]
+
+    def fromParts(self, params:tuple[int], buffers:list[Any]) -> tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]:
+        """Rebuild the compressed array from the output of toParts, without copying the buffers.
+
+        Args:
+            params (tuple[int]): The wide flag, the number of elements per block and the length.
+            buffers (list[Any]): The control bytes and the data bytes.
+
+        Returns:
+            tuple[np.ndarray[np.uint8],np.ndarray[np.uint8],np.ndarray[np.int64],int,int,int]: The compressed array, as returned by compress.
+        """
+        isWide, blockSize, initialLength = params
+        controlArr, dataArr = np.frombuffer(buffers[0], dtype=np.uint8), np.frombuffer(buffers[1], dtype=np.uint8)
+        return controlArr, dataArr, self._getBlockOffsets(controlArr, 0, isWide, blockSize), isWide, blockSize, initialLength
+
+    def _encode(self, codes:np.ndarray[np.uint64], isWide:int) -> tuple[np.ndarray[np.uint8], np.ndarray[np.uint8]]:
+        """Protected helper function writing the control bytes and the data bytes of zigzag codes.
+
+        Args:
+            codes (np.ndarray[np.uint64]): The zigzag codes.
+            isWide (int): 1 to use the wide byte lengths.
+
+        Returns:
+            tuple[np.ndarray[np.uint8], np.ndarray[np.uint8]]: The control bytes (the last group being padded with 1-byte selectors never read) and the data bytes.
+        """
+        selectors = self._getSelectors(codes, isWide)
+
+        # 4 selectors per control byte, the first element on the lowest bits
+        paddedSelectors = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+        paddedSelectors[:len(codes)] = selectors
+        controlArr = np.bitwise_or.reduce(paddedSelectors.reshape(-1, 4) << np.arange(0, 8, 2, dtype=np.uint8), axis=1).astype(np.uint8)
+
+        # Keep the lowest bytes of each little-endian code
+        lengths = np.asarray(VARINT_LENGTHS[isWide], dtype=np.int64)[selectors]
+        dataArr = codes.astype("<u8").view(np.uint8).reshape(-1, 8)[np.arange(8) < lengths[:, None]]
+        return controlArr, dataArr
+
+    def _decode(self, dataArr:np.ndarray[np.uint8], positions:np.ndarray[np.int64], masks:np.ndarray[np.uint32]|np.ndarray[np.uint64]) -> np.ndarray[np.int64]:
+        """Protected helper function reading codes of the data bytes at once and decoding them.
+
+        The data bytes are viewed as overlapping unaligned words, one starting on each byte, so that every code is read by a single gather of its word and masked to its length.
+
+        Args:
+            dataArr (np.ndarray[np.uint8]): The data bytes.
+            positions (np.ndarray[np.int64]): The byte position of each code.
+            masks (np.ndarray[np.uint32] | np.ndarray[np.uint64]): The mask keeping the bytes of each code, its type giving the size of the words.
+
+        Returns:
+            np.ndarray[np.int64]: The decoded integers.
+        """
+        wordType = masks.dtype.newbyteorder("<")
+        wordBytes = wordType.itemsize
+        wordCount = max(len(dataArr) - wordBytes + 1, 0)
+        isInside = None if len(positions) == 0 or positions.max() < wordCount else positions < wordCount
+
+        # The words fully inside the data bytes are gathered from the overlapping view
+        overlapping = np.ndarray((wordCount,), dtype=wordType, buffer=dataArr, strides=(1,))
+        if isInside is None:
+            words = np.take(overlapping, positions).astype(masks.dtype, copy=False)
+        else:
+            words = np.zeros(len(positions), dtype=masks.dtype)
+            words[isInside] = overlapping[positions[isInside]]
+
+        # The words of the last codes are read from a copy of the end of the data bytes padded with zeros
+        if isInside is not None:
+            tailStart = max(len(dataArr) - wordBytes, 0)
+            tail = np.zeros(2*wordBytes, dtype=np.uint8)
+            tail[:len(dataArr) - tailStart] = dataArr[tailStart:]
+            words[~isInside] = np.ndarray((wordBytes+1,), dtype=wordType, buffer=tail, strides=(1,))[positions[~isInside] - tailStart]
+
+        # Keep the bytes of each code and decode it in place: (c >> 1) ^ -(c & 1)
+        words &= masks
+        signs = words & masks.dtype.type(1)
+        np.subtract(masks.dtype.type(0), signs, out=signs)
+        words >>= masks.dtype.type(1)
+        words ^= signs
+        return words.view(f"i{wordBytes}").astype(np.int64, copy=False)
+
+    def _getSelectors(self, codes:np.ndarray[np.uint64], isWide:int) -> np.ndarray[np.uint8]:
+        """Protected helper function finding the selector of the smallest byte length holding each code.
+
+        Args:
+            codes (np.ndarray[np.uint64]): The zigzag codes.
+            isWide (int): 1 to use the wide byte lengths.
+
+        Returns:
+            np.ndarray[np.uint8]: The selector of each code.
+        """
+        byteCounts = np.maximum((getBitLengths(codes) + 7) // 8, 1)
+        return np.searchsorted(np.asarray(VARINT_LENGTHS[isWide]), byteCounts).astype(np.uint8)
+
+    def _getBlockOffsets(self, controlArr:np.ndarray[np.uint8], firstOffset:int, isWide:int, blockSize:int) -> np.ndarray[np.int64]:
+        """Protected helper function computing the checkpoints, the byte position of every block, from the group lengths.
+
+        Args:
+            controlArr (np.ndarray[np.uint8]): The control bytes, from the start of a block.
+            firstOffset (int): The byte position of the first group.
+            isWide (int): 1 if the codes use the wide byte lengths.
+            blockSize (int): The number of elements per block.
+
+        Returns:
+            np.ndarray[np.int64]: The byte position of each block.
+        """
+        groupLengths = CONTROL_TABLES[isWide][2][controlArr]
+        return (firstOffset + np.cumsum(groupLengths, dtype=np.int64) - groupLengths)[::blockSize // 4]
+
+    def _getGroupOffset(self, group:int, *args:tuple[Any]) -> int:
+        """Protected helper function finding the byte position of a group, summing the group lengths from the checkpoint of its block.
+
+        Args:
+            group (int): The index of the group, at most the number of groups.
+            *args (tuple[Any]): The compressed tuple.
+
+        Returns:
+            int: The byte position of the first code of the group.
+        """
+        controlArr, dataArr, blockOffsets, isWide, blockSize, *_ = args
+        if group >= len(controlArr):
+            return len(dataArr)
+        block = group // (blockSize // 4)
+        return int(blockOffsets[block]) + int(CONTROL_TABLES[isWide][2][controlArr[block*(blockSize // 4):group]].sum())
+
+    def _zigzag(self, values:np.ndarray[np.int64]) -> np.ndarray[np.uint64]:
+        """Protected helper function zigzag encoding integers: (v << 1) ^ (v >> 63).
+
+        Args:
+            values (np.ndarray[np.int64]): The integers.
+
+        Returns:
+            np.ndarray[np.uint64]: The zigzag codes, small for integers close to 0.
+        """
+        return (values << np.int64(1)).view(np.uint64) ^ (values >> np.int64(63)).view(np.uint64)
\ No newline at end of file
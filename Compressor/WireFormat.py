@@ -0,0 +1,112 @@
+import struct
+from typing import Any, BinaryIO
+
+MAGIC = b"BPAK"
+VERSION = 2 #Bumped whenever the parameters or the buffers of a mode change, such as the mode indices of the auto mode
+
+# Fixed little-endian header: magic, version, mode name, number of integer parameters, number of buffers and flags
+HEADER = struct.Struct("<4sB8sBBBx")
+BLOCKED = 1 #Flag set when the frame holds independently compressed blocks
+BATCHED = 2 #Flag set when the last buffer of the frame is the offset table of a batch of arrays
+ALIGNMENT = 8 #Each buffer starts on a multiple of 8 bytes so that it can be viewed as words
+
+
+def _align(size:int) -> int:
+    """Round a size up to the buffer alignment.
+
+    Args:
+        size (int): The size in bytes.
+
+    Returns:
+        int: The aligned size.
+    """
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def _frameParts(mode:str, params:tuple[int], buffers:list[Any], flags:int = 0) -> list[Any]:
+    """Build the successive parts of a frame: the header, the integer parameters (int64), the byte size of each buffer (uint64) and then the raw buffers, each one aligned on 8 bytes.
+
+    Args:
+        mode (str): The compression mode, at most 8 ASCII characters.
+        params (tuple[int]): The integer parameters of the compressed array (bit lengths, lengths, ...).
+        buffers (list[Any]): The packed buffers (any object exposing a buffer, such as a bitarray or a NumPy array).
+        flags (int, optional): The frame flags (BLOCKED, BATCHED). Defaults to 0.
+
+    Returns:
+        list[Any]: The parts of the frame, to be written one after the other.
+    """
+    views = [memoryview(buffer).cast("B") for buffer in buffers]
+    header = HEADER.pack(MAGIC, VERSION, mode.encode("ascii"), len(params), len(views), flags)
+    header += struct.pack(f"<{len(params)}q{len(views)}Q", *params, *(len(view) for view in views))
+
+    # Pad the header and each buffer so that the next one stays aligned
+    parts = [header, bytes(_align(len(header)) - len(header))]
+    for view in views:
+        parts += [view, bytes(_align(len(view)) - len(view))]
+    return parts
+
+
+def dumps(mode:str, params:tuple[int], buffers:list[Any], flags:int = 0) -> bytes:
+    """Serialise a compressed array into a single frame.
+
+    Args:
+        mode (str): The compression mode, at most 8 ASCII characters.
+        params (tuple[int]): The integer parameters of the compressed array (bit lengths, lengths, ...).
+        buffers (list[Any]): The packed buffers (any object exposing a buffer, such as a bitarray or a NumPy array).
+        flags (int, optional): The frame flags (BLOCKED, BATCHED). Defaults to 0.
+
+    Returns:
+        bytes: The frame.
+    """
+    # Copy everything once
+    return b"".join(_frameParts(mode, params, buffers, flags))
+
+
+def dump(file:BinaryIO, mode:str, params:tuple[int], buffers:list[Any], flags:int = 0) -> None:
+    """Write a compressed array as a frame into a binary file, buffer by buffer.
+
+    Args:
+        file (BinaryIO): The file opened in binary write mode.
+        mode (str): The compression mode, at most 8 ASCII characters.
+        params (tuple[int]): The integer parameters of the compressed array (bit lengths, lengths, ...).
+        buffers (list[Any]): The packed buffers (any object exposing a buffer, such as a bitarray or a NumPy array).
+        flags (int, optional): The frame flags (BLOCKED, BATCHED). Defaults to 0.
+    """
+    for part in _frameParts(mode, params, buffers, flags):
+        file.write(part)
+
+
+def loads(buffer:Any) -> tuple[str, tuple[int], list[memoryview], int]:
+    """Read a frame written by dumps without copying its buffers.
+
+    Args:
+        buffer (Any): The frame (bytes, bytearray, memoryview, mmap, ...).
+
+    Raises:
+        ValueError: If the frame is not a frame of a supported version, or if it is shorter than its header and buffers.
+
+    Returns:
+        tuple[str, tuple[int], list[memoryview], int]: A tuple containing in 1st position the compression mode, in 2nd the integer parameters, in 3rd the buffers as views on the frame and in 4th the frame flags.
+    """
+    view = memoryview(buffer).cast("B")
+    if len(view) < HEADER.size:
+        raise ValueError("truncated frame")
+    magic, version, mode, paramCount, bufferCount, flags = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a bit packing frame of version {VERSION}")
+
+    # Read the parameters and the buffer sizes following the header
+    if len(view) < HEADER.size + 8*(paramCount + bufferCount):
+        raise ValueError("truncated frame")
+    values = struct.unpack_from(f"<{paramCount}q{bufferCount}Q", view, HEADER.size)
+    params, sizes = values[:paramCount], values[paramCount:]
+
+    # Slice the buffers out of the frame, each one having to lie inside it (the padding of the last one may be missing)
+    offset = _align(HEADER.size + 8*(paramCount + bufferCount))
+    buffers = []
+    for size in sizes:
+        if offset + size > len(view):
+            raise ValueError("truncated frame")
+        buffers.append(view[offset:offset+size])
+        offset += _align(size)
+    return mode.rstrip(b"\0").decode("ascii"), params, buffers, flags
\ No newline at end of file
@@ -1,41 +1,153 @@
-import numpy as np
-from scipy.stats import boltzmann
-
-# Random Number Generator
-rng = np.random.RandomState(0)
-
-# Boltzmann Number Generator
-# Boltzmann distribution is a distribution used in many fields, especially in physics and statistical mechanics. It is also known as
-# truncated planck distribution or truncated discrete exponential distribution. In this distribution, "small" number are more likely to appears.
-# https://en.wikipedia.org/wiki/Boltzmann_distribution
-# https://docs.scipy.org/doc/scipy/tutorial/stats/discrete_boltzmann.html
-lam = 10**-4
-smallBoltzmann = boltzmann(lam, 2**16-1)
-
-# Tests sets
-testSets = {
-    "smallInt_small": rng.randint(-2**8+1, 2**8, 1_000),
-    "smallInt_medium": rng.randint(-2**8+1, 2**8, 100_000),
-    "smallInt_large": rng.randint(-2**8+1, 2**8, 1_000_000),
-    "smallInt_superLarge": rng.randint(-2**8+1, 2**8, 4_000_000),
-    
-    "largeInt_small": rng.randint(-2**16+1, 2**16, 1_000),
-    "largeInt_medium": rng.randint(-2**16+1, 2**16, 100_000),
-    "largeInt_large": rng.randint(-2**16+1, 2**16, 1_000_000),
-    "largeInt_superLarge": rng.randint(-2**16+1, 2**16, 4_000_000),
-    
-    "boltzmann_small": smallBoltzmann.rvs(1_000, random_state=0),
-    "boltzmann_medium": smallBoltzmann.rvs(100_000, random_state=1),
-    "boltzmann_large": smallBoltzmann.rvs(1_000_000, random_state=2),
-    "boltzmann_superLarge": smallBoltzmann.rvs(4_000_000, random_state=2),
-    
-    "superLargeInt_small": rng.randint(-2**31, 2**31-1, 1_000),
-    "superLargeInt_medium": rng.randint(-2**31, 2**31-1, 100_000),
-    "superLargeInt_large": rng.randint(-2**31, 2**31-1, 1_000_000)
-}
-
-# Save the datas
-for key, value in testSets.items():
-    with open(f"IN\\{key}.in", "w") as file:
-        value.tofile(file, sep=" ")
-
+from scipy.stats import boltzmann
+from typing import Any
+import numpy as np
+import argparse
+import json
+import os
+
+# Default settings of the command line
+DEFAULT_IN = "IN"
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 2**20 #Number of elements generated at once, the memory used does not depend on the size of the dataset
+DTYPE = "<i4"
+
+# Distributions of the datasets, each one drawing a chunk of values from a random number generator
+# Boltzmann distribution is a distribution used in many fields, especially in physics and statistical mechanics. It is also known as
+# truncated planck distribution or truncated discrete exponential distribution. In this distribution, "small" number are more likely to appears.
+# https://en.wikipedia.org/wiki/Boltzmann_distribution
+# https://docs.scipy.org/doc/scipy/tutorial/stats/discrete_boltzmann.html
+DISTRIBUTIONS = {
+    "uniform": lambda rng, size, low, high: rng.integers(low, high, size),
+    "boltzmann": lambda rng, size, lam, N: boltzmann(lam, N).rvs(size, random_state=rng)
+}
+
+# Tests sets: distribution, parameters, size and seed of each dataset
+DATASETS = {
+    "smallInt_small": ("uniform", {"low": -2**8+1, "high": 2**8}, 1_000, 0),
+    "smallInt_medium": ("uniform", {"low": -2**8+1, "high": 2**8}, 100_000, 1),
+    "smallInt_large": ("uniform", {"low": -2**8+1, "high": 2**8}, 1_000_000, 2),
+    "smallInt_superLarge": ("uniform", {"low": -2**8+1, "high": 2**8}, 4_000_000, 3),
+
+    "largeInt_small": ("uniform", {"low": -2**16+1, "high": 2**16}, 1_000, 4),
+    "largeInt_medium": ("uniform", {"low": -2**16+1, "high": 2**16}, 100_000, 5),
+    "largeInt_large": ("uniform", {"low": -2**16+1, "high": 2**16}, 1_000_000, 6),
+    "largeInt_superLarge": ("uniform", {"low": -2**16+1, "high": 2**16}, 4_000_000, 7),
+
+    "boltzmann_small": ("boltzmann", {"lam": 10**-4, "N": 2**16-1}, 1_000, 8),
+    "boltzmann_medium": ("boltzmann", {"lam": 10**-4, "N": 2**16-1}, 100_000, 9),
+    "boltzmann_large": ("boltzmann", {"lam": 10**-4, "N": 2**16-1}, 1_000_000, 10),
+    "boltzmann_superLarge": ("boltzmann", {"lam": 10**-4, "N": 2**16-1}, 4_000_000, 11),
+
+    "superLargeInt_small": ("uniform", {"low": -2**31, "high": 2**31-1}, 1_000, 12),
+    "superLargeInt_medium": ("uniform", {"low": -2**31, "high": 2**31-1}, 100_000, 13),
+    "superLargeInt_large": ("uniform", {"low": -2**31, "high": 2**31-1}, 1_000_000, 14)
+}
+
+
+# Describe a dataset as an entry of the manifest, the values being reproducible from the seed and the chunk size
+def makeEntry(name:str, distribution:str, params:dict[str, Any], size:int, seed:int, fileFormat:str = "npy", chunkSize:int = CHUNK_SIZE) -> dict[str, Any]:
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}.")
+    if fileFormat not in ["npy", "raw"]:
+        raise ValueError(f"Unknown file format: {fileFormat}.")
+    return {
+        "file": f"{name}.npy" if fileFormat == "npy" else f"{name}.i32",
+        "format": fileFormat,
+        "dtype": DTYPE,
+        "size": size,
+        "distribution": distribution,
+        "params": params,
+        "seed": seed,
+        "chunkSize": chunkSize
+    }
+
+
+# Write a dataset chunk by chunk, so that only one chunk is in memory whatever the size of the dataset
+def generateDataset(entry:dict[str, Any], inDir:str = DEFAULT_IN) -> str:
+    path = os.path.join(inDir, entry["file"])
+    rng = np.random.default_rng(entry["seed"])
+    draw = DISTRIBUTIONS[entry["distribution"]]
+
+    # The .npy file is written through a memory map of its final size, the raw file is appended to
+    if entry["format"] == "npy":
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=entry["dtype"], shape=(entry["size"],))
+        for start in range(0, entry["size"], entry["chunkSize"]):
+            stop = min(start + entry["chunkSize"], entry["size"])
+            out[start:stop] = draw(rng, stop - start, **entry["params"])
+        out.flush()
+        del out
+    else:
+        with open(path, "wb") as file:
+            for start in range(0, entry["size"], entry["chunkSize"]):
+                stop = min(start + entry["chunkSize"], entry["size"])
+                file.write(draw(rng, stop - start, **entry["params"]).astype(entry["dtype"]).tobytes())
+    return path
+
+
+# Read the manifest of the input directory
+def loadManifest(inDir:str = DEFAULT_IN) -> dict[str, dict[str, Any]]:
+    with open(os.path.join(inDir, MANIFEST_FILE)) as file:
+        return json.load(file)
+
+
+# Write the manifest of the input directory, keeping the entries of the datasets not given
+def saveManifest(entries:dict[str, dict[str, Any]], inDir:str = DEFAULT_IN) -> None:
+    manifest = loadManifest(inDir) if os.path.exists(os.path.join(inDir, MANIFEST_FILE)) else {}
+    manifest.update(entries)
+    with open(os.path.join(inDir, MANIFEST_FILE), "w") as file:
+        json.dump(dict(sorted(manifest.items())), file, indent=2)
+
+
+# Open one dataset of the manifest as a read-only memory map, nothing being read before the values are used
+def openDataset(entry:dict[str, Any], inDir:str = DEFAULT_IN) -> np.ndarray[np.int32]:
+    path = os.path.join(inDir, entry["file"])
+    if entry["format"] == "npy":
+        return np.load(path, mmap_mode="r")
+    return np.memmap(path, dtype=entry["dtype"], mode="r", shape=(entry["size"],))
+
+
+# Open the datasets of the manifest, all of them or only the requested ones, the missing files being generated from their entry first
+def loadDatasets(inDir:str = DEFAULT_IN, names:list[str]|None = None, generate:bool = True) -> dict[str, np.ndarray[np.int32]]:
+    manifest = loadManifest(inDir)
+    unknown = set(names or []) - manifest.keys()
+    if unknown:
+        raise KeyError(f"Datasets not in the manifest: {', '.join(sorted(unknown))}.")
+
+    datasets = {}
+    for name in (manifest.keys() if names is None else names):
+        entry = manifest[name]
+        if generate and not os.path.exists(os.path.join(inDir, entry["file"])):
+            generateDataset(entry, inDir)
+        datasets[name] = openDataset(entry, inDir)
+    return datasets
+
+
+def parseArgs(argv:list[str]|None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the input datasets as binary files listed in a manifest.")
+    parser.add_argument("--datasets", nargs="+", default=None, help="names of the predefined datasets to generate (all of them by default)")
+    parser.add_argument("--add", nargs=5, action="append", default=[], metavar=("NAME", "DISTRIBUTION", "PARAMS", "SIZE", "SEED"), help="add a dataset, e.g. --add smallInt_huge uniform '{\"low\": -255, \"high\": 256}' 100000000 15")
+    parser.add_argument("--in-dir", dest="inDir", default=DEFAULT_IN, help="directory of the datasets")
+    parser.add_argument("--format", dest="fileFormat", choices=["npy", "raw"], default="npy", help="write .npy files or raw little-endian int32 files")
+    parser.add_argument("--chunk-size", dest="chunkSize", type=int, default=CHUNK_SIZE, help="number of elements generated at once")
+    parser.add_argument("--manifest-only", dest="manifestOnly", action="store_true", help="only write the manifest, the files being generated when first loaded")
+    return parser.parse_args(argv)
+
+
+def runGenerator(argv:list[str]|None = None) -> None:
+    options = parseArgs(argv)
+    specs = {name: DATASETS[name] for name in (DATASETS if options.datasets is None and not options.add else options.datasets or [])}
+    for name, distribution, params, size, seed in options.add:
+        specs[name] = (distribution, json.loads(params), int(size), int(seed))
+
+    # Describe every dataset, then write them one after the other
+    entries = {name: makeEntry(name, *spec, fileFormat=options.fileFormat, chunkSize=options.chunkSize) for name, spec in specs.items()}
+    os.makedirs(options.inDir, exist_ok=True)
+    saveManifest(entries, options.inDir)
+    if not options.manifestOnly:
+        for name, entry in entries.items():
+            print(f"step [{name}] [{entry['size']}]")
+            generateDataset(entry, options.inDir)
+
+
+if __name__ == "__main__":
+    runGenerator()
\ No newline at end of file
@@ -1,87 +1,267 @@
-import time
-import numpy as np
-import os
-
-import main
-
-# Number of test per function
-REP = 10
-
-# Create the bit packing handler
-split = main.BitPacking("split")
-nosplit = main.BitPacking("nosplit")
-overflow = {
-    "overflow1": main.BitPacking("overflow", 1),
-    "overflow2": main.BitPacking("overflow", 2),
-    "overflow4": main.BitPacking("overflow", 4),
-    "overflow8": main.BitPacking("overflow", 8),
-    "overflow12": main.BitPacking("overflow", 12)
-}
-
-
-# Import the test files
-testFiles = {}
-for file in os.listdir("IN"):
-    testFiles[file.strip(".in")] = np.fromfile(f"IN\\{file}", dtype=np.int32, sep=" ")
-    
-
-# Benchmark context manager  
-class BenchmarkContext():
-    def __init__(self, outPath:str, createFile:bool, **kwargs):
-        self.outPath = outPath
-        self.kwargs = kwargs
-        self.file = None
-        self.createFile = createFile
-        
-    def __enter__(self):
-        if self.createFile:
-            self.file = open(self.outPath, "w")
-            for key, value in self.kwargs.items():
-                self.file.write(f'"{key}", ')
-            self.file.write('"time"\n')
-        else:
-            self.file = open(self.outPath, "a")
-        self.timeBegin = time.time()
-    
-    def __exit__(self, *args):
-        elapsedTime = time.time()-self.timeBegin
-        if not all(i is None for i in self.kwargs.values()):
-            for key, value in self.kwargs.items():
-                self.file.write(f'"{value}", ')
-            self.file.write(f"{elapsedTime}\n")
-        self.file.close()
-
-
-# Function to benchmark flow
-def proceedBenchmark(compressor:main.BitPacking, out:str = "OUT\\benchmark.out"):
-    with BenchmarkContext(outPath=out, createFile=True, benchID=None, inFile=None, func=None):
-        pass
-    
-    count = 0
-    for key, value in testFiles.items():
-        for _ in range(REP):
-            print(f"step [{key}]: {(count//4)%REP}/{REP}")
-            compressor.setArr(value)
-
-            with BenchmarkContext(outPath=out, createFile=False, benchID=count, inFile=key, func="transmitRaw"):
-                compressor.transmit(compressed=False)
-            
-            count+=1
-            with BenchmarkContext(outPath=out, createFile=False, benchID=count, inFile=key, func="compress"):
-                compressor.compress()
-            
-            count+=1
-            with BenchmarkContext(outPath=out, createFile=False, benchID=count, inFile=key, func="transmit"):
-                compressor.transmit(compressed=True)
-                
-            count+=1
-            with BenchmarkContext(outPath=out, createFile=False, benchID=count, inFile=key, func="decompress"):
-                compressor.decompress()
-            count+=1
-
-
-# Proceed Benchmark
-proceedBenchmark(split, "OUT\\splitBenchmark.out")
-proceedBenchmark(nosplit, "OUT\\nosplitBenchmark.out")
-for key, value in overflow.items():
-    proceedBenchmark(value, f"OUT\\{key}Benchmark.out")
\ No newline at end of file
+from datetime import datetime, timezone
+from typing import Any, Callable
+import numpy as np
+import argparse
+import asyncio
+import platform
+import socket
+import tracemalloc
+import json
+import time
+import sys
+import os
+
+import main
+from arrayGenerator import loadDatasets
+
+# Default settings of the command line
+DEFAULT_MODES = ["split", "nosplit", "overflow:1", "overflow:2", "overflow:4", "overflow:8", "overflow:12", "for", "delta", "dict", "varint", "auto"]
+DEFAULT_IN = "IN"
+DEFAULT_OUT = os.path.join("OUT", "benchmark.json")
+
+# Direction of each metric, used to catch regressions between two runs
+HIGHER_IS_BETTER = ["compressMBps", "decompressMBps", "ratio"]
+LOWER_IS_BETTER = ["getP50Ns", "getP99Ns", "batchGetP50Ns", "batchGetP99Ns", "transmitMedianNs", "loopbackPipelinedNs", "serializedBytes", "compressPeakBytes", "decompressPeakBytes"]
+
+
+# Parse a mode of the command line: "overflow:8" is the overflow mode with a threshold of 8, "auto:0.1" the auto mode with a size budget of 10%
+def parseMode(spec:str) -> tuple[str, str, tuple[Any]]:
+    mode, *args = spec.split(":")
+    args = tuple(float(arg) if "." in arg else int(arg) for arg in args)
+    return mode + "".join(str(arg) for arg in args), mode, args
+
+
+# Time each call of a function in nanoseconds, after some warm-up calls which are not recorded
+def timeCalls(func:Callable, reps:int, warmup:int) -> np.ndarray[np.int64]:
+    for _ in range(warmup):
+        func()
+
+    samples = np.zeros(reps, dtype=np.int64)
+    for rep in range(reps):
+        timeBegin = time.perf_counter_ns()
+        func()
+        samples[rep] = time.perf_counter_ns() - timeBegin
+    return samples
+
+
+# Peak of the memory allocated while running a function (NumPy buffers included)
+def measurePeakMemory(func:Callable) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Writer of a simulated link: the data is sent at once but each drain waits for the time the link would take to carry it
+class ThrottledWriter:
+    def __init__(self, writer:asyncio.StreamWriter, bytesPerSecond:float|None):
+        self.writer = writer
+        self.bytesPerSecond = bytesPerSecond
+        self.pendingBytes = 0
+    
+    def write(self, data:bytes) -> None:
+        self.writer.write(data)
+        self.pendingBytes += len(data)
+    
+    async def drain(self) -> None:
+        await self.writer.drain()
+        if self.bytesPerSecond is not None:
+            await asyncio.sleep(self.pendingBytes / self.bytesPerSecond)
+        self.pendingBytes = 0
+
+
+# End-to-end latency over a local socket pair: the stages one after the other, then pipelined block by block
+def measureLoopback(mode:str, args:tuple[Any], workers:int|None, arr:np.ndarray[int], options:argparse.Namespace) -> dict[str, int]:
+    async def sendFrame(writer:asyncio.StreamWriter, frame:bytes) -> None:
+        writer.write(frame)
+        await writer.drain()
+    
+    async def sequential(reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> tuple[int, int, int]:
+        sender = main.BitPacking(mode, *args, workers=workers)
+        sender.setArr(arr)
+        timeBegin = time.perf_counter_ns()
+        sender.compress()
+        frame = sender.toBytes()
+        timeCompressed = time.perf_counter_ns()
+        _, received = await asyncio.gather(sendFrame(writer, frame), reader.readexactly(len(frame)))
+        timeReceived = time.perf_counter_ns()
+        main.BitPacking.fromBuffer(received).decompress()
+        return timeCompressed - timeBegin, timeReceived - timeCompressed, time.perf_counter_ns() - timeReceived
+    
+    async def pipelined(reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> int:
+        sender = main.BitPacking(mode, *args, workers=workers)
+        sender.setArr(arr)
+        timeBegin = time.perf_counter_ns()
+        await asyncio.gather(sender.sendAsync(writer, options.blockSize), main.BitPacking.receiveAsync(reader, workers=workers))
+        return time.perf_counter_ns() - timeBegin
+    
+    async def run() -> tuple[np.ndarray[np.int64], np.ndarray[np.int64]]:
+        receiving, sending = socket.socketpair()
+        reader, readerSide = await asyncio.open_connection(sock=receiving)
+        writerSide, writer = await asyncio.open_connection(sock=sending)
+        writer = ThrottledWriter(writer, None if options.linkMBps is None else options.linkMBps * 1e6)
+        try:
+            stages = [await sequential(reader, writer) for _ in range(options.reps)]
+            return np.array(stages), np.array([await pipelined(reader, writer) for _ in range(options.reps)])
+        finally:
+            writer.writer.close()
+            readerSide.close()
+    
+    stages, pipelinedTimes = asyncio.run(run())
+    compressNs, transferNs, decompressNs = np.median(stages, axis=0).astype(int).tolist()
+    return {
+        "loopbackCompressNs": compressNs,
+        "loopbackTransferNs": transferNs,
+        "loopbackDecompressNs": decompressNs,
+        "loopbackSequentialNs": int(np.median(stages.sum(axis=1))),
+        "loopbackPipelinedNs": int(np.median(pipelinedTimes))
+    }
+
+
+# Benchmark one mode on one dataset
+def benchmarkCase(mode:str, args:tuple[Any], workers:int|None, arr:np.ndarray[int], options:argparse.Namespace) -> dict[str, Any]:
+    compressor = main.BitPacking(mode, *args, workers=workers)
+    compressor.setArr(arr)
+    rawBytes = arr.nbytes
+
+    # Throughput of the compression and the decompression, on the median call
+    compressTimes = timeCalls(compressor.compress, options.reps, options.warmup)
+    decompressTimes = timeCalls(compressor.decompress, options.reps, options.warmup)
+
+    # Latency of single and batched random access, each call being timed
+    rng = np.random.default_rng(0)
+    indices = rng.integers(0, len(arr), options.getSamples)
+    getTimes = np.zeros(len(indices), dtype=np.int64)
+    for sample, i in enumerate(indices):
+        timeBegin = time.perf_counter_ns()
+        compressor.get(int(i), compressed=True)
+        getTimes[sample] = time.perf_counter_ns() - timeBegin
+    batch = rng.integers(0, len(arr), options.batchSize)
+    batchTimes = timeCalls(lambda: compressor.getMany(batch, compressed=True), options.reps, options.warmup)
+
+    # Size of the frame sent by transmit and time of the transmission, compared with the transmission of the raw array
+    serializedBytes = len(compressor.toBytes())
+    transmitTimes = timeCalls(lambda: compressor.transmit(compressed=True), options.reps, options.warmup)
+    transmitRawTimes = timeCalls(lambda: compressor.transmit(compressed=False), options.reps, options.warmup)
+
+    # Peak memory, measured apart since tracing the allocations slows the calls down
+    compressPeak = measurePeakMemory(compressor.compress) if options.memory else None
+    decompressPeak = measurePeakMemory(compressor.decompress) if options.memory else None
+    
+    # Sequential and pipelined transmission over a local socket pair, on request since it sends the array many times
+    loopback = measureLoopback(mode, args, workers, arr, options) if options.loopback else {}
+
+    return {
+        "length": len(arr),
+        "rawBytes": rawBytes,
+        "serializedBytes": serializedBytes,
+        "ratio": rawBytes / serializedBytes,
+        "compressMBps": rawBytes / np.median(compressTimes) * 1e3,
+        "decompressMBps": rawBytes / np.median(decompressTimes) * 1e3,
+        "compressMedianNs": int(np.median(compressTimes)),
+        "decompressMedianNs": int(np.median(decompressTimes)),
+        "getP50Ns": float(np.percentile(getTimes, 50)),
+        "getP99Ns": float(np.percentile(getTimes, 99)),
+        "batchSize": options.batchSize,
+        "batchGetP50Ns": float(np.percentile(batchTimes, 50)),
+        "batchGetP99Ns": float(np.percentile(batchTimes, 99)),
+        "transmitMedianNs": int(np.median(transmitTimes)),
+        "transmitRawMedianNs": int(np.median(transmitRawTimes)),
+        "compressPeakBytes": compressPeak,
+        "decompressPeakBytes": decompressPeak,
+        **loopback
+    }
+
+
+# Compare a run with a previous one, a metric worse by more than the tolerance being a regression
+def compareResults(results:list[dict[str, Any]], baseline:list[dict[str, Any]], tolerance:float) -> list[str]:
+    previous = {(result["mode"], result["dataset"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = previous.get((result["mode"], result["dataset"]))
+        if reference is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            new, old = result.get(metric), reference.get(metric)
+            if new is None or old is None or old == 0:
+                continue
+            change = (new - old) / old
+            if (metric in HIGHER_IS_BETTER and change < -tolerance) or (metric in LOWER_IS_BETTER and change > tolerance):
+                regressions.append(f"{result['mode']} {result['dataset']} {metric}: {old:.6g} -> {new:.6g} ({change:+.1%})")
+    return regressions
+
+
+def parseArgs(argv:list[str]|None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the bit packing modes on the input datasets.")
+    parser.add_argument("--modes", nargs="+", default=DEFAULT_MODES, help="modes to benchmark, with their argument after a colon (e.g. overflow:8)")
+    parser.add_argument("--datasets", nargs="+", default=None, help="names of the datasets to use (all the datasets of the manifest by default)")
+    parser.add_argument("--in-dir", dest="inDir", default=DEFAULT_IN, help="directory of the datasets")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="JSON file receiving the results")
+    parser.add_argument("--reps", type=int, default=10, help="number of timed calls of each function")
+    parser.add_argument("--warmup", type=int, default=2, help="number of calls before timing")
+    parser.add_argument("--get-samples", dest="getSamples", type=int, default=1000, help="number of timed get calls")
+    parser.add_argument("--batch-size", dest="batchSize", type=int, default=1024, help="number of positions per getMany call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[None], help="compress with parallel blocks on each of these numbers of threads (no parallel blocks by default)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the peak memory measurement")
+    parser.add_argument("--loopback", action="store_true", help="measure the end-to-end latency over a local socket pair, sequential and pipelined")
+    parser.add_argument("--link-mbps", dest="linkMBps", type=float, default=None, help="simulate a link of this rate (MB/s) in the loopback measurement (no limit by default)")
+    parser.add_argument("--block-size", dest="blockSize", type=int, default=main.AsyncPipeline.PIPELINE_BLOCK_SIZE, help="number of elements per block of the pipelined transmission")
+    parser.add_argument("--compare", default=None, help="previous JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change of a metric counted as a regression")
+    return parser.parse_args(argv)
+
+
+def runBenchmark(argv:list[str]|None = None) -> int:
+    options = parseArgs(argv)
+    datasets = loadDatasets(options.inDir, options.datasets)
+
+    # Benchmark every mode on every dataset
+    results, cases = [], []
+    for spec in options.modes:
+        label, mode, args = parseMode(spec)
+        for workers in options.workers:
+            workerLabel = label if workers is None else f"{label}@{workers}"
+            for name, arr in datasets.items():
+                print(f"step [{workerLabel}] [{name}]")
+                results.append({"mode": workerLabel, "dataset": name, "workers": workers, **benchmarkCase(mode, args, workers, arr, options)})
+                cases.append((label, name))
+
+    # Speedup of the parallel blocks with respect to the run of the same mode and dataset on a single worker (None without such a run)
+    references = {case: result for case, result in zip(cases, results) if result["workers"] == 1}
+    for case, result in zip(cases, results):
+        reference = references.get(case)
+        result["speedup"] = None
+        if reference is not None and result["workers"] is not None:
+            result["speedup"] = {func: reference[f"{func}MedianNs"] / result[f"{func}MedianNs"] for func in ("compress", "decompress")}
+            print(f"speedup [{result['mode']}] [{result['dataset']}]: compress x{result['speedup']['compress']:.2f}, decompress x{result['speedup']['decompress']:.2f}")
+
+    # Save the results with the context of the run
+    report = {
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "settings": vars(options),
+        "results": results
+    }
+    os.makedirs(os.path.dirname(options.out) or ".", exist_ok=True)
+    with open(options.out, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results saved in {options.out}")
+
+    # Check for regressions against a previous run
+    if options.compare is not None:
+        with open(options.compare) as file:
+            regressions = compareResults(results, json.load(file)["results"], options.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
\ No newline at end of file
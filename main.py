@@ -1,65 +1,384 @@
-from Compressor.AbstractCompressor import Compressor
-from Compressor.SplitCompressor import SplitCompressor
-from Compressor.NoSplitCompressor import NoSplitCompressor
-from Compressor.OverflowCompressor import OverflowCompressor
-
-from typing import Literal, Any
-import numpy as np
-
-import pickle
-import io
-
-
-def createCompressor(mode:Literal["nosplit","split","overflow"], *args) -> Compressor:
-    return {
-        "nosplit": NoSplitCompressor,
-        "split": SplitCompressor,
-        "overflow": OverflowCompressor
-    }[mode](*args)
-
-
-class BitPacking:
-    def __init__(self, mode:Literal["nosplit","split","overflow"], *args):
-        self.__compressor:Compressor = createCompressor(mode, *args)
-        self.__arr:np.ndarray[int]
-        self.__compressed:tuple[Any]
-
-    def getArr(self) -> np.ndarray[int]:
-        return self.__arr
-    
-    def getCompressedArr(self) -> tuple[Any]:
-        return self.__compressed
-    
-    def setArr(self, arr:np.ndarray[int]) -> None:
-        self.__arr = arr
-    
-    def compress(self) -> None:
-        self.__compressed = self.__compressor.compress(self.__arr)
-    
-    def decompress(self) -> None:
-        self.__arr = self.__compressor.decompress(*self.__compressed)
-
-    def get(self, i:int, compressed:bool=False) -> int:
-        if not compressed:
-            return self.__arr[i]
-        return self.__compressor.get(i, *self.__compressed)
-    
-    def transmit(self, compressed:bool = True) -> None:
-        # Simulate communication
-        ## Serialisation
-        compressed_bytes = pickle.dumps(self.__compressed if compressed else self.__arr)
-        buf = io.BytesIO()
-        
-        # Send
-        buf.write(compressed_bytes)
-        
-        # Read
-        buf.seek(0)
-        buf.read()
-
-    def changeMode(self, mode:Literal["nosplit","split","overflow"]) -> None:
-        self.__compressor = createCompressor(mode)
-        self.__compressed = None
-
-if __name__ == "__main__":
+from Compressor.AbstractCompressor import Compressor
+from Compressor.SplitCompressor import SplitCompressor
+from Compressor.NoSplitCompressor import NoSplitCompressor
+from Compressor.OverflowCompressor import OverflowCompressor
+from Compressor.ParallelCompressor import ParallelCompressor
+from Compressor.FrameOfReferenceCompressor import FrameOfReferenceCompressor
+from Compressor.DeltaCompressor import DeltaCompressor
+from Compressor.DictionaryCompressor import DictionaryCompressor
+from Compressor.VarintCompressor import VarintCompressor
+from Compressor.AutoCompressor import AutoCompressor
+from Compressor.BlockCache import BlockCache, CACHE_BLOCK_SIZE
+from Compressor.CompressedArray import CompressedArray
+from Compressor.CompressedBatch import CompressedBatch
+from Compressor import WireFormat, AsyncPipeline
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Any, Callable, Iterable, Iterator, NamedTuple
+import numpy as np
+
+import asyncio
+
+import pickle
+import mmap
+import time
+import io
+import os
+
+# Operations of BitPacking measured once the metrics are enabled
+INSTRUMENTED_OPERATIONS = ("compress", "decompress", "decompressRange", "decompressInto", "get", "getMany", "transmit")
+
+
+def createCompressor(mode:Literal["nosplit","split","overflow","for","delta","dict","varint","auto"], *args) -> Compressor:
+    return {
+        "nosplit": NoSplitCompressor,
+        "split": SplitCompressor,
+        "overflow": OverflowCompressor,
+        "for": FrameOfReferenceCompressor,
+        "delta": DeltaCompressor,
+        "dict": DictionaryCompressor,
+        "varint": VarintCompressor,
+        "auto": AutoCompressor
+    }[mode](*args)
+
+
+def estimateSize(arr:np.ndarray[int], mode:Literal["nosplit","split","overflow","for","delta","dict","varint","auto"], threshold:int|None = None) -> int:
+    # Number of bits of the packed buffers, computed from the bit length histogram without compressing
+    return createCompressor(mode, *([threshold] if mode == "overflow" and threshold is not None else [])).estimateSize(np.asarray(arr))
+
+
+def iterChunks(arr:np.ndarray[int], chunkSize:int) -> Iterator[np.ndarray[int]]:
+    # Views on the array, so a memory-mapped array is only read chunk by chunk
+    for start in range(0, len(arr), chunkSize):
+        yield arr[start:start+chunkSize]
+
+
+class OperationMetrics(NamedTuple):
+    operation: str
+    durationNs: int
+    elements: int
+    inputBytes: int
+    outputBytes: int
+    bitsPerValue: float
+    mode: str
+    threshold: int|float|None
+
+
+class MetricsCounters:
+    # Plain integers per operation, cheap to update and to scrape
+    __slots__ = ("calls", "durationNs", "elements", "inputBytes", "outputBytes")
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self) -> None:
+        for counter in self.__slots__:
+            setattr(self, counter, dict.fromkeys(INSTRUMENTED_OPERATIONS, 0))
+    
+    def record(self, metrics:OperationMetrics) -> None:
+        self.calls[metrics.operation] += 1
+        self.durationNs[metrics.operation] += metrics.durationNs
+        self.elements[metrics.operation] += metrics.elements
+        self.inputBytes[metrics.operation] += metrics.inputBytes
+        self.outputBytes[metrics.operation] += metrics.outputBytes
+    
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        return {operation: {counter: getattr(self, counter)[operation] for counter in self.__slots__} for operation in INSTRUMENTED_OPERATIONS}
+
+
+class BitPacking:
+    def __init__(self, mode:Literal["nosplit","split","overflow","for","delta","dict","varint","auto"], *args, workers:int|None = None, metrics:Callable[[OperationMetrics], None]|None = None, cache:int|None = None):
+        self.__mode = mode
+        self.__workers = workers
+        self.__compressor:Compressor = createCompressor(mode, *args)
+        
+        # With workers, the array is split into independent blocks processed in parallel
+        if workers is not None:
+            self.__compressor = ParallelCompressor(self.__compressor, workers)
+        self.__arr:np.ndarray[int]
+        self.__compressed:CompressedArray|None = None
+        self.__offsets:np.ndarray[np.int64]|None = None
+        
+        # Metrics are disabled unless a sink is given
+        self.__counters:MetricsCounters|None = None
+        self.__summary:tuple[Any] = ()
+        if metrics is not None:
+            self.enableMetrics(metrics)
+        
+        # The decoded blocks are only cached if a capacity (in bytes) is given
+        self.__cache:BlockCache|None = None
+        if cache is not None:
+            self.enableCache(cache)
+
+    def getArr(self) -> np.ndarray[int]:
+        return self.__arr
+    
+    def getCompressedArr(self) -> tuple[Any]:
+        return self.__compressed.parts
+    
+    def getCompressed(self) -> CompressedArray:
+        return self.__compressed
+    
+    def getBatch(self) -> CompressedBatch|None:
+        return CompressedBatch(self.__compressed, self.__offsets) if self.__offsets is not None else None
+    
+    def setArr(self, arr:np.ndarray[int]) -> None:
+        self.__arr = arr
+    
+    def compress(self) -> None:
+        self.__compressed = self.__compressor.compressArray(self.__arr)
+        self.__offsets = None
+        self.__invalidateCache()
+    
+    def compressBatch(self, arrays:Iterable[np.ndarray[int]]) -> CompressedBatch:
+        # The arrays are compressed as their concatenation, so that the setup of the compressor and the frame are paid once for the whole batch
+        arrays = [np.asarray(arr) for arr in arrays]
+        self.__arr = np.concatenate([np.zeros(0, dtype=np.int64), *arrays])
+        self.compress()
+        self.__offsets = CompressedBatch.getOffsets(arrays)
+        return self.getBatch()
+    
+    def decompress(self) -> None:
+        self.__arr = self.__compressor.decompress(*self.__compressed.parts)
+
+    def decompressRange(self, start:int, stop:int) -> np.ndarray[int]:
+        if self.__cache is not None:
+            return self.__cache.getRange(start, stop, self.__getLength(), self.__decodeRange)
+        return self.__compressor.decompressRange(start, stop, *self.__compressed.parts)
+
+    def decompressInto(self, out:np.ndarray[int]|memoryview, start:int = 0) -> int:
+        # Decode into a buffer of the caller (reused across calls, shared memory, ...), returning the number of elements written
+        return self.__compressor.decompressInto(out, start, *self.__compressed.parts)
+
+    def get(self, i:int, compressed:bool=False) -> int:
+        if not compressed:
+            return self.__arr[i]
+        if self.__cache is not None:
+            return self.__cache.get(i, self.__getLength(), self.__decodeRange)
+        return self.__compressed[i]
+    
+    def getMany(self, indices:np.ndarray[int], compressed:bool=False) -> np.ndarray[int]:
+        if not compressed:
+            return self.__arr[indices]
+        if self.__cache is not None:
+            return self.__cache.getMany(indices, self.__getLength(), self.__decodeRange)
+        return self.__compressor.getMany(indices, *self.__compressed.parts)
+    
+    # Scans computed on the compressed array, chunk by chunk
+    def sum(self) -> int:
+        return self.__compressor.sum(*self.__compressed.parts)
+    
+    def min(self) -> int:
+        return self.__compressor.min(*self.__compressed.parts)
+    
+    def max(self) -> int:
+        return self.__compressor.max(*self.__compressed.parts)
+    
+    def countWhere(self, op:Literal["<","<=",">",">=","==","!="], value:int) -> int:
+        return self.__compressor.countWhere(op, value, *self.__compressed.parts)
+    
+    def where(self, op:Literal["<","<=",">",">=","==","!="], value:int) -> np.ndarray[int]:
+        return self.__compressor.where(op, value, *self.__compressed.parts)
+    
+    # Writes into the compressed array, in place when the values fit its bit lengths (the uncompressed array is left as it is)
+    def set(self, i:int, value:int) -> None:
+        self.__compressed = CompressedArray(self.__compressor, self.__compressor.set(i, value, *self.__releaseCompressed()))
+        i %= self.__getLength()
+        self.__invalidateCache(i, i+1)
+    
+    def append(self, value:int) -> None:
+        self.extend([value])
+    
+    def extend(self, values:Iterable[int]) -> None:
+        values = np.asarray(values, dtype=np.int64)
+        if self.__compressed is None:
+            self.__compressed = self.__compressor.compressArray(values)
+            self.__invalidateCache()
+        else:
+            # Only the last block cached may miss the new values
+            self.__invalidateCache(self.__getLength())
+            self.__compressed = CompressedArray(self.__compressor, self.__compressor.extend(values, *self.__releaseCompressed()))
+            
+            # The values of a batch go to its last array
+            if self.__offsets is not None:
+                self.__offsets = np.r_[self.__offsets[:-1], self.__getLength()]
+    
+    def toBytes(self) -> bytes:
+        return WireFormat.dumps(self.__mode, *self.__getFrameParts())
+    
+    @classmethod
+    def fromBuffer(cls, buffer:Any) -> "BitPacking":
+        # The mode is read from the frame and the packed buffers stay views on it (no copy)
+        mode, params, buffers, flags = WireFormat.loads(buffer)
+        bitPacking = cls(mode, workers=os.cpu_count() if flags & WireFormat.BLOCKED else None)
+        if flags & WireFormat.BATCHED:
+            *buffers, offsets = buffers
+            bitPacking.__offsets = np.frombuffer(offsets, dtype="<i8")
+        bitPacking.__compressed = CompressedArray(bitPacking.__compressor, bitPacking.__compressor.fromParts(params, buffers))
+        return bitPacking
+    
+    def save(self, path:str) -> None:
+        with open(path, "wb") as file:
+            WireFormat.dump(file, self.__mode, *self.__getFrameParts())
+    
+    @classmethod
+    def openMmap(cls, path:str) -> "BitPacking":
+        # Map the file read-only, the pages are only loaded when get, getMany or decompressRange touch them
+        with open(path, "rb") as file:
+            mappedFile = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.fromBuffer(mappedFile)
+    
+    def transmit(self, compressed:bool = True) -> int:
+        # Simulate communication
+        ## Serialisation
+        compressed_bytes = self.toBytes() if compressed else pickle.dumps(self.__arr)
+        buf = io.BytesIO()
+        
+        # Send
+        buf.write(compressed_bytes)
+        
+        # Read
+        buf.seek(0)
+        buf.read()
+        return len(compressed_bytes)
+
+    async def sendAsync(self, writer:asyncio.StreamWriter, blockSize:int = AsyncPipeline.PIPELINE_BLOCK_SIZE, depth:int = AsyncPipeline.PIPELINE_DEPTH) -> int:
+        # Each block is compressed into its own frame on the worker threads while the previous ones are on the wire
+        compressor = self.__compressor.compressor if isinstance(self.__compressor, ParallelCompressor) else self.__compressor
+        encode = lambda chunk: WireFormat.dumps(self.__mode, *compressor.toParts(*compressor.compress(np.asarray(chunk))))
+        with ThreadPoolExecutor(max_workers=self.__workers or 1) as executor:
+            return await AsyncPipeline.sendBlocks(writer, iterChunks(self.__arr, blockSize), encode, executor, depth)
+    
+    @staticmethod
+    async def receiveAsync(reader:asyncio.StreamReader, depth:int = AsyncPipeline.PIPELINE_DEPTH, workers:int|None = None) -> np.ndarray[int]:
+        # Blocks are decompressed on the worker threads as soon as they arrive, while the next ones are read
+        def decode(frame:bytes) -> np.ndarray[int]:
+            mode, params, buffers, flags = WireFormat.loads(frame)
+            compressor = createCompressor(mode)
+            return compressor.decompress(*compressor.fromParts(params, buffers))
+        
+        with ThreadPoolExecutor(max_workers=workers or 1) as executor:
+            blocks = [block async for block in AsyncPipeline.receiveBlocks(reader, decode, executor, depth)]
+        return np.concatenate([np.zeros(0, dtype=np.int64), *blocks])
+
+    def compressStream(self, chunks:Iterable[np.ndarray[int]]) -> Iterator[tuple[str, tuple[Any]]]:
+        # Compress each chunk independently, every block carrying its mode next to its own bit lengths and length (a chunk is already a block, not split again by the workers)
+        compressor = self.__compressor.compressor if isinstance(self.__compressor, ParallelCompressor) else self.__compressor
+        for chunk in chunks:
+            if len(chunk) != 0:
+                yield self.__mode, compressor.compress(np.asarray(chunk))
+    
+    @staticmethod
+    def decompressStream(blocks:Iterable[tuple[str, tuple[Any]]]) -> Iterator[np.ndarray[int]]:
+        # Blocks are self-describing, so each one is decoded with the compressor of its own mode
+        for mode, compressed in blocks:
+            yield createCompressor(mode).decompress(*compressed)
+
+    def changeMode(self, mode:Literal["nosplit","split","overflow","for","delta","dict","varint","auto"]) -> None:
+        self.__mode = mode
+        self.__compressor = createCompressor(mode)
+        if self.__workers is not None:
+            self.__compressor = ParallelCompressor(self.__compressor, self.__workers)
+        self.__compressed = None
+        self.__offsets = None
+        self.__invalidateCache()
+    
+    def enableMetrics(self, sink:Callable[[OperationMetrics], None]|None = None) -> MetricsCounters:
+        self.disableMetrics()
+        self.__counters = MetricsCounters()
+        
+        # Shadow the operations with timed versions on this instance only, so that the methods of a disabled instance stay untouched
+        for operation in INSTRUMENTED_OPERATIONS:
+            setattr(self, operation, self.__instrument(operation, getattr(type(self), operation), sink))
+        return self.__counters
+    
+    def disableMetrics(self) -> None:
+        for operation in INSTRUMENTED_OPERATIONS:
+            self.__dict__.pop(operation, None)
+        self.__counters = None
+    
+    def getCounters(self) -> MetricsCounters|None:
+        return self.__counters
+    
+    def enableCache(self, capacity:int, blockSize:int = CACHE_BLOCK_SIZE) -> BlockCache:
+        # Bounded LRU cache of decoded blocks serving get, getMany and decompressRange on the compressed array
+        self.__cache = BlockCache(capacity, blockSize)
+        return self.__cache
+    
+    def disableCache(self) -> None:
+        self.__cache = None
+    
+    def getCache(self) -> BlockCache|None:
+        return self.__cache
+    
+    def __invalidateCache(self, start:int = 0, stop:int|None = None) -> None:
+        # Every write into the compressed array drops the decoded blocks it changes
+        if self.__cache is not None:
+            self.__cache.invalidate(start, stop)
+    
+    def __decodeRange(self, start:int, stop:int) -> np.ndarray[int]:
+        return self.__compressor.decompressRange(start, stop, *self.__compressed.parts)
+    
+    def __releaseCompressed(self) -> tuple[Any]:
+        # Drop every reference to the compressed array before writing into it, so that the views of its accessor do not force a copy of the buffers
+        parts, self.__compressed, self.__summary = self.__compressed.parts, None, ()
+        return parts
+    
+    def __getLength(self) -> int:
+        return self.__compressor.getLength(*self.__compressed.parts)
+    
+    def __getFrameParts(self) -> tuple[tuple[int], list[Any], int]:
+        # The offset table of a batch is sent as the last buffer of the frame
+        params, buffers = self.__compressor.toParts(*self.__compressed.parts)
+        flags = WireFormat.BLOCKED if self.__workers is not None else 0
+        if self.__offsets is not None:
+            buffers, flags = [*buffers, np.ascontiguousarray(self.__offsets, dtype="<i8")], flags | WireFormat.BATCHED
+        return params, buffers, flags
+    
+    def __instrument(self, operation:str, method:Callable, sink:Callable[[OperationMetrics], None]|None) -> Callable:
+        def instrumented(*args, **kwargs):
+            timeBegin = time.perf_counter_ns()
+            result = method(self, *args, **kwargs)
+            metrics = self.__measure(operation, time.perf_counter_ns() - timeBegin, result, *args, **kwargs)
+            self.__counters.record(metrics)
+            if sink is not None:
+                sink(metrics)
+            return result
+        return instrumented
+    
+    def __measure(self, operation:str, durationNs:int, result:Any, *args, **kwargs) -> OperationMetrics:
+        # Size, length and mode of the compressed array, computed once per compressed array
+        if not self.__summary or self.__summary[0] is not self.__compressed:
+            self.__summary = (self.__compressed, *self.__summarize())
+        _, packedBytes, length, mode, threshold = self.__summary
+        bitsPerValue = 8*packedBytes / length if length != 0 else 0.0
+        
+        # Elements and bytes going in and out of each operation, reads only touching their share of the packed buffers
+        if operation in ("compress", "decompress"):
+            elements, rawBytes = length, self.__arr.nbytes
+            inputBytes, outputBytes = (rawBytes, packedBytes) if operation == "compress" else (packedBytes, rawBytes)
+        elif operation == "transmit":
+            compressed = args[0] if args else kwargs.get("compressed", True)
+            elements, inputBytes, outputBytes = length, packedBytes if compressed else self.__arr.nbytes, result
+        else:
+            elements = len(result) if operation in ("decompressRange", "getMany") else result if operation == "decompressInto" else 1
+            inputBytes, outputBytes = -(-int(elements*bitsPerValue) // 8), elements * 8
+        return OperationMetrics(operation, durationNs, elements, inputBytes, outputBytes, bitsPerValue, mode, threshold)
+    
+    def __summarize(self) -> tuple[int, int, str, int|float|None]:
+        if self.__compressed is None:
+            return 0, len(self.__arr), *self.__getModeAndThreshold()
+        packedBytes = sum(memoryview(buffer).nbytes for buffer in self.__compressor.toParts(*self.__compressed.parts)[1])
+        return packedBytes, self.__compressor.getLength(*self.__compressed.parts), *self.__getModeAndThreshold()
+    
+    def __getModeAndThreshold(self) -> tuple[str, int|float|None]:
+        compressor = self.__compressor.compressor if isinstance(self.__compressor, ParallelCompressor) else self.__compressor
+        
+        # The auto mode reports the mode it picked, unless each parallel block picked its own
+        if isinstance(compressor, AutoCompressor) and compressor is self.__compressor and self.__compressed is not None:
+            compressed, mode, threshold = self.__compressed.parts
+            return mode, threshold if mode == "overflow" else None
+        return self.__mode, getattr(compressor, "threshold", None)
+
+if __name__ == "__main__":
     ...
\ No newline at end of file
@@ -1,73 +1,539 @@
-import pytest
-import numpy as np
-import os
-
-import main
-
-# Create the bit packing handler
-split = main.BitPacking("split")
-nosplit = main.BitPacking("nosplit")
-overflow = {
-    "overflow1": main.BitPacking("overflow", 1),
-    "overflow2": main.BitPacking("overflow", 2),
-    "overflow4": main.BitPacking("overflow", 4),
-    "overflow8": main.BitPacking("overflow", 8),
-    "overflow12": main.BitPacking("overflow", 12)
-}
-
-
-# Import the test files
-testFiles = {}
-for file in os.listdir("IN"):
-    testFiles[file.strip(".in")] = np.fromfile(f"IN\\{file}", dtype=np.int32, sep=" ")
-
-testFiles["32bit"] = np.array([2**32-1, -2**32+1, 2**31+1])
-testFiles["unitary0"] = np.array([0])
-testFiles["unitary32"] = np.array([2**32-1])
-    
-
-# Test Split compression process
-def test_splitCompression():
-    for key, testVal in testFiles.items():
-        split.setArr(testVal)
-        split.compress()
-        
-        # Test get
-        assert split.get(0, compressed=True) == testVal[0], f"{key}: split get index 0 different."
-        assert split.get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: split get index -1 different."
-        assert split.get(((len(testVal)-1)/2).__ceil__(), compressed=True) == testVal[((len(testVal)-1)/2).__ceil__()], f"{key}: split get index {((len(testVal)-1)/2).__ceil__()} different."
-        
-        # Test compression -> decompression pipeline
-        split.decompress()
-        assert np.all(split.getArr()==testVal), f"{key}: split compression process not working."
-        
-# Test Nosplit compression process 
-def test_nosplitCompression():
-    for key, testVal in testFiles.items():
-        nosplit.setArr(testVal)
-        nosplit.compress()
-        
-        # Test get
-        assert nosplit.get(0, compressed=True) == testVal[0], f"{key}: nosplit get index 0 different."
-        assert nosplit.get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: nosplit get index -1 different."
-        assert nosplit.get(((len(testVal)-1)/2).__ceil__(), compressed=True) == testVal[((len(testVal)-1)/2).__ceil__()], f"{key}: nosplit get index {((len(testVal)-1)/2).__ceil__()} different."
-        
-        # Test compression -> decompression pipeline
-        nosplit.decompress()
-        assert np.all(nosplit.getArr()==testVal), f"{key}: nosplit compression process not working."
-
-# Test Overflow compression process
-def test_overflowCompression():
-    for overflowKey in overflow.keys(): 
-        for key, testVal in testFiles.items():
-            overflow[overflowKey].setArr(testVal)
-            overflow[overflowKey].compress()
-            
-            # Test get
-            assert overflow[overflowKey].get(0, compressed=True) == testVal[0], f"{key}: {overflowKey} get index 0 different."
-            assert overflow[overflowKey].get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: {overflowKey} get index -1 different."
-            assert overflow[overflowKey].get(((len(testVal)-1)/2).__ceil__(), compressed=True) == testVal[((len(testVal)-1)/2).__ceil__()], f"{key}: overflow[overflowKey] get index {((len(testVal)-1)/2).__ceil__()} different."
-            
-            # Test compression -> decompression pipeline
-            overflow[overflowKey].decompress()
-            assert np.all(overflow[overflowKey].getArr()==testVal), f"{key}: {overflowKey} compression process not working."
\ No newline at end of file
+import pytest
+import numpy as np
+import asyncio
+import socket
+
+import main
+from arrayGenerator import loadDatasets
+from Compressor.OverflowCompressor import OverflowCompressor
+from Compressor import WireFormat
+from Compressor.ParallelCompressor import PARALLEL_BLOCK_SIZE
+
+# Create the bit packing handler
+split = main.BitPacking("split")
+nosplit = main.BitPacking("nosplit")
+overflow = {
+    "overflow1": main.BitPacking("overflow", 1),
+    "overflow2": main.BitPacking("overflow", 2),
+    "overflow4": main.BitPacking("overflow", 4),
+    "overflow8": main.BitPacking("overflow", 8),
+    "overflow12": main.BitPacking("overflow", 12)
+}
+
+
+# Open the test files as memory maps (they are generated from the manifest when missing)
+testFiles = loadDatasets("IN", ["smallInt_small", "smallInt_medium", "smallInt_large", "largeInt_small", "largeInt_medium", "boltzmann_small", "boltzmann_medium", "superLargeInt_small", "superLargeInt_medium"])
+
+testFiles["32bit"] = np.array([2**32-1, -2**32+1, 2**31+1])
+testFiles["unitary0"] = np.array([0])
+testFiles["unitary32"] = np.array([2**32-1])
+    
+
+# Test Split compression process
+def test_splitCompression():
+    for key, testVal in testFiles.items():
+        split.setArr(testVal)
+        split.compress()
+        
+        # Test get
+        assert split.get(0, compressed=True) == testVal[0], f"{key}: split get index 0 different."
+        assert split.get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: split get index -1 different."
+        assert split.get(((len(testVal)-1)/2).__ceil__(), compressed=True) == testVal[((len(testVal)-1)/2).__ceil__()], f"{key}: split get index {((len(testVal)-1)/2).__ceil__()} different."
+        
+        # Test get many
+        indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+        assert np.all(split.getMany(indices, compressed=True) == testVal[indices]), f"{key}: split getMany different."
+        
+        # Test range decompression
+        start, stop = len(testVal)//3, len(testVal)//2 + 1
+        assert np.all(split.decompressRange(start, stop) == testVal[start:stop]), f"{key}: split decompressRange different."
+        
+        # Test compression -> decompression pipeline
+        split.decompress()
+        assert np.all(split.getArr()==testVal), f"{key}: split compression process not working."
+        
+# Test Split compressed format (the bit layout must stay the same so that existing payloads can still be decoded)
+def test_splitFormat():
+    split.setArr(np.array([-892, 89, 760, 216, 14], dtype=np.int32))
+    split.compress()
+    
+    compressedArr, *_ = split.getCompressedArr()
+    assert compressedArr.to01() == "1110111110000001011001010111110000001101100000000001110000000000", "split compressed format changed."
+        
+# Test Nosplit compression process 
+def test_nosplitCompression():
+    for key, testVal in testFiles.items():
+        nosplit.setArr(testVal)
+        nosplit.compress()
+        
+        # Test get
+        assert nosplit.get(0, compressed=True) == testVal[0], f"{key}: nosplit get index 0 different."
+        assert nosplit.get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: nosplit get index -1 different."
+        assert nosplit.get(((len(testVal)-1)/2).__ceil__(), compressed=True) == testVal[((len(testVal)-1)/2).__ceil__()], f"{key}: nosplit get index {((len(testVal)-1)/2).__ceil__()} different."
+        
+        # Test get many
+        indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+        assert np.all(nosplit.getMany(indices, compressed=True) == testVal[indices]), f"{key}: nosplit getMany different."
+        
+        # Test range decompression
+        start, stop = len(testVal)//3, len(testVal)//2 + 1
+        assert np.all(nosplit.decompressRange(start, stop) == testVal[start:stop]), f"{key}: nosplit decompressRange different."
+        
+        # Test compression -> decompression pipeline
+        nosplit.decompress()
+        assert np.all(nosplit.getArr()==testVal), f"{key}: nosplit compression process not working."
+
+# Test Nosplit compressed format (values never cross an int32 boundary)
+def test_nosplitFormat():
+    nosplit.setArr(np.array([5, -3, 7, 1, 2, 3, 4, 5, 6, 7, 1], dtype=np.int32))
+    nosplit.compress()
+    
+    compressedArr, signArr, *_ = nosplit.getCompressedArr()
+    assert compressedArr.to01() == "10101111100101001110010111011100" + "001" + "0"*29, "nosplit compressed format changed."
+    assert signArr.to01() == "01000000000", "nosplit sign format changed."
+
+# Test Overflow compression process
+def test_overflowCompression():
+    for overflowKey in overflow.keys(): 
+        for key, testVal in testFiles.items():
+            overflow[overflowKey].setArr(testVal)
+            overflow[overflowKey].compress()
+            
+            # Test get
+            assert overflow[overflowKey].get(0, compressed=True) == testVal[0], f"{key}: {overflowKey} get index 0 different."
+            assert overflow[overflowKey].get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: {overflowKey} get index -1 different."
+            assert overflow[overflowKey].get(((len(testVal)-1)/2).__ceil__(), compressed=True) == testVal[((len(testVal)-1)/2).__ceil__()], f"{key}: overflow[overflowKey] get index {((len(testVal)-1)/2).__ceil__()} different."
+            
+            # Test get many
+            indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+            assert np.all(overflow[overflowKey].getMany(indices, compressed=True) == testVal[indices]), f"{key}: {overflowKey} getMany different."
+            
+            # Test range decompression
+            start, stop = len(testVal)//3, len(testVal)//2 + 1
+            assert np.all(overflow[overflowKey].decompressRange(start, stop) == testVal[start:stop]), f"{key}: {overflowKey} decompressRange different."
+            
+            # Test the size estimate (the bits of the buffers sent, the rank index being rebuilt by the receiver)
+            threshold = int(overflowKey.removeprefix("overflow"))
+            assert main.estimateSize(testVal, "overflow", threshold) == 8*sum(memoryview(buffer).nbytes for buffer in main.createCompressor("overflow", threshold).toParts(*overflow[overflowKey].getCompressedArr())[1]), f"{key}: {overflowKey} estimate different."
+            
+            # Test compression -> decompression pipeline
+            overflow[overflowKey].decompress()
+            assert np.all(overflow[overflowKey].getArr()==testVal), f"{key}: {overflowKey} compression process not working."
+
+# Test Overflow rank index (payloads compressed without it must still be readable, and the rebuilt index must match)
+def test_overflowRankIndex():
+    noIndex = main.BitPacking("overflow", 4, False)
+    testVal = testFiles["boltzmann_small"]
+    noIndex.setArr(testVal)
+    noIndex.compress()
+    
+    compressedArr, maxBitLength, overflowArr, maxOverflowBitLength, initialLength, rankIndex = noIndex.getCompressedArr()
+    assert rankIndex is None, "overflow rank index built while disabled."
+    assert noIndex.get(len(testVal)-1, compressed=True) == testVal[-1], "overflow get without rank index different."
+    
+    # Rebuild the index from the compressed tuple and compare it with the one built at compression, on arrays long enough to span several superblocks
+    for overflowKey, threshold in [("overflow1", 1), ("overflow4", 4), ("overflow12", 12)]:
+        for key in ["boltzmann_small", "largeInt_medium"]:
+            overflow[overflowKey].setArr(testFiles[key])
+            overflow[overflowKey].compress()
+            compressedArr = overflow[overflowKey].getCompressedArr()
+            rebuiltIndex = OverflowCompressor(threshold).buildRankIndex(*compressedArr[:5])[5]
+            superCounts, subCounts = compressedArr[5]
+            assert np.all(rebuiltIndex[0] == superCounts) and np.all(rebuiltIndex[1] == subCounts), f"{key}: {overflowKey} rebuilt rank index different."
+
+# Test streaming compression (the input is compressed chunk by chunk into self-describing blocks)
+def test_streamCompression():
+    testVal = testFiles["smallInt_large"]
+    for handler in [split, nosplit, overflow["overflow4"], main.BitPacking("split", workers=2), main.BitPacking("overflow", 4, workers=2)]:
+        blocks = handler.compressStream(main.iterChunks(testVal, 100_000))
+        decompressedArr = np.concatenate(list(main.BitPacking.decompressStream(blocks)))
+        assert np.all(decompressedArr == testVal), "stream compression process not working."
+
+# Test binary serialisation (the frame must decode to the same array, its buffers being read in place)
+def test_wireFormat():
+    testVal = testFiles["boltzmann_medium"]
+    for handler in [split, nosplit, *overflow.values()]:
+        handler.setArr(testVal)
+        handler.compress()
+        
+        received = main.BitPacking.fromBuffer(memoryview(handler.toBytes()))
+        assert received.get(len(testVal)-1, compressed=True) == testVal[-1], "wire format get different."
+        received.decompress()
+        assert np.all(received.getArr() == testVal), "wire format process not working."
+    
+    # A frame cut anywhere, in its header or in a buffer, must be refused
+    frame = overflow["overflow12"].toBytes()
+    for cut in [4, WireFormat.HEADER.size + 4, len(frame) // 2, len(frame) - 9]:
+        with pytest.raises(ValueError, match="truncated frame"):
+            main.BitPacking.fromBuffer(frame[:cut])
+    
+    # A frame of another version (whose auto mode indices or buffers may differ) must be refused
+    with pytest.raises(ValueError, match="version"):
+        main.BitPacking.fromBuffer(frame[:4] + bytes([WireFormat.VERSION - 1]) + frame[5:])
+
+# Test memory-mapped files (get, range decompression and full decompression run over the mapped file)
+def test_mmapFile(tmp_path):
+    testVal = testFiles["largeInt_medium"]
+    for key, handler in {"split": split, "nosplit": nosplit, "overflow8": overflow["overflow8"]}.items():
+        handler.setArr(testVal)
+        handler.compress()
+        handler.save(tmp_path / f"{key}.bpk")
+        
+        mapped = main.BitPacking.openMmap(tmp_path / f"{key}.bpk")
+        assert mapped.get(len(testVal)-1, compressed=True) == testVal[-1], f"{key}: mmap get different."
+        assert np.all(mapped.decompressRange(100, 200) == testVal[100:200]), f"{key}: mmap decompressRange different."
+        mapped.decompress()
+        assert np.all(mapped.getArr() == testVal), f"{key}: mmap process not working."
+
+# Test parallel compression (the array is split into blocks compressed independently, positions must stay global)
+def test_parallelCompression():
+    testVal = testFiles["smallInt_large"]
+    for mode, args in [("split", ()), ("nosplit", ()), ("overflow", (4,))]:
+        parallel = main.BitPacking(mode, *args, workers=4)
+        parallel.setArr(testVal)
+        parallel.compress()
+        
+        assert parallel.get(len(testVal)-1, compressed=True) == testVal[-1], f"{mode}: parallel get index -1 different."
+        indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+        assert np.all(parallel.getMany(indices, compressed=True) == testVal[indices]), f"{mode}: parallel getMany different."
+        assert np.all(parallel.decompressRange(200_000, 300_000) == testVal[200_000:300_000]), f"{mode}: parallel decompressRange different."
+        
+        parallel.decompress()
+        assert np.all(parallel.getArr() == testVal), f"{mode}: parallel compression process not working."
+
+
+# Test automatic mode (the picked candidate must be the smallest estimate and the estimates must be the exact serialised sizes)
+def test_autoCompression(tmp_path):
+    for file in ["smallInt_medium", "boltzmann_medium", "largeInt_medium", "32bit", "unitary0"]:
+        testVal = testFiles[file]
+        auto = main.BitPacking("auto")
+        auto.setArr(testVal)
+        auto.compress()
+        compressed, mode, threshold = auto.getCompressedArr()
+        
+        sizes = {candidate: main.estimateSize(testVal, *candidate) for candidate in [("split", None), ("nosplit", None), ("for", None), ("delta", None), ("dict", None), *(("overflow", t) for t in range(1, 33))]}
+        assert main.estimateSize(testVal, "auto") == min(sizes.values()), f"{file}: auto mode not the smallest."
+        assert main.estimateSize(testVal, mode, threshold or None) == min(sizes.values()), f"{file}: auto estimate different."
+        
+        received = main.BitPacking.fromBuffer(auto.toBytes())
+        assert received.get(len(testVal)-1, compressed=True) == testVal[-1], f"{file}: auto get different."
+        received.decompress()
+        assert np.all(received.getArr() == testVal), f"{file}: auto compression process not working."
+    
+    # Parallel blocks picking modes with different numbers of parameters and buffers must survive the frame and the file
+    blockSize = PARALLEL_BLOCK_SIZE
+    testVal = np.concatenate([np.resize(testFiles["smallInt_small"], blockSize), np.arange(blockSize)*1000 + 10**9, np.repeat(np.array([7, -2**40, 2**35, 13]), blockSize//4)])
+    auto = main.BitPacking("auto", workers=2)
+    auto.setArr(testVal)
+    auto.compress()
+    assert len({mode for _, mode, _ in auto.getCompressedArr()[0]}) == 3, "parallel auto blocks not picking different modes."
+    
+    auto.save(tmp_path / "auto.bpk")
+    for received in [main.BitPacking.fromBuffer(auto.toBytes()), main.BitPacking.openMmap(tmp_path / "auto.bpk")]:
+        assert received.get(len(testVal)-1, compressed=True) == testVal[-1], "parallel auto get different."
+        received.decompress()
+        assert np.all(received.getArr() == testVal), "parallel auto compression process not working."
+
+
+# Test frame of reference compression (an outlier must only widen its own block)
+def test_forCompression():
+    for blockSize in [128, 256]:
+        for file, testVal in testFiles.items():
+            handler = main.BitPacking("for", blockSize)
+            handler.setArr(testVal)
+            handler.compress()
+            
+            assert handler.get(0, compressed=True) == testVal[0], f"{file}: for get index 0 different."
+            assert handler.get(len(testVal)-1, compressed=True) == testVal[-1], f"{file}: for get index -1 different."
+            received = main.BitPacking.fromBuffer(handler.toBytes())
+            received.decompress()
+            assert np.all(received.getArr() == testVal), f"{file}: for compression process not working."
+    
+    # A block must hold at least one element
+    for mode in ["for", "delta"]:
+        for blockSize in [0, -128]:
+            with pytest.raises(ValueError, match="block size"):
+                main.createCompressor(mode, blockSize)
+    
+    outlier = np.r_[np.full(1000, 1_000_000), 2**31-1, np.full(1000, 1_000_000)]
+    assert main.estimateSize(outlier, "for") < main.estimateSize(outlier, "split") / 10, "for outlier not isolated."
+
+
+# Test delta compression (sorted and slowly varying sequences, and any int64 array must round-trip)
+def test_deltaCompression():
+    timestamps = np.cumsum(np.random.default_rng(0).integers(0, 1000, 100_000)) + 1_700_000_000
+    for file, testVal in {**testFiles, "timestamps": timestamps, "int64": np.array([-2**63, 2**63-1, 0, -2**63])}.items():
+        handler = main.BitPacking("delta")
+        handler.setArr(testVal)
+        handler.compress()
+        
+        assert handler.get(len(testVal)-1, compressed=True) == testVal[-1], f"{file}: delta get index -1 different."
+        indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+        assert np.all(handler.getMany(indices, compressed=True) == testVal[indices]), f"{file}: delta getMany different."
+        received = main.BitPacking.fromBuffer(handler.toBytes())
+        received.decompress()
+        assert np.all(received.getArr() == testVal), f"{file}: delta compression process not working."
+    
+    assert main.estimateSize(timestamps, "delta") < main.estimateSize(timestamps, "split") / 2, "delta not smaller on timestamps."
+
+
+# Test dictionary compression (few distinct values of any magnitude must be stored on the bit length of their number)
+def test_dictCompression():
+    categories = np.random.default_rng(0).choice(np.array([-2**63, -2**40, 7, 123_456_789, 2**63-1]), 100_000)
+    for file, testVal in {**testFiles, "categories": categories}.items():
+        handler = main.BitPacking("dict")
+        handler.setArr(testVal)
+        handler.compress()
+        
+        assert handler.get(len(testVal)-1, compressed=True) == testVal[-1], f"{file}: dict get index -1 different."
+        indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+        assert np.all(handler.getMany(indices, compressed=True) == testVal[indices]), f"{file}: dict getMany different."
+        received = main.BitPacking.fromBuffer(handler.toBytes())
+        received.decompress()
+        assert np.all(received.getArr() == testVal), f"{file}: dict compression process not working."
+        assert main.estimateSize(testVal, "dict") == 8*sum(memoryview(buffer).nbytes for buffer in main.createCompressor("dict").toParts(*handler.getCompressedArr())[1]), f"{file}: dict estimate different."
+    
+    assert main.estimateSize(categories, "dict") < main.estimateSize(categories, "for") / 10, "dict not smaller on categories."
+
+
+# Test varint compression (the byte-aligned codes of small values must be decoded through the control bytes, wide ones included)
+def test_varintCompression():
+    smallValues = np.random.default_rng(0).integers(-100, 100, 100_000)
+    for file, testVal in {**testFiles, "small": smallValues, "int64": np.array([-2**63, 2**63-1, 0, -1, 2**40])}.items():
+        handler = main.BitPacking("varint")
+        handler.setArr(testVal)
+        handler.compress()
+        
+        assert handler.get(len(testVal)-1, compressed=True) == testVal[-1], f"{file}: varint get index -1 different."
+        indices = np.linspace(0, len(testVal)-1, 100).astype(int)
+        assert np.all(handler.getMany(indices, compressed=True) == testVal[indices]), f"{file}: varint getMany different."
+        assert np.all(handler.decompressRange(3, len(testVal)-2) == testVal[3:len(testVal)-2]), f"{file}: varint decompressRange different."
+        received = main.BitPacking.fromBuffer(handler.toBytes())
+        received.decompress()
+        assert np.all(received.getArr() == testVal), f"{file}: varint compression process not working."
+        assert main.estimateSize(testVal, "varint") == 8*sum(memoryview(buffer).nbytes for buffer in main.createCompressor("varint").toParts(*handler.getCompressedArr())[1]), f"{file}: varint estimate different."
+    
+    assert main.estimateSize(smallValues, "varint") == 8*(len(smallValues) + len(smallValues)//4), "varint not on one byte per small value."
+
+
+# Test the scans computed on the compressed array (they must give the same result as NumPy on the decompressed array)
+def test_compressedScans():
+    testVal = testFiles["boltzmann_medium"]
+    for mode, args in [("split", ()), ("nosplit", ()), ("overflow", (4,)), ("for", ()), ("delta", ()), ("dict", ()), ("varint", ()), ("auto", ())]:
+        handler = main.BitPacking(mode, *args)
+        handler.setArr(testVal)
+        handler.compress()
+        
+        assert handler.sum() == testVal.sum(), f"{mode}: sum different."
+        assert handler.min() == testVal.min() and handler.max() == testVal.max(), f"{mode}: min or max different."
+        for op, comparison in [("<", np.less), ("<=", np.less_equal), (">", np.greater), (">=", np.greater_equal), ("==", np.equal), ("!=", np.not_equal)]:
+            for value in [0, int(testVal[0]), int(np.median(testVal)), int(testVal.max()) + 1]:
+                assert handler.countWhere(op, value) == np.count_nonzero(comparison(testVal, value)), f"{mode}: countWhere {op} {value} different."
+                assert np.all(handler.where(op, value) == np.flatnonzero(comparison(testVal, value))), f"{mode}: where {op} {value} different."
+    
+    with pytest.raises(ValueError):
+        handler.countWhere("~", 0)
+
+
+# Test the metrics (each operation must be reported to the sink and counted, and nothing once disabled)
+def test_metrics():
+    testVal = testFiles["smallInt_medium"]
+    events = []
+    handler = main.BitPacking("overflow", 4, metrics=events.append)
+    handler.setArr(testVal)
+    handler.compress()
+    handler.get(0, compressed=True)
+    handler.getMany(np.arange(10), compressed=True)
+    handler.decompress()
+    
+    assert [event.operation for event in events] == ["compress", "get", "getMany", "decompress"], "metrics operations different."
+    compressMetrics = events[0]
+    assert compressMetrics.elements == len(testVal) and compressMetrics.inputBytes == testVal.nbytes, "metrics input different."
+    assert compressMetrics.bitsPerValue == 8*compressMetrics.outputBytes/len(testVal), "metrics bits per value different."
+    assert (compressMetrics.mode, compressMetrics.threshold) == ("overflow", 4), "metrics mode different."
+    assert handler.getCounters().snapshot()["getMany"]["elements"] == 10, "metrics counters different."
+    
+    handler.disableMetrics()
+    handler.compress()
+    assert len(events) == 4 and handler.getCounters() is None, "metrics not disabled."
+
+
+# Test int64 inputs and 64-bit words (the extremes of int64 must round-trip in every mode and with both word sizes)
+def test_int64Compression():
+    extremes = np.array([-2**63, 2**63-1, 0, -2**63, 1, -1, 2**62, -(2**63-1)])
+    wide = np.random.default_rng(0).integers(-2**40, 2**40, 10_000)
+    for mode, args in [("split", ()), ("split", (64,)), ("nosplit", ()), ("nosplit", (64,)), ("overflow", (4,)), ("overflow", (4, True, 64)), ("overflow", (40, False)), ("for", ()), ("delta", ()), ("auto", ())]:
+        for file, testVal in {"extremes": extremes, "wide": wide, "min": np.full(100, -2**63)}.items():
+            handler = main.BitPacking(mode, *args)
+            handler.setArr(testVal)
+            handler.compress()
+            
+            assert handler.get(0, compressed=True) == testVal[0] and handler.get(len(testVal)-1, compressed=True) == testVal[-1], f"{mode}{args} {file}: int64 get different."
+            assert np.all(handler.getMany(np.arange(len(testVal)), compressed=True) == testVal), f"{mode}{args} {file}: int64 getMany different."
+            assert handler.sum() == sum(int(value) for value in testVal), f"{mode}{args} {file}: int64 sum different."
+            assert handler.min() == testVal.min() and handler.max() == testVal.max(), f"{mode}{args} {file}: int64 min or max different."
+            received = main.BitPacking.fromBuffer(handler.toBytes())
+            received.decompress()
+            assert np.all(received.getArr() == testVal), f"{mode}{args} {file}: int64 compression process not working."
+    
+    # 11-bit values: 5 per 64-bit word instead of 2 per 32-bit word
+    smallVal = testFiles["smallInt_medium"] * 8
+    assert main.createCompressor("nosplit", 64).estimateSize(smallVal) < main.createCompressor("nosplit").estimateSize(smallVal), "nosplit 64-bit words not smaller."
+    with pytest.raises(ValueError):
+        main.BitPacking("split", 48)
+
+
+
+# Test the pipelined transmission (the blocks sent over a socket pair must be received in order, whatever the mode and the block size)
+def test_asyncTransmit():
+    async def transmit(handler, blockSize):
+        receiving, sending = socket.socketpair()
+        reader, readerSide = await asyncio.open_connection(sock=receiving)
+        writerSide, writer = await asyncio.open_connection(sock=sending)
+        try:
+            return await asyncio.gather(handler.sendAsync(writer, blockSize, depth=1), main.BitPacking.receiveAsync(reader, depth=1))
+        finally:
+            writer.close()
+            readerSide.close()
+    
+    testVal = testFiles["largeInt_medium"]
+    for mode, args, workers in [("split", (), None), ("overflow", (8,), 2), ("delta", (), None), ("auto", (), None)]:
+        for values in [testVal, testVal[:1], testVal[:0]]:
+            handler = main.BitPacking(mode, *args, workers=workers)
+            handler.setArr(values)
+            sentBytes, received = asyncio.run(transmit(handler, 10_000))
+            assert np.all(received == values) and len(received) == len(values), f"{mode}: pipelined transmission not working."
+            assert sentBytes > 0, f"{mode}: pipelined transmission sent nothing."
+
+
+
+# Test the writes into the compressed array (in place when the values fit, the array being re-packed or widened otherwise)
+def test_mutableCompression():
+    rng = np.random.default_rng(0)
+    base = testFiles["smallInt_medium"][:5_000]
+    for mode, args, workers in [("split", (), None), ("nosplit", (), None), ("nosplit", (64,), None), ("overflow", (4,), None), ("overflow", (4, False), None), ("for", (), None), ("delta", (), None), ("dict", (), None), ("varint", (), None), ("auto", (), None), ("split", (), 2)]:
+        handler = main.BitPacking(mode, *args, workers=workers)
+        handler.setArr(base)
+        handler.compress()
+        expected = np.array(base, dtype=np.int64)
+        
+        # Appends one by one and by batches, with some values wider than the array, then writes anywhere
+        appended = rng.integers(-300, 300, 500)
+        for value in appended:
+            handler.append(value)
+        batch = np.r_[rng.integers(-2**20, 2**20, 100), -2**63, 2**63-1]
+        handler.extend(batch)
+        expected = np.r_[expected, appended, batch]
+        for i, value in zip(rng.integers(0, len(expected), 200), rng.integers(-2**12, 2**12, 200)):
+            handler.set(int(i), int(value))
+            expected[i] = value
+        handler.set(-1, 7)
+        expected[-1] = 7
+        
+        assert np.all(handler.getMany(np.arange(len(expected)), compressed=True) == expected), f"{mode}{args}: getMany after writes different."
+        assert handler.sum() == sum(int(value) for value in expected), f"{mode}{args}: sum after writes different."
+        received = main.BitPacking.fromBuffer(handler.toBytes())
+        received.append(-5)
+        received.decompress()
+        assert np.all(received.getArr() == np.r_[expected, -5]), f"{mode}{args}: writes after transmission different."
+        with pytest.raises(IndexError):
+            handler.set(len(expected), 0)
+
+
+
+# Test the cache of decoded blocks (served values, counters, eviction and invalidation on writes)
+def test_blockCache():
+    testVal = testFiles["largeInt_medium"]
+    for mode, args in [("split", ()), ("overflow", (8,)), ("delta", ())]:
+        handler = main.BitPacking(mode, *args, cache=8*1024*4)
+        handler.setArr(testVal)
+        handler.compress()
+        cache = handler.getCache()
+        
+        # Repeated reads of the same region are hits, a region larger than the capacity evicts the oldest blocks
+        assert handler.get(10, compressed=True) == testVal[10] and handler.get(-1, compressed=True) == testVal[-1], f"{mode}: cached get different."
+        assert np.all(handler.getMany(np.arange(0, 1000, 7), compressed=True) == testVal[0:1000:7]), f"{mode}: cached getMany different."
+        assert cache.snapshot()["hits"] == 1 and cache.snapshot()["misses"] == 2, f"{mode}: cache counters wrong."
+        assert np.all(handler.decompressRange(500, 9000) == testVal[500:9000]), f"{mode}: cached decompressRange different."
+        assert cache.snapshot()["evictions"] > 0 and cache.snapshot()["bytes"] <= cache.capacity, f"{mode}: cache over capacity."
+        
+        # Writes drop the blocks they change
+        handler.set(600, 123)
+        handler.extend([1, 2, 3])
+        assert handler.get(600, compressed=True) == 123 and handler.get(-1, compressed=True) == 3, f"{mode}: cache not invalidated on writes."
+        assert np.all(handler.decompressRange(-4, None) == [testVal[-1], 1, 2, 3]), f"{mode}: cache not invalidated on extend."
+        handler.compress()
+        assert handler.get(600, compressed=True) == testVal[600], f"{mode}: cache not invalidated on compress."
+
+
+
+# Test the compressed array object (single accesses with its layout constants, slices, iteration and conversion to NumPy)
+def test_compressedArray():
+    testVal = np.r_[testFiles["largeInt_medium"][:3_000].astype(np.int64), 2**40, -2**63]
+    for mode, args, workers in [("split", (), None), ("nosplit", (), None), ("nosplit", (64,), None), ("overflow", (8,), None), ("for", (), None), ("delta", (), None), ("auto", (), None), ("overflow", (8,), 2)]:
+        handler = main.BitPacking(mode, *args, workers=workers)
+        handler.setArr(testVal)
+        handler.compress()
+        compressedArr = handler.getCompressed()
+        
+        assert len(compressedArr) == len(testVal), f"{mode}{args}: compressed array length different."
+        assert all(compressedArr[i] == testVal[i] for i in range(0, len(testVal), 7)) and compressedArr[-1] == testVal[-1], f"{mode}{args}: compressed array indexing different."
+        assert np.all(compressedArr[10:2000:3] == testVal[10:2000:3]) and np.all(compressedArr[[5, -2, 0]] == testVal[[5, -2, 0]]), f"{mode}{args}: compressed array slicing different."
+        assert list(compressedArr) == testVal.tolist() and np.all(np.asarray(compressedArr) == testVal), f"{mode}{args}: compressed array iteration different."
+        with pytest.raises(IndexError):
+            compressedArr[len(testVal)]
+        
+        # The compressor builds the same object on its own
+        compressor = main.createCompressor(mode, *args)
+        assert np.all(np.asarray(compressor.compressArray(testVal)) == testVal) and compressor.compressArray(testVal)[-1] == testVal[-1], f"{mode}{args}: compressArray different."
+        
+        # A write gives a new compressed array, the single accesses reading the new values
+        handler.set(3, -9)
+        assert handler.getCompressed()[3] == -9 and handler.get(3, compressed=True) == -9, f"{mode}{args}: compressed array not updated on writes."
+
+
+# Test the decompression into a buffer of the caller (windows, narrower types, memoryviews and reuse of the same buffer)
+def test_decompressInto():
+    testVal = testFiles["largeInt_medium"]
+    out = np.zeros(30_000, dtype=np.int32)
+    for mode, args, workers in [("split", (), None), ("nosplit", (), None), ("overflow", (8,), None), ("for", (), None), ("delta", (), None), ("auto", (), None), ("split", (), 2)]:
+        handler = main.BitPacking(mode, *args, workers=workers)
+        handler.setArr(testVal)
+        handler.compress()
+        
+        # The same buffer receives every window, the last one being shorter
+        for start in range(0, len(testVal), len(out)):
+            written = handler.decompressInto(out, start)
+            assert written == min(len(out), len(testVal) - start) and np.all(out[:written] == testVal[start:start+written]), f"{mode}{args}: decompressInto window different."
+        shared = bytearray(8*len(testVal))
+        assert handler.decompressInto(memoryview(shared).cast("q")) == len(testVal) and np.all(np.frombuffer(shared, dtype=np.int64) == testVal), f"{mode}{args}: decompressInto memoryview different."
+        assert handler.decompressInto(out[:10], -5) == 5 and np.all(out[:5] == testVal[-5:]), f"{mode}{args}: decompressInto negative start different."
+        with pytest.raises(ValueError):
+            handler.decompressInto(np.zeros(10, dtype=np.int8))
+        with pytest.raises(ValueError):
+            handler.decompressInto(np.zeros(10, dtype=np.float64))
+
+
+# Test the batches of arrays (one compressed array with an offset table, read array by array or element by element, and sent as a single frame)
+def test_batchCompression():
+    rng = np.random.default_rng(0)
+    arrays = [testFiles["smallInt_small"], np.zeros(0, dtype=np.int32), testFiles["largeInt_small"], np.array([-2**63, 2**40]), *(rng.integers(-300, 300, rng.integers(1, 50)) for _ in range(20))]
+    for mode, args, workers in [("split", (), None), ("nosplit", (), None), ("overflow", (8,), None), ("for", (), None), ("delta", (), None), ("auto", (), None), ("split", (), 2)]:
+        handler = main.BitPacking(mode, *args, workers=workers)
+        batch = handler.compressBatch(arrays)
+        
+        assert len(batch) == len(arrays) and np.all(batch.getLengths() == [len(arr) for arr in arrays]), f"{mode}{args}: batch lengths different."
+        assert all(np.all(batch[k] == arr) for k, arr in enumerate(arrays)), f"{mode}{args}: batch arrays different."
+        assert batch.get(2, 10) == arrays[2][10] and batch.get(-1, -1) == arrays[-1][-1] and batch.get(3, 0) == -2**63, f"{mode}{args}: batch get different."
+        with pytest.raises(IndexError):
+            batch.get(1, 0)
+        with pytest.raises(IndexError):
+            batch[len(arrays)]
+        
+        # The offset table travels in the same frame, and the values appended go to the last array
+        received = main.BitPacking.fromBuffer(handler.toBytes())
+        assert all(np.all(arr == expected) for arr, expected in zip(received.getBatch(), arrays)), f"{mode}{args}: batch frame different."
+        received.extend([7, 8])
+        assert np.all(received.getBatch()[-1] == np.r_[arrays[-1], 7, 8]), f"{mode}{args}: batch extend different."
+        handler.compress()
+        assert handler.getBatch() is None, f"{mode}{args}: batch kept after compress."
\ No newline at end of file